@@ -0,0 +1,66 @@
+"""
+Cursor, TextSpan and Token objects created per lexed KB by the token sources, and the bytes they take
+
+  python benchmarks/bench_allocations.py --lines 500
+"""
+import argparse
+import sys
+
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from stream_lexer_cpp import *
+import stream_parser
+from bench_lexer import generateText, streamLexerTokens, lineLexerTokens
+
+# Code objects of the constructors, with the class each one creates
+constructors = {
+  Cursor.__init__.__func__.__code__: Cursor,
+  TextSpan.__init__.__func__.__code__: TextSpan,
+  Token.__init__.__func__.__code__: Token,
+}
+if hasattr(stream_parser, "makeSpan"):
+  constructors[stream_parser.makeSpan.__code__] = TextSpan
+
+def countAllocations(func, *args):
+  counts = dict((x, 0) for x in constructors.values())
+  def profile(frame, event, arg):
+    if event == "call":
+      created = constructors.get(frame.f_code)
+      if created is not None:
+        counts[created] += 1
+  sys.setprofile(profile)
+  try:
+    func(*args)
+  finally:
+    sys.setprofile(None)
+  return counts
+
+def objectSize(obj):
+  size = sys.getsizeof(obj)
+  if hasattr(obj, "__dict__"):
+    size += sys.getsizeof(obj.__dict__)
+  return size
+
+def main(lines, allow_space_token):
+  text = generateText(lines)
+  kilobytes = len(text) / 1024.0
+  print("{} lines, {:.1f} KB, allow_space_token={}".format(text.count("\n"), kilobytes, allow_space_token))
+  sizes = {
+    Cursor: objectSize(Cursor(0, 0)),
+    TextSpan: objectSize(TextSpan()),
+    Token: objectSize(Token(TextSpan(), TokenType.kId)),
+  }
+  for name, func in [("CppStreamLexer", streamLexerTokens), ("LineTokenStream", lineLexerTokens)]:
+    # A fresh buffer so no lexed lines are cached yet
+    counts = countAllocations(func, Buffer(text), allow_space_token)
+    total = sum(counts.values())
+    total_bytes = sum(counts[x] * sizes[x] for x in counts)
+    print("{:<16} {:>10.0f} objects/KB {:>12.0f} bytes/KB  (Cursor {}, TextSpan {}, Token {})".format(
+        name, total / kilobytes, total_bytes / kilobytes, counts[Cursor], counts[TextSpan], counts[Token]))
+
+if __name__ == "__main__":
+  arg_parser = argparse.ArgumentParser(description='Lexer allocation benchmark')
+  arg_parser.add_argument('--lines', type=int, default=500)
+  arg_parser.add_argument('--spaces', action='store_true', help='lex with allow_space_token')
+  args = arg_parser.parse_args()
+  main(args.lines, args.spaces)
@@ -0,0 +1,54 @@
+"""
+Time of the first cpp_parser.parseVariables call in a fresh interpreter, import included, with the
+shipped lexer and parser tables and with the lexer and parser built from the rules
+
+  python benchmarks/bench_cold_start.py --runs 10
+"""
+import argparse
+import shutil
+import subprocess
+import tempfile
+
+import sys
+import os
+packageDir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+childCode = """
+import sys
+import time
+start = time.time()
+sys.path.insert(0, {directory!r})
+import cpp_parser
+cpp_parser.parseVariables("const std::map<int, std::vector<Object*>>& values_;")
+sys.stdout.write(repr(time.time() - start))
+"""
+
+def timeRun(directory):
+  # -B so no run finds the bytecode of an earlier one
+  output = subprocess.check_output([sys.executable, "-B", "-c", childCode.format(directory = directory)],
+      cwd = directory)
+  return float(output)
+
+def timeRuns(directory, runs):
+  return sorted(timeRun(directory) for x in xrange(runs))
+
+def main(runs):
+  # cpp_parser alone, so the tables can't be found
+  bare_dir = tempfile.mkdtemp()
+  try:
+    shutil.copy(os.path.join(packageDir, "cpp_parser.py"), bare_dir)
+    modes = [("tables", packageDir), ("no tables", bare_dir)]
+    for name, directory in modes:
+      times = timeRuns(directory, runs)
+      print("{:<10} min {:>8.2f}ms median {:>8.2f}ms".format(name, times[0] * 1000,
+          times[len(times) // 2] * 1000))
+    if os.listdir(bare_dir) != ["cpp_parser.py"]:
+      print("files written: {}".format(sorted(os.listdir(bare_dir))))
+  finally:
+    shutil.rmtree(bare_dir)
+
+if __name__ == "__main__":
+  arg_parser = argparse.ArgumentParser(description='First parseVariables call latency benchmark')
+  arg_parser.add_argument('--runs', type=int, default=10)
+  args = arg_parser.parse_args()
+  main(args.runs)
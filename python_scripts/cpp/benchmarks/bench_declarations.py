@@ -0,0 +1,75 @@
+"""
+Declarations per second of cpp_parser.parseVariables (PLY) and cpp_parser_fast.parseVariables (regex
+scanner and recursive descent) over generated member lists, and of cpp_parser_fast.parseVariables with
+every text already in its cache, the regenerate while editing case
+
+  python benchmarks/bench_declarations.py --texts 2000
+"""
+import argparse
+import random
+import time
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import cpp_parser
+import cpp_parser_fast
+
+memberTypes = [
+  "int",
+  "const std::vector<Foo*>&",
+  "Type",
+  "std::map<int, std::unique_ptr<Object>>",
+  "const char*",
+  "double* const",
+  "const ns::Widget&",
+]
+
+def generateTexts(count, seed = 0):
+  """
+  Member lists of 1 to 8 declarations, returns (texts, number of declarations)
+  """
+  rng = random.Random(seed)
+  texts = []
+  declarations = 0
+  for x in xrange(count):
+    members = []
+    for y in xrange(rng.randint(1, 8)):
+      default = rng.choice(["", "", " = 3", " = kDefault"])
+      members.append("{} member{}_{};".format(rng.choice(memberTypes), y, default))
+    declarations += len(members)
+    texts.append("\n".join(members))
+  return texts, declarations
+
+def timeRun(parse_variables, texts, repeat):
+  best = None
+  for x in xrange(repeat):
+    start = time.time()
+    for text in texts:
+      parse_variables(text)
+    elapsed = time.time() - start
+    if best is None or elapsed < best:
+      best = elapsed
+  return best
+
+def main(count, repeat):
+  texts, declarations = generateTexts(count)
+  expected = [cpp_parser.parseVariables(x) for x in texts]
+  if [cpp_parser_fast.parseVariables(x) for x in texts] != expected:
+    print("results differ")
+  print("{} texts, {} declarations".format(len(texts), declarations))
+  cache = cpp_parser_fast.parseCache
+  modes = [("ply", cpp_parser.parseVariables, 0), ("descent", cpp_parser_fast.parseVariables, 0),
+      ("cached", cpp_parser_fast.parseVariables, len(texts))]
+  for name, parse_variables, cache_size in modes:
+    cache.clear()
+    cache.resize(cache_size)
+    elapsed = timeRun(parse_variables, texts, repeat)
+    print("{:<8} {:>8.3f}s {:>10.0f} declarations/sec".format(name, elapsed, declarations / elapsed))
+
+if __name__ == "__main__":
+  arg_parser = argparse.ArgumentParser(description='Declaration parsing throughput benchmark')
+  arg_parser.add_argument('--texts', type=int, default=2000)
+  arg_parser.add_argument('--repeat', type=int, default=3)
+  args = arg_parser.parse_args()
+  main(args.texts, args.repeat)
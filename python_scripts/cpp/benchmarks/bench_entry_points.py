@@ -0,0 +1,94 @@
+"""
+Latency of an editor invocation: the module lookup of the vim and msvc entry points followed by the text
+object, with importlib (and reload, the old reloadModules path) per call against the module registry.
+Also the first invocation in a fresh interpreter, with and without the modules warmed beforehand
+
+  python benchmarks/bench_entry_points.py --calls 200 --runs 5
+"""
+import argparse
+import importlib
+import subprocess
+import time
+
+import sys
+import os
+packageDir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(packageDir)
+from stream_parser import *
+import module_registry
+
+sampleText = "\n".join([
+  "int first(int a) {",
+  "  return call(a, {1, 2});",
+  "}",
+  "void second(const std::vector<int>& values, int b) {",
+  "  if (b) { first(values[b]); }",
+  "}",
+])
+
+sampleCursors = [Cursor(1, 10), Cursor(3, 30), Cursor(4, 15)]
+
+childCode = """
+import sys
+import time
+sys.path.insert(0, {directory!r})
+import module_registry
+from stream_parser import Cursor, Buffer
+registry = module_registry.ModuleRegistry()
+if {warm!r}:
+  registry.warmAll()
+start = time.time()
+for module_name in module_registry.textObjectModules:
+  registry.get(module_name).main(Cursor(1, 10), Buffer({text!r}))
+sys.stdout.write(repr(time.time() - start))
+"""
+
+def timeFirstInvocations(warm, runs):
+  times = []
+  for x in xrange(runs):
+    code = childCode.format(directory = packageDir, warm = warm, text = sampleText)
+    times.append(float(subprocess.check_output([sys.executable, "-c", code], cwd = packageDir)))
+  return sorted(times)
+
+def importPerCall(module_name):
+  return importlib.import_module(module_name)
+
+def reloadPerCall(module_name):
+  return reload(importlib.import_module(module_name))
+
+def timeLookup(lookup, module_names, calls):
+  """
+  Mean seconds per invocation of lookup followed by the main of the module found
+  """
+  start = time.time()
+  for x in xrange(calls):
+    module_name = module_names[x % len(module_names)]
+    module = lookup(module_name)
+    module.main(sampleCursors[x % len(sampleCursors)], Buffer(sampleText))
+  return (time.time() - start) / calls
+
+def main(calls, runs):
+  module_names = module_registry.textObjectModules
+  registry = module_registry.ModuleRegistry()
+  checked_registry = module_registry.ModuleRegistry(reload_modules = True)
+  modes = [
+    ("import + reload", reloadPerCall),
+    ("import", importPerCall),
+    ("registry + mtime", checked_registry.get),
+    ("registry", registry.get),
+  ]
+  for name, lookup in modes:
+    elapsed = timeLookup(lookup, module_names, calls)
+    print("{:<18} {:>8.3f}ms per invocation".format(name, elapsed * 1000))
+  print("registry loads: {}".format(registry.loads + checked_registry.loads))
+  for name, warm in [("first, cold", False), ("first, warmed", True)]:
+    times = timeFirstInvocations(warm, runs)
+    print("{:<18} {:>8.3f}ms median for one call of each text object".format(name,
+        times[len(times) // 2] * 1000))
+
+if __name__ == "__main__":
+  arg_parser = argparse.ArgumentParser(description='Entry point module lookup latency benchmark')
+  arg_parser.add_argument('--calls', type=int, default=200)
+  arg_parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters for the first invocation')
+  args = arg_parser.parse_args()
+  main(args.calls, args.runs)
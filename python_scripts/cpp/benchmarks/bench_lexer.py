@@ -0,0 +1,81 @@
+"""
+Forward lexing throughput of the token sources over a generated C++ buffer, in tokens/sec
+
+  python benchmarks/bench_lexer.py --lines 2000
+"""
+import argparse
+import time
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from stream_lexer_cpp import *
+from line_lexer_cpp import LineTokenStream
+
+sampleFunction = """// Adds up the values
+const std::vector<int>& Widget::collect(const Options& options, int* count) const
+{
+  /* walk the
+     children */
+  for (int i = 0; i < count; ++i) {
+    if (children_[i]->enabled()) {
+      log("child \\"%d\\" enabled", i);
+    }
+  }
+  return values_;
+}
+"""
+
+def generateText(lines):
+  function_lines = sampleFunction.count("\n")
+  return sampleFunction * max(1, lines // function_lines)
+
+def streamLexerTokens(text_buffer, allow_space_token):
+  lexer = CppStreamLexer(forward_direction = True, allow_space_token = allow_space_token)
+  cursor = Cursor(0, 0)
+  count = 0
+  while True:
+    tokens, cursor = lexer.lex(cursor, text_buffer)
+    count += len(tokens)
+    if tokens and tokens[-1].tokenType == TokenType.kEnd:
+      return count
+    cursor.moveForward(text_buffer)
+
+def lineLexerTokens(text_buffer, allow_space_token):
+  count = 0
+  for token in LineTokenStream(text_buffer, allow_space_token).forward(Cursor(0, 0)):
+    count += 1
+  return count
+
+backends = [
+  ("CppStreamLexer", streamLexerTokens),
+  ("LineTokenStream", lineLexerTokens),
+]
+
+def timeBackend(func, text_buffer, allow_space_token, repeat):
+  best = None
+  for x in xrange(repeat):
+    start = time.time()
+    count = func(text_buffer, allow_space_token)
+    elapsed = time.time() - start
+    if best is None or elapsed < best:
+      best = elapsed
+  return count, best
+
+def main(lines, repeat, allow_space_token):
+  text = generateText(lines)
+  text_buffer = Buffer(text)
+  print("{} lines, {} chars, allow_space_token={}".format(
+      text_buffer.maxLines(), len(text), allow_space_token))
+  for name, func in backends:
+    count, elapsed = timeBackend(func, text_buffer, allow_space_token, repeat)
+    print("{:<16} {:>8} tokens {:>8.3f}s {:>12.0f} tokens/sec".format(
+        name, count, elapsed, count / elapsed))
+
+if __name__ == "__main__":
+  arg_parser = argparse.ArgumentParser(description='Lexer throughput benchmark')
+  arg_parser.add_argument('--lines', type=int, default=2000)
+  arg_parser.add_argument('--repeat', type=int, default=3)
+  arg_parser.add_argument('--spaces', action='store_true', help='lex with allow_space_token')
+  args = arg_parser.parse_args()
+  main(args.lines, args.repeat, args.spaces)
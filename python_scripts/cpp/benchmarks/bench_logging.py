@@ -0,0 +1,57 @@
+"""
+Per char cost of lexing and parsing a generated C++ buffer with CppStreamLexer, with the hot loop logging
+switched on (filtered out by the disabled loggers) and off
+
+  python benchmarks/bench_logging.py --lines 1000
+"""
+import argparse
+import time
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from stream_lexer_cpp import *
+import text_object_type
+from bench_lexer import generateText
+
+def lexAndParse(text_buffer, trace):
+  kargs = {}
+  if trace is not None:
+    kargs["trace"] = trace
+  lexer = CppStreamLexer(forward_direction = True, **kargs)
+  # Joins every token up to the end of the buffer
+  transitions = {text_object_type.ParserStates.kStart: dict(
+      (x, lambda parser, token: parser.joinToken(token)) for x in TokenType.kAllTokens if x != TokenType.kEnd)}
+  parser = Parser(transitions, text_object_type.ParserStates.kStart, **kargs)
+  return parseText(lexer, parser, text_buffer, Cursor(0, 0))
+
+def timeRun(text_buffer, trace, repeat):
+  best = None
+  for x in xrange(repeat):
+    start = time.time()
+    lexAndParse(text_buffer, trace)
+    elapsed = time.time() - start
+    if best is None or elapsed < best:
+      best = elapsed
+  return best
+
+def main(lines, repeat):
+  text = generateText(lines)
+  text_buffer = Buffer(text)
+  print("{} lines, {} chars, loggers disabled".format(text_buffer.maxLines(), len(text)))
+  try:
+    Parser({}, None, trace = False)
+    modes = [("trace on", True), ("trace off", False)]
+  except TypeError:
+    # Before the switch existed
+    modes = [("always on", None)]
+  for name, trace in modes:
+    elapsed = timeRun(text_buffer, trace, repeat)
+    print("{:<10} {:>8.3f}s {:>8.2f} us/char".format(name, elapsed, elapsed * 1e6 / len(text)))
+
+if __name__ == "__main__":
+  arg_parser = argparse.ArgumentParser(description='Hot loop logging overhead benchmark')
+  arg_parser.add_argument('--lines', type=int, default=1000)
+  arg_parser.add_argument('--repeat', type=int, default=3)
+  args = arg_parser.parse_args()
+  main(args.lines, args.repeat)
@@ -0,0 +1,108 @@
+"""
+Peak memory and latency of the text objects over a large generated file read into a Buffer against an
+MmapBuffer of it, each run in a fresh interpreter
+
+  python benchmarks/bench_mmap_buffer.py --megabytes 20 --map-megabytes 4
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+packageDir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+childCode = """
+import resource
+import sys
+import time
+sys.path.insert(0, {directory!r})
+from stream_parser import Buffer, Cursor
+from mmap_buffer import MmapBuffer
+import text_object_function
+import text_object_comment
+start = time.time()
+if {mode!r} == "mmap":
+  text_buffer = MmapBuffer({path!r}, map_size = {map_size!r})
+else:
+  with open({path!r}, "rb") as f:
+    text_buffer = Buffer(f.read())
+row = {row!r}
+comment = text_object_comment.main(Cursor(row, 2), text_buffer)
+comment_time = time.time() - start
+span = text_object_function.main(Cursor(row + 1, 4), text_buffer)
+total_time = time.time() - start
+# ru_maxrss is in kilobytes on Linux
+sys.stdout.write(repr((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, comment_time, total_time,
+    str(span))))
+"""
+
+baselineCode = """
+import resource
+import sys
+sys.path.insert(0, {directory!r})
+import stream_parser
+import text_object_function
+import text_object_comment
+sys.stdout.write(repr(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+"""
+
+def writeCorpus(path, megabytes):
+  """
+  Functions with a comment above them up to megabytes, returns the row of the comment of the middle one
+  """
+  size = megabytes * 1024 * 1024
+  block = []
+  rows = 0
+  middle_row = None
+  with open(path, "w") as f:
+    index = 0
+    written = 0
+    while written < size:
+      block = [
+        "// compute{} adds the weights".format(index),
+        "int compute{}(const std::vector<int>& values, int count) {{".format(index),
+        "  int total = 0;",
+        "  for (int i = 0; i < count; ++i) {{ total += values[i] * {}; }}".format(index % 13),
+        "  return total;",
+        "}",
+      ]
+      text = "\n".join(block) + "\n"
+      f.write(text)
+      written += len(text)
+      if middle_row is None and written >= size // 2:
+        middle_row = rows
+      rows += len(block)
+      index += 1
+  return middle_row
+
+def runChild(code):
+  return eval(subprocess.check_output([sys.executable, "-c", code], cwd = packageDir))
+
+def main(megabytes, map_megabytes):
+  fd, path = tempfile.mkstemp(suffix = ".cpp")
+  os.close(fd)
+  try:
+    row = writeCorpus(path, megabytes)
+    file_kb = os.path.getsize(path) // 1024
+    baseline_kb = runChild(baselineCode.format(directory = packageDir))
+    print("file {:.1f}MB, mapped {}MB at once, interpreter and modules {:.1f}MB".format(file_kb / 1024.0,
+        map_megabytes, baseline_kb / 1024.0))
+    spans = set()
+    for mode in ["buffer", "mmap"]:
+      rss_kb, comment_time, total_time, span = runChild(childCode.format(directory = packageDir, mode = mode,
+          path = path, row = row, map_size = map_megabytes * 1024 * 1024))
+      spans.add(span)
+      print("{:<7} peak rss {:>8.1f}MB (+{:.1f}MB)  comment {:>7.3f}s  comment + function {:>7.3f}s".format(
+          mode, rss_kb / 1024.0, (rss_kb - baseline_kb) / 1024.0, comment_time, total_time))
+    if len(spans) != 1:
+      print("spans differ: {}".format(sorted(spans)))
+  finally:
+    os.remove(path)
+
+if __name__ == "__main__":
+  arg_parser = argparse.ArgumentParser(description='Large file buffer memory benchmark')
+  arg_parser.add_argument('--megabytes', type=int, default=20)
+  arg_parser.add_argument('--map-megabytes', type=int, default=4, help='Bytes of the file mapped at once')
+  args = arg_parser.parse_args()
+  main(args.megabytes, args.map_megabytes)
@@ -0,0 +1,239 @@
+"""
+Latency of every text object over generated C++ corpora, reported as JSON so runs can be compared
+across commits
+
+  python benchmarks/bench_text_objects.py --lines 1000 100000 --corpus nesting templates > run.json
+  python benchmarks/bench_text_objects.py --lines 1000 100000 --compare run.json --output new.json
+  python benchmarks/bench_text_objects.py --lines 20000 --corpus mixed --modes fresh edited
+
+Each text object runs inner and outer at the same sampled cursor positions in every mode:
+  reused  one buffer for all of the calls, the first call of a run pays for the caches attached to it
+  fresh   a new buffer per call, like the msvc entry point builds on every invocation
+  edited  one buffer with a line of it changed and its changedTick bumped before every call, like a vim
+          buffer between two invocations
+Building the buffer is not timed. chars_per_sec is the buffer size over the mean latency.
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import time
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from stream_parser import *
+import text_object_function
+import text_object_param
+import text_object_type
+import text_object_comment
+
+textObjects = [
+  ("function", text_object_function),
+  ("param", text_object_param),
+  ("type", text_object_type),
+  ("comment", text_object_comment),
+]
+
+def nestingBlock(rng, index):
+  depth = rng.randint(4, 12)
+  lines = ["int nested{}(int a, const std::vector<int>& values) {{".format(index)]
+  for level in xrange(depth):
+    lines.append("  " * (level + 1) + "if (values[{}] > a) {{".format(level))
+  lines.append("  " * (depth + 1) + "call(a, values[{}], {{a, {}}});".format(depth, index))
+  for level in reversed(xrange(depth)):
+    lines.append("  " * (level + 1) + "}")
+  lines.append("  return a;")
+  lines.append("}")
+  return lines
+
+def longFunctionBlock(rng, index):
+  lines = ["void Widget::update{}(const Options& options, int count) {{".format(index)]
+  for x in xrange(rng.randint(100, 300)):
+    lines.append("  total_ += compute(options.weight({}), count * {}, values_[{}]);".format(x, x, x % 7))
+  lines.append("}")
+  return lines
+
+def templateBlock(rng, index):
+  return [
+    "template <typename T, typename U>",
+    "std::map<std::string, std::vector<std::pair<T, U>>> collect{}(".format(index),
+    "    const std::unordered_map<std::string, std::shared_ptr<Node<T, U>>>& nodes,",
+    "    std::function<bool(const std::pair<T, U>&)> filter) {",
+    "  std::map<std::string, std::vector<std::pair<T, U>>> result;",
+    "  for (const auto& node : nodes) {",
+    "    result[node.first].push_back(std::make_pair<T, U>(node.second->key(), node.second->value()));",
+    "  }",
+    "  return result;",
+    "}",
+  ]
+
+def commentBlock(rng, index):
+  lines = ["// Section {} of the generated corpus".format(index)]
+  for x in xrange(rng.randint(3, 20)):
+    lines.append("// Explains {{ the }} ( parameters ) of the next function, line {}".format(x))
+  lines.append("/* A block comment with code like int x() { return 0; }")
+  lines.append("   spanning lines \"with quotes\" */")
+  lines.append("int documented{}(int a) {{ return a; }}".format(index))
+  return lines
+
+def stringBlock(rng, index):
+  words = " ".join("word{}".format(x) for x in xrange(rng.randint(10, 60)))
+  return [
+    "const char* message{}() {{".format(index),
+    "  log(\"{} \\\"quoted\\\" {{ ( [\", {});".format(words, index),
+    "  return \"multi line \\",
+    "string ending here {}\";".format(words),
+    "}",
+  ]
+
+corpusBlocks = {
+  "nesting": [nestingBlock],
+  "long_functions": [longFunctionBlock],
+  "templates": [templateBlock],
+  "comments": [commentBlock],
+  "strings": [stringBlock],
+  "mixed": [nestingBlock, longFunctionBlock, templateBlock, commentBlock, stringBlock],
+}
+
+def generateCorpus(kind, lines, seed = 0):
+  rng = random.Random(seed)
+  blocks = corpusBlocks[kind]
+  result = []
+  index = 0
+  while len(result) < lines:
+    result.extend(blocks[index % len(blocks)](rng, index))
+    index += 1
+  return "\n".join(result[:lines])
+
+def sampleCursors(text_buffer, samples, seed = 0):
+  rng = random.Random(seed)
+  cursors = []
+  while len(cursors) < samples:
+    row = rng.randrange(text_buffer.maxLines())
+    line = text_buffer.getLine(row)
+    if line.strip():
+      cursors.append(Cursor(row, rng.randrange(len(line))))
+  return cursors
+
+def percentile(sorted_values, fraction):
+  index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+  return sorted_values[index]
+
+benchModes = ["reused", "fresh", "edited"]
+
+def editLine(text_buffer, row):
+  """
+  Adds a trailing space to row or takes it back off, so the spans stay the same
+  """
+  line = text_buffer.text[row]
+  text_buffer.text[row] = line[:-1] if line.endswith(" ") else line + " "
+  text_buffer.changedTick += 1
+
+def timeTextObject(module, text, cursors, inner, mode = "reused"):
+  text_buffer = Buffer(text)
+  if mode == "edited":
+    text_buffer.changedTick = 0
+  latencies = []
+  errors = 0
+  for cursor in cursors:
+    if mode == "fresh":
+      text_buffer = Buffer(text)
+    elif mode == "edited":
+      editLine(text_buffer, cursor.row)
+    start = time.time()
+    try:
+      module.main(cursor.clone(), text_buffer, inner = inner)
+    except Exception:
+      errors += 1
+    latencies.append(time.time() - start)
+  first = latencies[0]
+  latencies.sort()
+  mean = sum(latencies) / len(latencies)
+  return {
+    "samples": len(latencies),
+    "errors": errors,
+    "first_ms": first * 1000,
+    "p50_ms": percentile(latencies, 0.5) * 1000,
+    "p99_ms": percentile(latencies, 0.99) * 1000,
+    "max_ms": latencies[-1] * 1000,
+    "chars_per_sec": len(text) / mean if mean > 0 else None,
+  }
+
+def gitCommit():
+  try:
+    return subprocess.check_output(["git", "rev-parse", "HEAD"],
+        cwd = os.path.dirname(os.path.abspath(__file__))).strip()
+  except (OSError, subprocess.CalledProcessError):
+    return None
+
+def main(line_counts, corpora, objects, samples, seed, modes):
+  results = []
+  for kind in corpora:
+    for lines in line_counts:
+      text = generateCorpus(kind, lines, seed)
+      cursors = sampleCursors(Buffer(text), samples, seed)
+      for name, module in textObjects:
+        if name not in objects:
+          continue
+        for mode in modes:
+          for inner in [True, False]:
+            result = timeTextObject(module, text, cursors, inner, mode)
+            result.update({"corpus": kind, "lines": lines, "chars": len(text), "object": name,
+                "inner": inner, "mode": mode})
+            results.append(result)
+            sys.stderr.write("{corpus:<15} {lines:>8} {object:<9} {mode:<7} inner={inner!s:<5} "
+                "p50 {p50_ms:8.2f}ms p99 {p99_ms:8.2f}ms\n".format(**result))
+  return {
+    "commit": gitCommit(),
+    "python": platform.python_version(),
+    "time": time.time(),
+    "seed": seed,
+    "results": results,
+  }
+
+def resultKey(result):
+  # Reports from before the modes only ran reused buffers
+  return (result["corpus"], result["lines"], result["object"], result.get("mode", "reused"),
+      result["inner"])
+
+def compareReports(old_report, new_report):
+  """
+  Writes the p50/p99 change of every result found in both reports
+  """
+  old_results = dict((resultKey(x), x) for x in old_report["results"])
+  sys.stderr.write("compared with {}\n".format(old_report.get("commit")))
+  for result in new_report["results"]:
+    old = old_results.get(resultKey(result))
+    if old is None:
+      continue
+    ratios = []
+    for field in ["p50_ms", "p99_ms"]:
+      ratios.append(result[field] / old[field] if old[field] > 0 else float("inf"))
+    sys.stderr.write("{:<15} {:>8} {:<9} {:<7} inner={!s:<5} p50 x{:.2f} p99 x{:.2f}\n".format(
+        *(list(resultKey(result)) + ratios)))
+
+if __name__ == "__main__":
+  arg_parser = argparse.ArgumentParser(description='Text object latency benchmark over generated corpora')
+  arg_parser.add_argument('--lines', type=int, nargs='+', default=[1000, 10000],
+      help='corpus sizes in lines, up to 1000000')
+  arg_parser.add_argument('--corpus', nargs='+', default=sorted(corpusBlocks.keys()),
+      choices=sorted(corpusBlocks.keys()))
+  arg_parser.add_argument('--objects', nargs='+', default=[x[0] for x in textObjects],
+      choices=[x[0] for x in textObjects])
+  arg_parser.add_argument('--samples', type=int, default=50, help='cursor positions per corpus')
+  arg_parser.add_argument('--seed', type=int, default=0)
+  arg_parser.add_argument('--modes', nargs='+', default=benchModes, choices=benchModes)
+  arg_parser.add_argument('--output', help='write the JSON here instead of stdout')
+  arg_parser.add_argument('--compare', help='JSON of an earlier run to compare against')
+  args = arg_parser.parse_args()
+  report = main(args.lines, args.corpus, args.objects, args.samples, args.seed, args.modes)
+  if args.compare:
+    with open(args.compare) as f:
+      compareReports(json.load(f), report)
+  if args.output:
+    with open(args.output, "w") as f:
+      json.dump(report, f, indent = 2, sort_keys = True)
+  else:
+    print(json.dumps(report, indent = 2, sort_keys = True))
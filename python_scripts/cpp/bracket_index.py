@@ -0,0 +1,374 @@
+from stream_parser import *
+from stream_lexer_cpp import TokenType
+from line_lexer_cpp import LineTokenStream
+from array import array
+import bisect
+
+# Bracket token type => (kind, is opening bracket), the kind being the opening token type
+bracketTokens = {
+  TokenType.kLeftParen: (TokenType.kLeftParen, True),
+  TokenType.kRightParen: (TokenType.kLeftParen, False),
+  TokenType.kLeftBrace: (TokenType.kLeftBrace, True),
+  TokenType.kRightBrace: (TokenType.kLeftBrace, False),
+  TokenType.kLeftBracket: (TokenType.kLeftBracket, True),
+  TokenType.kRightBracket: (TokenType.kLeftBracket, False),
+}
+
+bracketKinds = [TokenType.kLeftParen, TokenType.kLeftBrace, TokenType.kLeftBracket]
+
+class BracketIndex(object):
+  """
+  Every (), {} and [] bracket of a buffer outside of strings and comments with its partner, built in one
+  pass over the lexed lines. Each kind is paired on its own, like the text object parsers count levels.
+
+  Brackets are addressed by offset from the start of the buffer and kept sorted per kind, with the index
+  of the partner and of the innermost opening bracket around the pair, so the enclosing pair of any offset
+  is a bisect away.
+  """
+  def __init__(self, text_buffer, token_stream = None):
+    if token_stream is None:
+      token_stream = LineTokenStream(text_buffer)
+    checkpoints = token_stream.checkpoints
+    self.maxLines = text_buffer.maxLines()
+    # Offset of the head of every row
+    self.lineOffsets = array(kOffsetTypecode)
+    # Bracket indices are bounded by the offsets too
+    self.offsets = dict((x, array(kOffsetTypecode)) for x in bracketKinds)
+    self.partners = dict((x, array(kOffsetTypecode)) for x in bracketKinds)
+    self.parents = dict((x, array(kOffsetTypecode)) for x in bracketKinds)
+    self.isOpen = dict((x, array('b')) for x in bracketKinds)
+
+    stacks = dict((x, []) for x in bracketKinds)
+    offset = 0
+    for row in xrange(self.maxLines):
+      self.lineOffsets.append(offset)
+      columns, _ = token_stream.lineColumns(row)
+      for start, end, token_type in columns:
+        bracket = bracketTokens.get(token_type)
+        if bracket is None:
+          continue
+        kind, is_open = bracket
+        offsets = self.offsets[kind]
+        partners = self.partners[kind]
+        parents = self.parents[kind]
+        stack = stacks[kind]
+        index = len(offsets)
+        offsets.append(offset + start)
+        self.isOpen[kind].append(is_open)
+        if is_open:
+          partners.append(-1)
+          parents.append(stack[-1] if stack else -1)
+          stack.append(index)
+        elif stack:
+          open_index = stack.pop()
+          partners[open_index] = index
+          partners.append(open_index)
+          parents.append(parents[open_index])
+        else:
+          partners.append(-1)
+          parents.append(-1)
+      offset += len(text_buffer.getLine(row)) + 1
+
+    self.bufferVersion = checkpoints.bufferVersion(text_buffer)
+
+  def toOffset(self, cursor):
+    return self.lineOffsets[cursor.row] + cursor.column
+
+  def toCursor(self, offset):
+    row = bisect.bisect_right(self.lineOffsets, offset) - 1
+    return Cursor(row, offset - self.lineOffsets[row])
+
+  def find(self, cursor):
+    """
+    (kind, index) of the bracket at cursor, None if there is none
+    """
+    offset = self.toOffset(cursor)
+    for kind in bracketKinds:
+      offsets = self.offsets[kind]
+      index = bisect.bisect_left(offsets, offset)
+      if index < len(offsets) and offsets[index] == offset:
+        return kind, index
+    return None
+
+  def partner(self, cursor):
+    """
+    Cursor of the bracket matching the one at cursor, None if cursor is not on a matched bracket
+    """
+    bracket = self.find(cursor)
+    if bracket is None:
+      return None
+    kind, index = bracket
+    partner = self.partners[kind][index]
+    if partner == -1:
+      return None
+    return self.toCursor(self.offsets[kind][partner])
+
+  def enclosingIndex(self, kind, offset):
+    """
+    Index of the opening bracket of the innermost matched pair of kind around offset, brackets included
+    """
+    offsets = self.offsets[kind]
+    partners = self.partners[kind]
+    parents = self.parents[kind]
+    index = bisect.bisect_right(offsets, offset) - 1
+    if index < 0:
+      return -1
+    if self.isOpen[kind][index]:
+      # Its partner can't be before offset, the bisect would have found it
+      open_index = index
+    elif offsets[index] == offset and partners[index] != -1:
+      open_index = partners[index]
+    else:
+      open_index = parents[index]
+    # Unmatched opening brackets enclose nothing
+    while open_index != -1 and partners[open_index] == -1:
+      open_index = parents[open_index]
+    return open_index
+
+  def pairSpan(self, kind, open_index):
+    if open_index == -1:
+      return None
+    offsets = self.offsets[kind]
+    close_index = self.partners[kind][open_index]
+    return TextSpan(self.toCursor(offsets[open_index]), self.toCursor(offsets[close_index]))
+
+  def enclosingPair(self, cursor, kind):
+    """
+    TextSpan from the opening to the closing bracket of the innermost pair of kind around cursor, kind
+    being the opening token type. None if there is no such pair
+    """
+    return self.pairSpan(kind, self.enclosingIndex(kind, self.toOffset(cursor)))
+
+  def parentPair(self, pair, kind):
+    """
+    Innermost pair of kind around pair, one of the pairs enclosingPair gives. None if there is none
+    """
+    _, index = self.find(pair.start)
+    partners = self.partners[kind]
+    parents = self.parents[kind]
+    open_index = parents[index]
+    while open_index != -1 and partners[open_index] == -1:
+      open_index = parents[open_index]
+    return self.pairSpan(kind, open_index)
+
+class BracketScanner(object):
+  """
+  Brackets of a buffer paired on demand by scanning the lexed lines out from the ones asked about, so
+  only the rows between a cursor and the pairs around it are lexed, not the whole buffer. Answers
+  partner, enclosingPair and parentPair like BracketIndex, with the same pairing.
+
+  Every pair met while scanning is kept, for the life of the scanner only: its lines are lexed from the
+  line states of its token stream, which belong to one invocation (or one batch). The lines scanned are
+  counted in the metrics of the token stream
+  """
+  def __init__(self, text_buffer, token_stream = None):
+    if token_stream is None:
+      token_stream = LineTokenStream(text_buffer)
+    self.textBuffer = text_buffer
+    self.tokenStream = token_stream
+    # (row, column) of a bracket => (row, column) of its partner, None if it has none
+    self.partners = {}
+
+  def bracketAt(self, row, column):
+    """
+    (kind, is opening bracket) of the bracket at row and column, None if there is none
+    """
+    if self.textBuffer.getLine(row) is None:
+      return None
+    columns, _ = self.tokenStream.lineColumns(row)
+    for start, end, token_type in columns:
+      if start == column:
+        return bracketTokens.get(token_type)
+      elif start > column:
+        break
+    return None
+
+  def bracketsForward(self, row, column, kind):
+    """
+    (row, column, is opening bracket) of the brackets of kind after row and column, in buffer order
+    """
+    token_stream = self.tokenStream
+    metrics = token_stream.metrics
+    current = row
+    while self.textBuffer.getLine(current) is not None:
+      if metrics is not None:
+        metrics.bracketLines += 1
+      columns, _ = token_stream.lineColumns(current)
+      for start, end, token_type in columns:
+        bracket = bracketTokens.get(token_type)
+        if bracket is not None and bracket[0] == kind and (current != row or start > column):
+          yield current, start, bracket[1]
+      current += 1
+
+  def bracketsBackward(self, row, column, kind):
+    """
+    (row, column, is opening bracket) of the brackets of kind before row and column, in reverse order
+    """
+    token_stream = self.tokenStream
+    metrics = token_stream.metrics
+    last_row = row
+    if self.textBuffer.getLine(row) is None and row >= 0:
+      last_row = self.textBuffer.maxLines() - 1
+    for current in xrange(last_row, -1, -1):
+      if metrics is not None:
+        metrics.bracketLines += 1
+      columns, _ = token_stream.lineColumns(current)
+      for start, end, token_type in reversed(columns):
+        bracket = bracketTokens.get(token_type)
+        if bracket is not None and bracket[0] == kind and (current != row or start < column):
+          yield current, start, bracket[1]
+
+  def pairUp(self, open_key, close_key):
+    self.partners[open_key] = close_key
+    self.partners[close_key] = open_key
+
+  def scanForward(self, row, column, kind):
+    """
+    (row, column) of the first closing bracket of kind after row and column that no bracket after
+    row and column opens, None if there is none. The pairs in between are kept
+    """
+    opened = []
+    for current, start, is_open in self.bracketsForward(row, column, kind):
+      if is_open:
+        opened.append((current, start))
+      elif opened:
+        self.pairUp(opened.pop(), (current, start))
+      else:
+        return current, start
+    for key in opened:
+      self.partners[key] = None
+    return None
+
+  def scanBackward(self, row, column, kind):
+    """
+    (row, column) of the last opening bracket of kind before row and column that no bracket before
+    row and column closes, None if there is none. The pairs in between are kept
+    """
+    closed = []
+    for current, start, is_open in self.bracketsBackward(row, column, kind):
+      if not is_open:
+        closed.append((current, start))
+      elif closed:
+        self.pairUp((current, start), closed.pop())
+      else:
+        return current, start
+    for key in closed:
+      self.partners[key] = None
+    return None
+
+  def partnerKey(self, key, kind, is_open):
+    if key in self.partners:
+      return self.partners[key]
+    if is_open:
+      partner = self.scanForward(key[0], key[1], kind)
+    else:
+      partner = self.scanBackward(key[0], key[1], kind)
+    self.partners[key] = partner
+    if partner is not None:
+      self.partners[partner] = key
+    return partner
+
+  def partner(self, cursor):
+    """
+    Cursor of the bracket matching the one at cursor, None if cursor is not on a matched bracket
+    """
+    bracket = self.bracketAt(cursor.row, cursor.column)
+    if bracket is None:
+      return None
+    kind, is_open = bracket
+    partner = self.partnerKey((cursor.row, cursor.column), kind, is_open)
+    if partner is None:
+      return None
+    return Cursor(partner[0], partner[1])
+
+  def pairAround(self, start, end, kind):
+    """
+    Innermost pair of kind with its opening bracket before start and its closing one after end, the
+    brackets of kind between the two being balanced
+    """
+    open_key = self.scanBackward(start.row, start.column, kind)
+    if open_key is None:
+      return None
+    close_key = self.partners.get(open_key)
+    if close_key is None and open_key not in self.partners:
+      close_key = self.scanForward(end.row, end.column, kind)
+      self.partners[open_key] = close_key
+      if close_key is not None:
+        self.partners[close_key] = open_key
+    if close_key is None:
+      # Unmatched, and so is every opening bracket around it
+      return None
+    return TextSpan(Cursor(open_key[0], open_key[1]), Cursor(close_key[0], close_key[1]))
+
+  def enclosingPair(self, cursor, kind):
+    """
+    TextSpan from the opening to the closing bracket of the innermost pair of kind around cursor, kind
+    being the opening token type. None if there is no such pair
+    """
+    bracket = self.bracketAt(cursor.row, cursor.column)
+    if bracket is not None and bracket[0] == kind:
+      key = (cursor.row, cursor.column)
+      partner = self.partnerKey(key, kind, bracket[1])
+      if partner is None:
+        # An unmatched closing bracket has no opening one around it, an unmatched opening one only has
+        # unmatched ones around it
+        return None
+      open_key, close_key = min(key, partner), max(key, partner)
+      return TextSpan(Cursor(open_key[0], open_key[1]), Cursor(close_key[0], close_key[1]))
+    return self.pairAround(cursor, cursor, kind)
+
+  def parentPair(self, pair, kind):
+    """
+    Innermost pair of kind around pair, one of the pairs enclosingPair gives. None if there is none
+    """
+    return self.pairAround(pair.start, pair.end, kind)
+
+def getBracketIndex(text_buffer, token_stream = None):
+  """
+  Bracket index attached to text_buffer through its bracketIndex attribute, rebuilt when a line of the
+  buffer changed. token_stream is the LineTokenStream the caller synced the line states with, a new
+  one is created otherwise. Builds are counted in the metrics of token_stream
+  """
+  if token_stream is None:
+    token_stream = LineTokenStream(text_buffer)
+  checkpoints = token_stream.checkpoints
+  index = getattr(text_buffer, "bracketIndex", None)
+  if index is None or not checkpoints.isCurrent(text_buffer, index.bufferVersion):
+    index = BracketIndex(text_buffer, token_stream)
+    text_buffer.bracketIndex = index
+    if token_stream.metrics is not None:
+      token_stream.metrics.indexBuilds += 1
+  return index
+
+def skipPairTokens(parser, token_stream, cursor, forward, skip_states, bracket_index):
+  """
+  Tokens of token_stream from cursor for parser, jumping from a bracket straight to its partner when
+  the parser is left in one of skip_states[token type of the bracket], the states where the tokens of
+  a balanced pair only move parser.level up and back down
+  """
+  if forward:
+    tokens = token_stream.forward(cursor)
+  else:
+    tokens = token_stream.backward(cursor)
+  while True:
+    for token in tokens:
+      yield token
+      # The parser took token by now
+      states = skip_states.get(token.tokenType)
+      if states and parser.state in states:
+        partner = bracket_index.partner(token.span.start)
+        if partner is not None:
+          if forward:
+            tokens = token_stream.forward(partner)
+          else:
+            tokens = token_stream.backward(partner)
+          break
+    else:
+      return
+
+def parseTokensSkipPairs(parser, token_stream, cursor, forward, skip_states, bracket_index):
+  """
+  parseTokens over skipPairTokens
+  """
+  return parseTokens(parser, skipPairTokens(parser, token_stream, cursor, forward, skip_states,
+      bracket_index))
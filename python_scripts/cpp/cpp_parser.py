@@ -1,4 +1,8 @@
 import ply.lex as lex
+import copy
+import importlib
+import os
+import sys
 
 # List of token names.   This is always required
 tokens = [
@@ -63,8 +67,14 @@ t_ignore_COMMENT = r'//.*'
 # A string containing ignored characters (spaces and tabs)
 t_ignore  = ' \t'
 
+# Illegal chars and syntax errors met by t_error and p_error, so callers can tell a result recovered
+# from them apart
+errorCount = 0
+
 # Error handling rule
 def t_error(t):
+  global errorCount
+  errorCount += 1
   print("Illegal character '%s'" % t.value[0])
   t.lexer.skip(1)
 
@@ -88,6 +98,11 @@ class ProxyLexer(object):
         tok.lexpos = self.lexer.lexpos
         tok.lineno = self.lexer.lineno
     return tok
+  def input(self, data):
+    # An input left off by a syntax error must not keep the next one from getting its EOF
+    self.end = False
+    self.lexer.lineno = 1
+    self.lexer.input(data)
   def __getattr__(self, name):
     return getattr(self.lexer, name)
 
@@ -123,6 +138,12 @@ class CppNamespace(object):
     self.name = other.name
     self.parent = other.parent
 
+  def clone(self):
+    ret = CppNamespace.__new__(CppNamespace)
+    ret.name = self.name
+    ret.parent = self.parent.clone() if self.parent else self.parent
+    return ret
+
   def isDefaultNamespace(self):
     return self.name == ''
 
@@ -198,6 +219,16 @@ class CppType(object):
 
     return "{const}{namespace}{name}{template_params}{pointer}{reference}".format(**values)
 
+  def clone(self):
+    ret = CppType.__new__(CppType)
+    ret.pointer = self.pointer
+    ret.const = self.const
+    ret.reference = self.reference
+    ret.template_params = [x.clone() for x in self.template_params]
+    ret.name = self.name.clone() if type(self.name) is CppType else self.name
+    ret.namespace = self.namespace.clone() if type(self.namespace) is CppNamespace else self.namespace
+    return ret
+
   def __str__(self):
     return "CppType({})".format(self.rawName())
 
@@ -243,6 +274,9 @@ class CppVariable(object):
     self.name = name
     self.defaultValue = defaultValue
 
+  def clone(self):
+    return CppVariable(self.t.clone(), self.name, self.defaultValue)
+
   def __str__(self):
     ret = ["type: " + str(self.t), "name: " + self.name]
     if self.defaultValue is not None:
@@ -377,8 +411,54 @@ def p_eof(p):
 
 # Error rule for syntax errors
 def p_error(p):
+  global errorCount
+  errorCount += 1
   print("Syntax error in input!", p)
 
+# Lexer and LALR tables generated ahead of time by writeTables, next to this module. They are only read
+# at runtime, without them the lexer and parser are built from the rules above and nothing is written
+tableDir = os.path.dirname(os.path.abspath(__file__))
+lexTableModule = "cpp_parser_lextab"
+parseTableModule = "cpp_parser_parsetab"
+
+def loadTables():
+  """
+  (lextab, parsetab) modules of tableDir, None when they were not generated
+  """
+  for name in [lexTableModule, parseTableModule]:
+    if not os.path.exists(os.path.join(tableDir, name + ".py")):
+      return None
+  if __package__:
+    return tuple(importlib.import_module("." + x, __package__) for x in [lexTableModule, parseTableModule])
+  return tuple(importlib.import_module(x) for x in [lexTableModule, parseTableModule])
+
+def writeTables(outputdir = None):
+  """
+  Generates both table modules into outputdir, tableDir by default. Rerun after changing the rules
+  """
+  if outputdir is None:
+    outputdir = tableDir
+  logger = lex.NullLogger()
+  module = sys.modules[__name__]
+  lex.lex(module = module, debuglog = logger, errorlog = logger).writetab(lexTableModule, outputdir)
+  # yacc only generates and writes the parser table when it can't import a current one. A None module
+  # fails the import, so the table shipped in tableDir isn't picked up instead
+  names = [parseTableModule]
+  if __package__:
+    names.append(__package__ + "." + parseTableModule)
+  imported = dict((x, sys.modules.get(x)) for x in names)
+  try:
+    for name in names:
+      sys.modules[name] = None
+    yacc.yacc(module = module, tabmodule = parseTableModule, outputdir = outputdir, debug = False,
+        write_tables = True, debuglog = logger, errorlog = logger)
+  finally:
+    for name, table in imported.items():
+      if table is None:
+        sys.modules.pop(name, None)
+      else:
+        sys.modules[name] = table
+
 lexer = None
 parser = None
 def build(logger = None, debug = False):
@@ -387,14 +467,26 @@ def build(logger = None, debug = False):
   if logger is None:
     logger = lex.NullLogger()
 
+  # The tables skip the grammar checks and the debug output, debugging builds from the rules
+  tables = None
+  if not debug:
+    tables = loadTables()
   if lexer is None:
-    orig_lexer = lex.lex(debug = debug, debuglog = logger, errorlog = logger)
+    if tables is not None:
+      orig_lexer = lex.lex(optimize = 1, lextab = tables[0], debuglog = logger, errorlog = logger)
+    else:
+      orig_lexer = lex.lex(debug = debug, debuglog = logger, errorlog = logger)
     # Build the lexer
     # Remember to use lexer=lexer when calling parse
     lexer = ProxyLexer(orig_lexer, 'EOF')
   if parser is None:
     # Build the parser
-    parser = yacc.yacc(debug = debug, debuglog = logger, errorlog = logger)
+    if tables is not None:
+      parser = yacc.yacc(optimize = 1, tabmodule = tables[1], write_tables = False, debuglog = logger,
+          errorlog = logger)
+    else:
+      parser = yacc.yacc(tabmodule = parseTableModule, write_tables = False, debug = debug,
+          debuglog = logger, errorlog = logger)
 
 def parseVariables(text, debug=False, logger = None):
   if logger is None:
@@ -404,3 +496,49 @@ def parseVariables(text, debug=False, logger = None):
   out = parser.parse(text, lexer = lexer, debug = debug)
   logger.debug("parseVariable result: " + str(out))
   return out
+
+class DeclarationParser(object):
+  """
+  Lexer and parser of declarations owned by the instance, so instances can be created once and used side
+  by side while sharing the tables of build. Syntax errors are kept in errors instead of printed
+  """
+  def __init__(self, debug = False, logger = None):
+    if logger is None:
+      logger = lex.NullLogger()
+    self.debug = debug
+    self.logger = logger
+    self.errors = []
+    build(logger = logger, debug = debug)
+    self.lexer = ProxyLexer(lexer.lexer.clone(), 'EOF')
+    # The parse state is set up by each parse call, the tables are only read
+    self.parser = copy.copy(parser)
+    self.parser.errorfunc = self.onError
+
+  def onError(self, token):
+    self.errors.append(token)
+    self.logger.debug("Syntax error in input: " + str(token))
+
+  def parse(self, text):
+    """
+    Variables declared in text, None when it has a syntax error
+    """
+    self.errors = []
+    self.logger.debug("parse with text: " + text)
+    out = self.parser.parse(text, lexer = self.lexer, debug = self.debug)
+    self.logger.debug("parse result: " + str(out))
+    if self.errors:
+      return None
+    return out
+
+def parseVariablesMany(texts, debug = False, logger = None):
+  """
+  Yields the variables declared in each of texts as they are taken, through one DeclarationParser. A
+  text with a syntax error gives None and parsing goes on with the next one
+  """
+  declaration_parser = DeclarationParser(debug = debug, logger = logger)
+  for text in texts:
+    yield declaration_parser.parse(text)
+
+if __name__ == "__main__":
+  # Regenerates the shipped tables
+  writeTables()
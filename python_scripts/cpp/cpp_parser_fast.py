@@ -0,0 +1,245 @@
+import re
+import cpp_parser
+from lru_cache import LruCache
+from cpp_parser import CppNamespace, CppType, CppVariable
+
+# Token kinds of the scanner, named after the cpp_parser tokens
+kNumber = "NUMBER"
+kId = "ID"
+kConst = "KEY_CONST"
+kLeftAngled = "LANGLED"
+kRightAngled = "RANGLED"
+kScope = "SCOPE"
+kEqual = "EQUAL"
+kEof = "EOF"
+
+kDefaultParseCacheSize = 256
+
+# The alternatives in the order of the cpp_parser master regex, literals last. Spaces, newlines and
+# comments are dropped, anything else is a char cpp_parser reports as illegal
+tokenRegex = re.compile(r"""
+  [ \t]+|\n+|//.*
+  |(?P<NUMBER>\d+)
+  |(?P<ID>[a-zA-Z_][a-zA-Z_0-9]*)
+  |(?P<LANGLED><)
+  |(?P<RANGLED>>)
+  |(?P<SCOPE>::)
+  |(?P<EQUAL>=)
+  |(?P<literal>[*&;,])
+  |(?P<illegal>.)
+""", re.VERBOSE)
+
+class DescentError(Exception):
+  pass
+
+def scanDeclarations(text):
+  """
+  (kinds, values) of the tokens of text as cpp_parser lexes them, ending with EOF. None when text has a
+  char cpp_parser reports as illegal
+  """
+  kinds = []
+  values = []
+  for match in tokenRegex.finditer(text):
+    kind = match.lastgroup
+    if kind is None:
+      continue
+    value = match.group(kind)
+    if kind == "literal":
+      kind = value
+    elif kind == kId:
+      if value in cpp_parser.reserved:
+        kind = cpp_parser.reserved[value]
+    elif kind == kNumber:
+      value = int(value)
+    elif kind == "illegal":
+      return None
+    kinds.append(kind)
+    values.append(value)
+  kinds.append(kEof)
+  values.append(None)
+  return kinds, values
+
+class DescentParser(object):
+  """
+  Recursive descent parser of the cpp_parser grammar over the tokens of scanDeclarations, building the
+  same CppVariable, CppType and CppNamespace values in the same order as the LALR parser reduces them.
+  The choices of the LALR tables are followed where the grammar is ambiguous:
+    namespace type   binds *, <> and :: of the type before the namespace
+    const type *     is a pointer to a const type when followed by *, an id or >, a pointer type
+                     before & < and ::
+    type * const     is the const pointer type
+  Input the grammar doesn't take raises DescentError
+  """
+  def __init__(self, kinds, values):
+    self.kinds = kinds
+    self.values = values
+    self.pos = 0
+
+  def peek(self, offset = 0):
+    index = self.pos + offset
+    if index < len(self.kinds):
+      return self.kinds[index]
+    return None
+
+  def take(self, kind):
+    if self.peek() != kind:
+      raise DescentError("Expected {} at token {}, got {}".format(kind, self.pos, self.peek()))
+    value = self.values[self.pos]
+    self.pos += 1
+    return value
+
+  def parseStatements(self):
+    statements = []
+    while True:
+      statements.append(self.parseDeclaration())
+      if self.peek() not in (";", kEof):
+        raise DescentError("Expected a line end at token {}".format(self.pos))
+      while self.peek() in (";", kEof):
+        self.pos += 1
+      if self.pos == len(self.kinds):
+        return statements
+
+  def parseDeclaration(self):
+    t, qualified = self.parseQualifiedType()
+    variable = CppVariable(t, self.take(kId))
+    while self.peek() == kEqual:
+      self.pos += 1
+      if self.peek() not in (kId, kNumber):
+        raise DescentError("Expected a default value at token {}".format(self.pos))
+      variable.setDefaultValue(self.values[self.pos])
+      self.pos += 1
+    return variable
+
+  def parseQualifiedType(self):
+    """
+    (type, whether it is a qualified_type)
+    """
+    if self.peek() == kConst:
+      self.pos += 1
+      t = self.parseType(const_context = True)
+      kind = self.peek()
+      if kind == "*":
+        self.pos += 1
+        t.setConst()
+        t = CppType(t, pointer = True)
+      elif kind == "&":
+        self.pos += 1
+        t = t.setConst().setReference()
+      else:
+        t = t.setConst()
+    else:
+      t = self.parseType()
+      kind = self.peek()
+      if kind == kConst:
+        self.pos += 1
+        t = t.setConst()
+      elif kind == "&":
+        self.pos += 1
+        t = t.setReference()
+      else:
+        return t, False
+
+    while self.peek() == "*":
+      self.pos += 1
+      if self.peek() == kConst:
+        self.pos += 1
+        t = CppType(t, pointer = True, const = True)
+      else:
+        t = CppType(t, pointer = True)
+    return t, True
+
+  def parseType(self, const_context = False):
+    """
+    A type with its pointers, template arguments and scopes. Right after const, a * followed by *, an id
+    or > is left for the qualified type
+    """
+    if self.peek() == kScope:
+      self.pos += 1
+      namespace = CppNamespace('')
+      return self.parseType().appendFrontNamespace(namespace)
+    t = CppType(self.take(kId))
+    while True:
+      kind = self.peek()
+      if kind == "*":
+        if const_context:
+          next_kind = self.peek(1)
+          if next_kind in ("*", kId, kRightAngled):
+            return t
+          if next_kind not in ("&", kLeftAngled, kScope):
+            raise DescentError("Unexpected {} after const type pointer".format(next_kind))
+        self.pos += 1
+        t = CppType(t, pointer = True)
+      elif kind == kLeftAngled:
+        self.pos += 1
+        params = self.parseTemplateParams()
+        self.take(kRightAngled)
+        t = t.addTemplateParams(params)
+      elif kind == kScope:
+        self.pos += 1
+        namespace = CppNamespace(t)
+        return self.parseType().appendFrontNamespace(namespace)
+      else:
+        return t
+
+  def parseTemplateParams(self):
+    t, qualified = self.parseQualifiedType()
+    if qualified or self.peek() != ",":
+      return t
+    params = [t]
+    while self.peek() == ",":
+      self.pos += 1
+      params.append(self.parseType())
+    return params
+
+def normalizeDeclarations(text):
+  """
+  text with the spaces of every line collapsed and blank lines left out, the same declarations lexed the
+  same way. Newlines are kept for the comments ending at them
+  """
+  lines = (" ".join(line.split()) for line in text.splitlines())
+  return "\n".join(line for line in lines if line)
+
+# parseVariables results by normalized text, kept apart from the values handed out: a copy goes in and
+# every hit gives a new copy, so changing a result never changes the next one
+parseCache = LruCache(kDefaultParseCacheSize)
+
+def parseVariables(text, debug = False, logger = None):
+  """
+  cpp_parser.parseVariables through the descent parser, text it doesn't take (syntax errors, illegal
+  chars) and debugging go to cpp_parser for its error handling. Results are kept in parseCache, text
+  cpp_parser met an error in, even one it recovered from, and debugging skip it
+  """
+  if debug:
+    return cpp_parser.parseVariables(text, debug = debug, logger = logger)
+  key = normalizeDeclarations(text)
+  cached = parseCache.get(key)
+  if cached is not None:
+    out = [x.clone() for x in cached]
+    if logger is not None:
+      logger.debug("parseVariable cached result: " + str(out))
+    return out
+  out = None
+  tokens = scanDeclarations(text)
+  if tokens is not None:
+    try:
+      out = DescentParser(*tokens).parseStatements()
+    except Exception:
+      # Also the exceptions of the values, cpp_parser raises them the same way
+      pass
+    else:
+      if logger is not None:
+        logger.debug("parseVariable result: " + str(out))
+  if out is None:
+    error_count = cpp_parser.errorCount
+    out = cpp_parser.parseVariables(text, logger = logger)
+    if cpp_parser.errorCount != error_count:
+      return out
+  if out is not None and parseCache.maxSize > 0:
+    parseCache.put(key, [x.clone() for x in out])
+  return out
+
+def warm():
+  """
+  Loads the cpp_parser tables the text the descent parser doesn't take goes to
+  """
+  cpp_parser.build()
@@ -0,0 +1,10 @@
+# cpp_parser_lextab.py. This file automatically created by PLY (version 3.11). Don't edit!
+_tabversion   = '3.10'
+_lextokens    = set(('COMMENT', 'EOF', 'EQUAL', 'ID', 'KEY_CONST', 'LANGLED', 'NUMBER', 'RANGLED', 'SCOPE'))
+_lexreflags   = 64
+_lexliterals  = '*&;,'
+_lexstateinfo = {'INITIAL': 'inclusive'}
+_lexstatere   = {'INITIAL': [('(?P<t_NUMBER>\\d+)|(?P<t_newline>\\n+)|(?P<t_ID>[a-zA-Z_][a-zA-Z_0-9]*)|(?P<t_ignore_COMMENT>//.*)|(?P<t_LANGLED>\\<)|(?P<t_RANGLED>\\>)|(?P<t_SCOPE>::)|(?P<t_EQUAL>=)', [None, ('t_NUMBER', 'NUMBER'), ('t_newline', 'newline'), ('t_ID', 'ID'), (None, None), (None, 'LANGLED'), (None, 'RANGLED'), (None, 'SCOPE'), (None, 'EQUAL')])]}
+_lexstateignore = {'INITIAL': ' \t'}
+_lexstateerrorf = {'INITIAL': 't_error'}
+_lexstateeoff = {}
@@ -0,0 +1,59 @@
+
+# cpp_parser_parsetab.py
+# This file is automatically generated. Do not edit.
+# pylint: disable=W,C,R
+_tabversion = '3.10'
+
+_lr_method = 'LALR'
+
+_lr_signature = 'leftIDleftKEY_CONSTleft*leftSCOPECOMMENT EOF EQUAL ID KEY_CONST LANGLED NUMBER RANGLED SCOPEstatement_list : statement_list statementstatement_list : statementstatement : var_declare line_terminatevar_declare : var_declare EQUAL default_valuedefault_value : ID\n                   | NUMBERvar_declare : type ID\n                 | qualified_type IDqualified_type : KEY_CONST typequalified_type : type KEY_CONSTqualified_type : KEY_CONST type "*"qualified_type : qualified_type "*"qualified_type : type "*" KEY_CONST\n                    | qualified_type "*" KEY_CONSTqualified_type : KEY_CONST type "&"qualified_type : type "&"type : type "*"type : namespace typenamespace : SCOPEnamespace : type SCOPEtype : type LANGLED type RANGLED\n          | type LANGLED qualified_type RANGLEDtype : type LANGLED type_list RANGLEDtype_list : type "," typetype_list : type_list "," typetype : IDline_terminate : line_terminate line_terminateline_terminate : ";"\n                    | EOF'
+    
+_lr_action_items = {'EOF':([3,12,13,15,17,24,28,29,30,31,],[13,13,-29,-28,-8,-7,13,-4,-5,-6,]),'&':([8,9,10,11,21,26,27,36,38,39,41,],[19,-26,25,-18,-17,-17,-17,19,-23,-22,-21,]),'KEY_CONST':([0,4,6,8,9,11,12,13,15,16,18,21,22,27,28,36,38,39,41,],[1,-2,1,20,-26,-18,-3,-29,-28,32,-1,-17,1,-17,-27,20,-23,-22,-21,]),'*':([5,8,9,10,11,16,19,20,21,25,26,27,32,33,35,36,38,39,41,42,43,],[16,21,-26,26,27,-12,-16,-10,-17,-15,-11,-17,-14,-13,16,21,-23,-22,-21,27,27,]),'LANGLED':([8,9,10,11,21,26,27,36,38,39,41,42,43,],[22,-26,22,22,-17,-17,-17,22,-23,-22,-21,22,22,]),'EQUAL':([3,17,24,29,30,31,],[14,-8,-7,-4,-5,-6,]),',':([9,11,21,27,34,36,38,39,41,42,43,],[-26,-18,-17,-17,37,40,-23,-22,-21,-25,-24,]),'NUMBER':([14,],[31,]),'SCOPE':([0,1,2,4,6,7,8,9,10,11,12,13,15,18,21,22,23,26,27,28,36,37,38,39,40,41,42,43,],[7,7,7,-2,7,-19,23,-26,23,23,-3,-29,-28,-1,-17,7,-20,-17,-17,-27,23,7,-23,-22,7,-21,23,23,]),';':([3,12,13,15,17,24,28,29,30,31,],[15,15,-29,-28,-8,-7,15,-4,-5,-6,]),'ID':([0,1,2,4,5,6,7,8,9,10,11,12,13,14,15,16,18,19,20,21,22,23,25,26,27,28,32,33,37,38,39,40,41,],[9,9,9,-2,17,9,-19,24,-26,-9,-18,-3,-29,30,-28,-12,-1,-16,-10,-17,9,-20,-15,-11,-17,-27,-14,-13,9,-23,-22,9,-21,]),'RANGLED':([9,10,11,16,19,20,21,25,26,27,32,33,34,35,36,38,39,41,42,43,],[-26,-9,-18,-12,-16,-10,-17,-15,-11,-17,-14,-13,38,39,41,-23,-22,-21,-25,-24,]),'$end':([4,6,12,13,15,18,28,],[-2,0,-3,-29,-28,-1,-27,]),}
+
+_lr_action = {}
+for _k, _v in _lr_action_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+      if not _x in _lr_action:  _lr_action[_x] = {}
+      _lr_action[_x][_k] = _y
+del _lr_action_items
+
+_lr_goto_items = {'line_terminate':([3,12,28,],[12,28,28,]),'default_value':([14,],[29,]),'namespace':([0,1,2,6,22,37,40,],[2,2,2,2,2,2,2,]),'var_declare':([0,6,],[3,3,]),'type_list':([22,],[34,]),'statement':([0,6,],[4,18,]),'qualified_type':([0,6,22,],[5,5,35,]),'statement_list':([0,],[6,]),'type':([0,1,2,6,22,37,40,],[8,10,11,8,36,42,43,]),}
+
+_lr_goto = {}
+for _k, _v in _lr_goto_items.items():
+   for _x, _y in zip(_v[0], _v[1]):
+       if not _x in _lr_goto: _lr_goto[_x] = {}
+       _lr_goto[_x][_k] = _y
+del _lr_goto_items
+_lr_productions = [
+  ("S' -> statement_list","S'",1,None,None,None),
+  ('statement_list -> statement_list statement','statement_list',2,'p_statement_list','cpp_parser.py',303),
+  ('statement_list -> statement','statement_list',1,'p_statements_single','cpp_parser.py',308),
+  ('statement -> var_declare line_terminate','statement',2,'p_statement','cpp_parser.py',312),
+  ('var_declare -> var_declare EQUAL default_value','var_declare',3,'p_var_declare_default_value','cpp_parser.py',316),
+  ('default_value -> ID','default_value',1,'p_default_value','cpp_parser.py',320),
+  ('default_value -> NUMBER','default_value',1,'p_default_value','cpp_parser.py',321),
+  ('var_declare -> type ID','var_declare',2,'p_var_declare','cpp_parser.py',325),
+  ('var_declare -> qualified_type ID','var_declare',2,'p_var_declare','cpp_parser.py',326),
+  ('qualified_type -> KEY_CONST type','qualified_type',2,'p_qualified_type_const','cpp_parser.py',330),
+  ('qualified_type -> type KEY_CONST','qualified_type',2,'p_qualified_type_type_const_ptr','cpp_parser.py',334),
+  ('qualified_type -> KEY_CONST type *','qualified_type',3,'p_qualified_const_type_ptr','cpp_parser.py',338),
+  ('qualified_type -> qualified_type *','qualified_type',2,'p_qualified_type_const_type_ptr','cpp_parser.py',344),
+  ('qualified_type -> type * KEY_CONST','qualified_type',3,'p_qualified_type_type_ptr_const','cpp_parser.py',348),
+  ('qualified_type -> qualified_type * KEY_CONST','qualified_type',3,'p_qualified_type_type_ptr_const','cpp_parser.py',349),
+  ('qualified_type -> KEY_CONST type &','qualified_type',3,'p_qualified_type_const_ref','cpp_parser.py',353),
+  ('qualified_type -> type &','qualified_type',2,'p_qualified_type_ref','cpp_parser.py',357),
+  ('type -> type *','type',2,'p_type_pointer','cpp_parser.py',361),
+  ('type -> namespace type','type',2,'p_scoped_type','cpp_parser.py',365),
+  ('namespace -> SCOPE','namespace',1,'p_default_scope','cpp_parser.py',369),
+  ('namespace -> type SCOPE','namespace',2,'p_namespace','cpp_parser.py',373),
+  ('type -> type LANGLED type RANGLED','type',4,'p_template_params','cpp_parser.py',377),
+  ('type -> type LANGLED qualified_type RANGLED','type',4,'p_template_params','cpp_parser.py',378),
+  ('type -> type LANGLED type_list RANGLED','type',4,'p_template_params_multi','cpp_parser.py',381),
+  ('type_list -> type , type','type_list',3,'p_type_list_start','cpp_parser.py',385),
+  ('type_list -> type_list , type','type_list',3,'p_type_list_append','cpp_parser.py',389),
+  ('type -> ID','type',1,'p_type','cpp_parser.py',394),
+  ('line_terminate -> line_terminate line_terminate','line_terminate',2,'p_line_terminate_collapse','cpp_parser.py',398),
+  ('line_terminate -> ;','line_terminate',1,'p_eof','cpp_parser.py',402),
+  ('line_terminate -> EOF','line_terminate',1,'p_eof','cpp_parser.py',403),
+]
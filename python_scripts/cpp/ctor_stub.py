@@ -1,5 +1,6 @@
 import argparse
-import cpp_parser
+import cpp_parser_fast
+from lru_cache import LruCache
 import re
 import sys
 
@@ -46,18 +47,35 @@ def varToCtor(cppVar, paramNameFunc):
   keys  = { 'name' : name, 'param_name' : param_name }
   return "{name}({param_name})".format(**keys)
 
+def ctorStub(var_list):
+  params = ", ".join(map(lambda x: varToParam(x, paramName), var_list))
+  ctor_init = ",\n".join(map(lambda x: "  " + varToCtor(x, paramName), var_list))
+  keys = {"params" : params, "ctor" : ctor_init}
+  return "({params}) :\n{ctor}".format(**keys)
+
+kDefaultStubCacheSize = 128
+
+# Stubs by normalized member text
+stubCache = LruCache(kDefaultStubCacheSize)
+
 def main(text, debug = False, logger = None):
   # sys.stdout.writelines("text " + args.text)
-  var_list = cpp_parser.parseVariables(text, debug = debug, logger = logger)
+  key = cpp_parser_fast.normalizeDeclarations(text)
+  if not debug:
+    ret = stubCache.get(key)
+    if ret is not None:
+      return ret
+  var_list = cpp_parser_fast.parseVariables(text, debug = debug, logger = logger)
   if var_list is None:
     logger.error("Error parsing text")
     return
-  params = ", ".join(map(lambda x: varToParam(x, paramName), var_list))
-  ctor_init = ",\n".join(map(lambda x: "  " + varToCtor(x, paramName), var_list))
-  keys = {"params" : params, "ctor" : ctor_init}
-  ret = "({params}) :\n{ctor}".format(**keys)
+  ret = ctorStub(var_list)
+  stubCache.put(key, ret)
   return ret
 
+def warm():
+  cpp_parser_fast.warm()
+
 if __name__ == "__main__":
   arg_parser = argparse.ArgumentParser(description='', add_help=False)
   arg_parser.add_argument('--help', action='help',
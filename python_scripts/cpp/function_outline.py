@@ -0,0 +1,123 @@
+from stream_parser import *
+from stream_lexer_cpp import TokenType
+from line_lexer_cpp import LineTokenStream, getLineStateCheckpoints
+from bracket_index import BracketIndex, getBracketIndex
+import text_object_function
+from array import array
+import bisect
+
+class FunctionOutline(object):
+  """
+  Every function of a buffer found in one pass: each { outside of a function body is classified by a
+  backward parse of its head with text_object_function.parserTransitionBackward (name, params, optional
+  const, brace), the bodies are jumped over with the bracket index.
+
+  Functions are kept in buffer order as parallel offset columns: header start, body start ({), body end
+  (past }), name start and name end (empty at the header start when unknown), so the function at or
+  around a cursor is a bisect away.
+  """
+  def __init__(self, text_buffer, token_stream = None, bracket_index = None):
+    if token_stream is None:
+      token_stream = LineTokenStream(text_buffer)
+    if bracket_index is None:
+      bracket_index = BracketIndex(text_buffer, token_stream)
+    self.lineOffsets = bracket_index.lineOffsets
+    self.headerStarts = array(kOffsetTypecode)
+    self.bodyStarts = array(kOffsetTypecode)
+    self.bodyEnds = array(kOffsetTypecode)
+    self.nameStarts = array(kOffsetTypecode)
+    self.nameEnds = array(kOffsetTypecode)
+
+    offsets = bracket_index.offsets[TokenType.kLeftBrace]
+    partners = bracket_index.partners[TokenType.kLeftBrace]
+    is_open = bracket_index.isOpen[TokenType.kLeftBrace]
+    body_end = -1
+    for index in xrange(len(offsets)):
+      close_index = partners[index]
+      if not is_open[index] or close_index == -1 or offsets[index] < body_end:
+        continue
+      head_span, _, parser = text_object_function.parse(text_buffer, self.toCursor(offsets[index]), False,
+          token_stream, bracket_index)
+      if not parser.data.get('result', False):
+        continue
+      name_token = parser.data.get("nameToken")
+      if name_token is not None:
+        name_span = name_token.span
+      else:
+        # The name can't be told from template arguments, like operator>
+        name_span = TextSpan(head_span.start, head_span.start)
+      body_end = offsets[close_index] + 1
+      self.headerStarts.append(self.toOffset(head_span.start))
+      self.bodyStarts.append(offsets[index])
+      self.bodyEnds.append(body_end)
+      self.nameStarts.append(self.toOffset(name_span.start))
+      self.nameEnds.append(self.toOffset(name_span.end))
+
+    self.bufferVersion = bracket_index.bufferVersion
+
+  def __len__(self):
+    return len(self.headerStarts)
+
+  def toOffset(self, cursor):
+    return self.lineOffsets[cursor.row] + cursor.column
+
+  def toCursor(self, offset):
+    row = bisect.bisect_right(self.lineOffsets, offset) - 1
+    return Cursor(row, offset - self.lineOffsets[row])
+
+  def span(self, index):
+    """
+    TextSpan of function index from the head of its return type to past its closing brace, the span
+    text_object_function.main gives inside of it
+    """
+    return TextSpan(self.toCursor(self.headerStarts[index]), self.toCursor(self.bodyEnds[index]))
+
+  def bodySpan(self, index):
+    return TextSpan(self.toCursor(self.bodyStarts[index]), self.toCursor(self.bodyEnds[index]))
+
+  def nameSpan(self, index):
+    return TextSpan(self.toCursor(self.nameStarts[index]), self.toCursor(self.nameEnds[index]))
+
+  def spans(self):
+    return [self.span(x) for x in xrange(len(self))]
+
+  def indexAt(self, cursor):
+    """
+    Index of the function cursor is in, -1 if it is in none
+    """
+    offset = self.toOffset(cursor)
+    index = bisect.bisect_right(self.headerStarts, offset) - 1
+    if index >= 0 and offset < self.bodyEnds[index]:
+      return index
+    return -1
+
+  def nextIndex(self, cursor):
+    """
+    Index of the first function starting after cursor, -1 if there is none
+    """
+    index = bisect.bisect_right(self.headerStarts, self.toOffset(cursor))
+    if index < len(self):
+      return index
+    return -1
+
+  def previousIndex(self, cursor):
+    """
+    Index of the last function starting before cursor, the one cursor is in unless it is on its head.
+    -1 if there is none
+    """
+    return bisect.bisect_left(self.headerStarts, self.toOffset(cursor)) - 1
+
+def getFunctionOutline(text_buffer, token_stream = None):
+  """
+  Function outline attached to text_buffer through its functionOutline attribute, rebuilt when a line of
+  the buffer changed
+  """
+  if token_stream is None:
+    token_stream = LineTokenStream(text_buffer)
+  bracket_index = getBracketIndex(text_buffer, token_stream)
+  checkpoints = getLineStateCheckpoints(text_buffer)
+  outline = getattr(text_buffer, "functionOutline", None)
+  if outline is None or not checkpoints.isCurrent(text_buffer, outline.bufferVersion):
+    outline = FunctionOutline(text_buffer, token_stream, bracket_index)
+    text_buffer.functionOutline = outline
+  return outline
@@ -0,0 +1,596 @@
+from stream_parser import *
+from stream_lexer_cpp import LexerState, TokenType, keyWords
+from lru_cache import LruCache
+from array import array
+import re
+
+symbolTokens = {
+  ",": TokenType.kComma,
+  "<": TokenType.kLeftAngled,
+  ">": TokenType.kRightAngled,
+  "{": TokenType.kLeftBrace,
+  "}": TokenType.kRightBrace,
+  "[": TokenType.kLeftBracket,
+  "]": TokenType.kRightBracket,
+  "(": TokenType.kLeftParen,
+  ")": TokenType.kRightParen,
+  ";": TokenType.kSemiColon,
+  ":": TokenType.kColon,
+  "*": TokenType.kStar,
+  "-": TokenType.kSubtract,
+  "/": TokenType.kForwardSlash,
+}
+
+# One alternative per token class, tried at the current position of the line
+tokenPattern = re.compile(r"""
+    (?P<id>\w+)
+  | (?P<space>\s+)
+  | (?P<arrow>->)
+  | (?P<commentLine>//)
+  | (?P<commentMultiline>/\*)
+  | (?P<string>")
+  | (?P<symbol>.)
+""", re.VERBOSE | re.DOTALL)
+
+# Rest of a string after the opening quote (or from the start of a line continuing one),
+# group 1 is set when the closing quote was found
+stringBodyPattern = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*(?:(")|\\?)', re.DOTALL)
+
+def makeToken(row, start_column, end_column, token_type):
+  return Token(makeSpan(Cursor(row, start_column), Cursor(row, end_column)), token_type)
+
+def lexLineColumns(line, state = LexerState.kDefault, allow_space_token = False, has_newline = True,
+    start_column = 0):
+  """
+  Lexes one buffer line starting in state, which is one of the states a line can begin in
+  (kDefault, kString or kCommentMultiline). The '\\n' ending the line is lexed as well unless
+  has_newline is False (last line of the buffer).
+
+  Returns the (start column, end column, token type) of each token of the line and the state the
+  next line begins in. A string left open at the end of the line ends after the '\\n', the next line
+  then starts in kString with a token continuing it from column 0. With allow_space_token,
+  whitespace is handled the same way: a space token running into the '\\n' is continued by a space
+  token at column 0 of the next line. LineTokenStream joins these back into the multiline tokens
+  CppStreamLexer produces.
+  """
+  text = line + "\n" if has_newline else line
+  length = len(text)
+  columns = []
+  pos = start_column
+
+  if state == LexerState.kString:
+    match = stringBodyPattern.match(text, pos)
+    if match.end() > pos:
+      columns.append((pos, match.end(), TokenType.kString))
+    if match.group(1) is None:
+      return columns, LexerState.kString
+    pos = match.end()
+  elif state == LexerState.kCommentMultiline:
+    comment_end = text.find("*/", pos)
+    if comment_end == -1:
+      return columns, LexerState.kCommentMultiline
+    pos = comment_end + 2
+
+  while pos < length:
+    match = tokenPattern.match(text, pos)
+    kind = match.lastgroup
+    start = pos
+    pos = match.end()
+    if kind == "id":
+      columns.append((start, pos, keyWords.get(match.group(), TokenType.kId)))
+    elif kind == "space":
+      if allow_space_token:
+        columns.append((start, pos, TokenType.kSpace))
+    elif kind == "symbol":
+      columns.append((start, pos, symbolTokens.get(text[start], TokenType.kOther)))
+    elif kind == "arrow":
+      columns.append((start, pos, TokenType.kArrow))
+    elif kind == "string":
+      match = stringBodyPattern.match(text, pos)
+      pos = match.end()
+      columns.append((start, pos, TokenType.kString))
+      if match.group(1) is None:
+        return columns, LexerState.kString
+    elif kind == "commentMultiline":
+      comment_end = text.find("*/", pos)
+      if comment_end == -1:
+        return columns, LexerState.kCommentMultiline
+      pos = comment_end + 2
+    elif kind == "commentLine":
+      # Runs up to and including the '\n'
+      pos = length
+  return columns, LexerState.kDefault
+
+def columnsToTokens(columns, row):
+  return [makeToken(row, start, end, token_type) for start, end, token_type in columns]
+
+def lexLine(line, row, state = LexerState.kDefault, allow_space_token = False, has_newline = True,
+    start_column = 0):
+  """
+  lexLineColumns returning Token objects on row
+  """
+  columns, next_state = lexLineColumns(line, state, allow_space_token, has_newline, start_column)
+  return columnsToTokens(columns, row), next_state
+
+# Anything that may move a line into another state
+stateChangePattern = re.compile(r'"|/\*|//')
+
+def lineEndState(line, state = LexerState.kDefault):
+  """
+  State the line after line begins in when line begins in state.
+  Same as the state returned by lexLine without creating any tokens
+  """
+  pos = 0
+  if state == LexerState.kString:
+    match = stringBodyPattern.match(line)
+    if match.group(1) is None:
+      return LexerState.kString
+    pos = match.end()
+  elif state == LexerState.kCommentMultiline:
+    comment_end = line.find("*/")
+    if comment_end == -1:
+      return LexerState.kCommentMultiline
+    pos = comment_end + 2
+
+  while True:
+    match = stateChangePattern.search(line, pos)
+    if match is None:
+      return LexerState.kDefault
+    found = match.group()
+    if found == "//":
+      return LexerState.kDefault
+    elif found == "/*":
+      comment_end = line.find("*/", match.end())
+      if comment_end == -1:
+        return LexerState.kCommentMultiline
+      pos = comment_end + 2
+    else:
+      match = stringBodyPattern.match(line, match.end())
+      if match.group(1) is None:
+        return LexerState.kString
+      pos = match.end()
+
+def continuesToken(token, next_token):
+  """
+  Whether next_token, the first token of a line, is the rest of token, the last token of the
+  previous line
+  """
+  return next_token.tokenType == token.tokenType and \
+      next_token.span.start.column == 0 and \
+      next_token.span.start.row == token.span.end.row + 1
+
+def continuesLine(token, next_state, line):
+  """
+  Whether token, the last token lexed from line, may continue on the next line
+  """
+  if next_state == LexerState.kString:
+    return True
+  return token.tokenType == TokenType.kSpace and token.span.end.column == len(line) + 1
+
+def joinTokens(token, next_token):
+  return Token(makeSpan(token.span.start.clone(), next_token.span.end.clone()), token.tokenType)
+
+kDefaultLineCacheSize = 20000
+
+class LineTokenCache(object):
+  """
+  Lexed lines of a buffer kept between text object invocations.
+  Entries are keyed by the line content and the state the line begins in and hold the token columns
+  without a row, so a line that did not change is never lexed again, even after moving to another row.
+  An entry is evicted once no row holds its line anymore (checked when the next stream starts, so lines
+  moving within an invocation are kept) or when the cache grows past max_size.
+  Buffers that never change create their cache with track_rows off, no row is tracked and entries only
+  leave through the size bound
+  """
+  def __init__(self, max_size = kDefaultLineCacheSize, track_rows = True):
+    self.entries = LruCache(max_size)
+    self.trackRows = track_rows
+    # row => key of the line last looked up for it
+    self.rowKeys = {}
+    # key => number of rows holding it
+    self.keyRows = {}
+    # keys no row holds anymore
+    self.orphans = set()
+
+  def __len__(self):
+    return len(self.entries)
+
+  def resize(self, max_size):
+    self.entries.resize(max_size)
+
+  def setRowKey(self, row, key):
+    old_key = self.rowKeys.get(row)
+    if old_key == key:
+      return
+    if old_key is not None:
+      count = self.keyRows[old_key] - 1
+      self.keyRows[old_key] = count
+      if count == 0:
+        self.orphans.add(old_key)
+    self.rowKeys[row] = key
+    count = self.keyRows.get(key, 0)
+    if count == 0:
+      self.orphans.discard(key)
+    self.keyRows[key] = count + 1
+
+  def evictChangedLines(self):
+    for key in self.orphans:
+      del self.keyRows[key]
+      self.entries.discard(key)
+    self.orphans.clear()
+
+  def lexLine(self, row, line, state, allow_space_token, has_newline, metrics = None):
+    """
+    Cached lexLineColumns of line at row, counted in metrics as a hit or as a miss and its chars
+    """
+    key = (line, state, allow_space_token, has_newline)
+    if self.trackRows:
+      self.setRowKey(row, key)
+    result = self.entries.get(key)
+    if result is None:
+      result = lexLineColumns(line, state, allow_space_token, has_newline)
+      self.entries.put(key, result)
+      if metrics is not None:
+        metrics.lineCacheMisses += 1
+        metrics.charsLexed += len(line)
+    elif metrics is not None:
+      metrics.lineCacheHits += 1
+    return result
+
+def getLineTokenCache(text_buffer, max_size = None):
+  """
+  Line token cache attached to text_buffer, created on first use.
+  Front ends creating a new buffer object per invocation reattach their cache through the
+  lineTokenCache attribute
+  """
+  cache = getattr(text_buffer, "lineTokenCache", None)
+  if cache is None:
+    cache = LineTokenCache(kDefaultLineCacheSize if max_size is None else max_size)
+    text_buffer.lineTokenCache = cache
+  elif max_size is not None:
+    cache.resize(max_size)
+  return cache
+
+# States a line can begin in, stored by index in LineStateCheckpoints
+lineStartStates = [
+  LexerState.kDefault,
+  LexerState.kString,
+  LexerState.kCommentMultiline,
+]
+lineStartStateIds = dict((state, index) for index, state in enumerate(lineStartStates))
+
+def lineHash(line):
+  # Masked to fit an array('L') item on every platform
+  return hash(line) & 0xffffffff
+
+class LineStateCheckpoints(object):
+  """
+  Lexer state at the start of each line of a buffer, so lexing can resume at any line with the exact
+  context of strings and comments around it.
+
+  States are computed lazily up to the furthest row asked for and kept between invocations in a byte
+  per line. The hash of every line scanned is kept as well, when a line changes only the states after
+  it are dropped and recomputed. After a sync the lines are checked against their hashes lazily too,
+  only the lines above the rows asked for are read.
+  """
+  def __init__(self):
+    # states[row] is the state row begins in, valid for every row below len(states)
+    self.states = array('B', [lineStartStateIds[LexerState.kDefault]])
+    # hashes[row] is the hash of the line states[row + 1] was computed from
+    self.hashes = array('L')
+    # Lines checked against their hashes since the last sync
+    self.checkedRows = 0
+    self.changedTick = None
+    # Incremented whenever states are dropped
+    self.version = 0
+
+  def __len__(self):
+    return len(self.states)
+
+  def invalidate(self, row):
+    """
+    Line row changed, the states of the lines after it are recomputed when next asked for
+    """
+    row = max(row, 0)
+    if row < len(self.hashes):
+      del self.states[row + 1:]
+      del self.hashes[row:]
+      self.checkedRows = min(self.checkedRows, row)
+      self.version += 1
+
+  def sync(self, text_buffer):
+    """
+    Has the lines of text_buffer checked against the ones the states were computed from again, a line
+    at a time as rows below it are asked for, see check. Nothing is checked when text_buffer has a
+    changedTick attribute equal to the one of the last sync
+    """
+    changed_tick = getattr(text_buffer, "changedTick", None)
+    if changed_tick is not None and changed_tick == self.changedTick:
+      self.checkedRows = len(self.hashes)
+      return
+    self.checkedRows = 0
+    self.changedTick = changed_tick
+
+  def check(self, text_buffer, row):
+    """
+    Checks the lines above row not checked since the last sync, dropping the states computed from the
+    first one that changed
+    """
+    hashes = self.hashes
+    end = min(row, len(hashes))
+    for checked in xrange(self.checkedRows, end):
+      line = text_buffer.getLine(checked)
+      if line is None or lineHash(line) != hashes[checked]:
+        self.invalidate(checked)
+        return
+    self.checkedRows = max(self.checkedRows, end)
+
+  def bufferVersion(self, text_buffer):
+    """
+    Scans every line of text_buffer and returns a value identifying its content until a line changes,
+    for data built from the whole buffer. See isCurrent
+    """
+    max_lines = text_buffer.maxLines()
+    self.stateAt(text_buffer, max_lines)
+    return (self.version, max_lines)
+
+  def isCurrent(self, text_buffer, buffer_version):
+    """
+    Whether no line of text_buffer changed since bufferVersion returned buffer_version.
+    The checkpoints must be synced with text_buffer first
+    """
+    version, max_lines = buffer_version
+    self.check(text_buffer, max_lines)
+    return version == self.version and max_lines == text_buffer.maxLines() and \
+        len(self.hashes) >= max_lines
+
+  def stateAt(self, text_buffer, row, metrics = None):
+    """
+    State row of text_buffer begins in. The lines scanned to get there are counted in metrics
+    """
+    self.check(text_buffer, row)
+    states = self.states
+    if len(states) <= row:
+      if metrics is not None:
+        metrics.statesScanned += row + 1 - len(states)
+      while len(states) <= row:
+        prev_row = len(states) - 1
+        line = text_buffer.getLine(prev_row)
+        self.hashes.append(lineHash(line))
+        state = lineEndState(line, lineStartStates[states[prev_row]])
+        states.append(lineStartStateIds[state])
+      # Hashed from the lines as they are now
+      self.checkedRows = len(self.hashes)
+    return lineStartStates[states[row]]
+
+def getLineStateCheckpoints(text_buffer):
+  """
+  Line state checkpoints attached to text_buffer through its lineStateCheckpoints attribute,
+  created on first use
+  """
+  checkpoints = getattr(text_buffer, "lineStateCheckpoints", None)
+  if checkpoints is None:
+    checkpoints = LineStateCheckpoints()
+    text_buffer.lineStateCheckpoints = checkpoints
+  return checkpoints
+
+# Lines scanned above a row the line state checkpoints don't reach to find the state it begins in, like
+# the minlines of a vim syntax sync
+kDefaultSyncLines = 200
+
+class LineTokenStream(object):
+  """
+  Token source lexing a buffer one line at a time with a precompiled regex.
+  Lexing forward from the head of the buffer produces the same tokens as
+  CppStreamLexer(forward_direction = True) driven by parseText.
+
+  Each line is lexed forward from the state it begins in, so backward iteration replays forward lexed
+  lines in reverse and strings or comments around the cursor are recognized. The state comes from the
+  line state checkpoints when they are at most sync_lines rows short of the line, otherwise from a scan
+  starting sync_lines rows above it, outside of strings and comments. A string or comment opened further
+  up than that is missed, the way the stream lexers assume the cursor is outside of both.
+  Lexed lines come from the LineTokenCache of the buffer and are reused by later streams.
+  The lines lexed or found in the cache and the lines scanned for states are counted in metrics, a
+  ParseMetrics, when given.
+  """
+  def __init__(self, text_buffer, allow_space_token = False, sync_lines = kDefaultSyncLines,
+      metrics = None):
+    self.textBuffer = text_buffer
+    self.allowSpaceToken = allow_space_token
+    self.syncLines = sync_lines
+    self.metrics = metrics
+    self.cache = getLineTokenCache(text_buffer)
+    self.cache.evictChangedLines()
+    self.checkpoints = getLineStateCheckpoints(text_buffer)
+    self.checkpoints.sync(text_buffer)
+    # States of the rows from syncStart on, scanned from a row assumed to begin in kDefault
+    self.syncStart = None
+    self.syncStates = []
+    # row => (tokens, state the next line begins in)
+    self.lines = {}
+
+  def lineState(self, row):
+    """
+    State of the lexer at the start of row
+    """
+    checkpoints = self.checkpoints
+    if row - checkpoints.checkedRows <= self.syncLines:
+      return checkpoints.stateAt(self.textBuffer, row, self.metrics)
+    return self.syncedState(row)
+
+  def scanStates(self, start, end):
+    """
+    States of the rows from start up to end, scanned from the checkpoints when they reach start
+    """
+    checkpoints = self.checkpoints
+    if start - checkpoints.checkedRows <= self.syncLines:
+      state = checkpoints.stateAt(self.textBuffer, start, self.metrics)
+    else:
+      state = LexerState.kDefault
+    if self.metrics is not None:
+      self.metrics.statesScanned += max(end - 1 - start, 0)
+    states = [state]
+    for row in xrange(start, end - 1):
+      state = lineEndState(self.textBuffer.getLine(row), state)
+      states.append(state)
+    return states
+
+  def syncedState(self, row):
+    """
+    State of row from the rows scanned above it. The scanned range grows at least by doubling, so
+    iterating away from the cursor scans every row about once
+    """
+    start = self.syncStart
+    states = self.syncStates
+    if start is None:
+      start = max(row - self.syncLines, 0)
+      states.extend(self.scanStates(start, row + 1))
+      self.syncStart = start
+    elif row < start:
+      new_start = max(min(row - self.syncLines, start - len(states)), 0)
+      states[0:0] = self.scanStates(new_start, start)
+      self.syncStart = start = new_start
+    else:
+      if self.metrics is not None:
+        self.metrics.statesScanned += max(row + 1 - start - len(states), 0)
+      while start + len(states) <= row:
+        states.append(lineEndState(self.textBuffer.getLine(start + len(states) - 1), states[-1]))
+    return states[row - start]
+
+  def lineColumns(self, row):
+    """
+    lexLineColumns result of the full line
+    """
+    # Not through maxLines, which has buffers indexing their lines lazily index all of them
+    has_newline = self.textBuffer.getLine(row + 1) is not None
+    return self.cache.lexLine(row, self.textBuffer.getLine(row), self.lineState(row),
+        self.allowSpaceToken, has_newline, self.metrics)
+
+  def lineTokens(self, row):
+    """
+    Tokens of the full line and the state the next line begins in
+    """
+    result = self.lines.get(row)
+    if result is None:
+      columns, next_state = self.lineColumns(row)
+      result = (columnsToTokens(columns, row), next_state)
+      self.lines[row] = result
+    return result
+
+  def continuesNextLine(self, row, token):
+    """
+    Whether token, the last token of row, is continued by the first token of the next row
+    """
+    tokens, next_state = self.lineTokens(row)
+    return len(tokens) > 0 and tokens[-1] is token and \
+        continuesLine(token, next_state, self.textBuffer.getLine(row))
+
+  def continuesPrevLine(self, row, token):
+    """
+    Whether token, the first token of row, is the rest of the last token of the previous row
+    """
+    if row <= 0 or token.span.start.column != 0:
+      return False
+    prev_tokens, _ = self.lineTokens(row - 1)
+    return len(prev_tokens) > 0 and self.continuesNextLine(row - 1, prev_tokens[-1]) and \
+        continuesToken(prev_tokens[-1], token)
+
+  def joinPrevLines(self, row, token):
+    """
+    Joins token, the first token of row, with the head of the multiline token it continues
+    """
+    head = token
+    while self.continuesPrevLine(row, head):
+      head = self.lineTokens(row - 1)[0][-1]
+      token = joinTokens(head, token)
+      row -= 1
+    return token
+
+  def joinNextLines(self, row, token):
+    """
+    Joins token, the last token of row, with the rest of the multiline token it starts
+    """
+    tail = token
+    while self.continuesNextLine(row, tail) and self.textBuffer.getLine(row + 1) is not None:
+      next_tokens, _ = self.lineTokens(row + 1)
+      if not next_tokens or not continuesToken(tail, next_tokens[0]):
+        break
+      tail = next_tokens[0]
+      token = joinTokens(token, tail)
+      row += 1
+    return token
+
+  def forward(self, cursor):
+    """
+    Yields the tokens ending after cursor, the token under the cursor included, up to the end of the
+    buffer, followed by a kEnd token
+    """
+    start_row = max(cursor.row, 0)
+    pending = None
+    row = start_row
+    while True:
+      line = self.textBuffer.getLine(row)
+      if line is None:
+        break
+      tokens, next_state = self.lineTokens(row)
+      if row == start_row:
+        tokens = [x for x in tokens if cursor < x.span.end]
+        if tokens:
+          # Might have started inside of a multiline token
+          tokens[0] = self.joinPrevLines(row, tokens[0])
+      else:
+        tokens = list(tokens)
+
+      if pending is not None:
+        if tokens and continuesToken(pending, tokens[0]):
+          tokens[0] = joinTokens(pending, tokens[0])
+        else:
+          yield pending
+        pending = None
+      if tokens and continuesLine(tokens[-1], next_state, line):
+        pending = tokens.pop()
+
+      for token in tokens:
+        yield token
+      row += 1
+
+    if pending is not None:
+      yield pending
+    yield Token(TextSpan(), TokenType.kEnd)
+
+  def backward(self, cursor):
+    """
+    Yields the tokens starting at or before cursor in reverse order, followed by a kEnd token
+    """
+    start_row = cursor.row
+    if self.textBuffer.getLine(start_row) is None and start_row >= 0:
+      start_row = self.textBuffer.maxLines() - 1
+    # First token of the line after row, held back in case it continues the last token of row
+    held = None
+    for row in xrange(start_row, -1, -1):
+      tokens, next_state = self.lineTokens(row)
+      if row == start_row:
+        last = tokens[-1] if tokens else None
+        tokens = [x for x in tokens if x.span.start <= cursor]
+        if tokens and tokens[-1] is last:
+          # Might have started inside of a multiline token
+          tokens[-1] = self.joinNextLines(row, last)
+      else:
+        tokens = list(tokens)
+
+      if held is not None:
+        if tokens and continuesLine(tokens[-1], next_state, self.textBuffer.getLine(row)) and \
+            continuesToken(tokens[-1], held):
+          tokens[-1] = joinTokens(tokens[-1], held)
+        else:
+          yield held
+        held = None
+      if tokens and self.continuesPrevLine(row, tokens[0]):
+        held = tokens.pop(0)
+
+      for token in reversed(tokens):
+        yield token
+
+    if held is not None:
+      yield held
+    yield Token(TextSpan(), TokenType.kEnd)
@@ -0,0 +1,48 @@
+import collections
+
+class LruCache(object):
+  """
+  Mapping bounded to max_size entries, evicting the least recently used entry first
+  """
+  def __init__(self, max_size):
+    self.maxSize = max_size
+    self.entries = collections.OrderedDict()
+    self.hits = 0
+    self.misses = 0
+
+  def __len__(self):
+    return len(self.entries)
+
+  def __contains__(self, key):
+    return key in self.entries
+
+  def get(self, key, default = None):
+    try:
+      value = self.entries.pop(key)
+    except KeyError:
+      self.misses += 1
+      return default
+    self.entries[key] = value
+    self.hits += 1
+    return value
+
+  def put(self, key, value):
+    self.entries.pop(key, None)
+    self.entries[key] = value
+    self.evict()
+
+  def discard(self, key):
+    self.entries.pop(key, None)
+
+  def resize(self, max_size):
+    self.maxSize = max_size
+    self.evict()
+
+  def evict(self):
+    while len(self.entries) > self.maxSize:
+      self.entries.popitem(last = False)
+
+  def clear(self):
+    self.entries.clear()
+    self.hits = 0
+    self.misses = 0
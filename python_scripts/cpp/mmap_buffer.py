@@ -0,0 +1,197 @@
+import mmap
+import os
+import re
+from array import array
+from stream_parser import LineBuffer, kOffsetTypecode
+from line_lexer_cpp import LineTokenCache
+
+# Decoded lines kept for the chars and spans read around the same rows
+kDefaultLineCacheSize = 64
+
+# Bytes of the file mapped at once
+kDefaultMapSize = 16 * 1024 * 1024
+
+# Lexed lines kept by the line token cache of a mapped file, a fraction of the editor default
+kLexedLineCacheSize = 1000
+
+nonAsciiRegex = re.compile(r"[\x80-\xff]")
+
+# Largest file the line start offsets can address
+kMaxFileSize = 2 ** (8 * array(kOffsetTypecode).itemsize - 1) - 1
+
+class MappedFile(object):
+  """
+  Read only bytes of a file through a single mapping of map_size bytes moved to wherever the file is
+  read, so the pages of the file resident in the process stay bounded by map_size whatever the file size
+  """
+  def __init__(self, path, map_size = kDefaultMapSize):
+    self.file = open(path, "rb")
+    self.size = os.fstat(self.file.fileno()).st_size
+    # Mappings start at a multiple of the allocation granularity
+    granularity = mmap.ALLOCATIONGRANULARITY
+    self.mapSize = max(map_size // granularity, 1) * granularity
+    self.mapping = None
+    self.mapStart = 0
+    self.mapEnd = 0
+
+  def __len__(self):
+    return self.size
+
+  def close(self):
+    if self.mapping is not None:
+      self.mapping.close()
+      self.mapping = None
+    self.file.close()
+
+  def mapAt(self, offset):
+    if self.mapping is not None:
+      self.mapping.close()
+    start = offset - offset % mmap.ALLOCATIONGRANULARITY
+    length = min(self.mapSize, self.size - start)
+    self.mapping = mmap.mmap(self.file.fileno(), length, access = mmap.ACCESS_READ, offset = start)
+    self.mapStart = start
+    self.mapEnd = start + length
+
+  def find(self, sub, start):
+    """
+    Offset of the first sub at or after start, -1 when there is none. sub is a single byte, so it can't
+    straddle two mappings
+    """
+    while start < self.size:
+      if not self.mapStart <= start < self.mapEnd:
+        self.mapAt(start)
+      index = self.mapping.find(sub, start - self.mapStart)
+      if index != -1:
+        return self.mapStart + index
+      start = self.mapEnd
+    return -1
+
+  def slice(self, start, end):
+    end = min(end, self.size)
+    if start >= end:
+      return b""
+    if not (self.mapStart <= start and end <= self.mapEnd):
+      self.mapAt(start)
+      if end > self.mapEnd:
+        # Longer than what is left of the mapping from start
+        self.file.seek(start)
+        return self.file.read(end - start)
+    return self.mapping[start - self.mapStart:end - self.mapStart]
+
+class MmapBuffer(LineBuffer):
+  """
+  LineBuffer over a file mapped read only through a MappedFile, for files too large to hold as a string
+  and a list of lines.
+
+  Lines are found through an index of the offset every line starts at, built by scanning for newlines
+  only as far as the furthest row asked for, maxLines scans the whole file. The text objects read rows
+  through getLine and only call maxLines past the end of the file. Files larger than kMaxFileSize raise
+  a ValueError. A line is sliced out of the
+  mapping when it is read: lines of ASCII bytes are handed out as they are, so the lexers run on the
+  bytes, other lines are decoded with encoding and their columns count chars
+  """
+  def __init__(self, path, encoding = "utf-8", map_size = kDefaultMapSize,
+      line_cache_size = kDefaultLineCacheSize):
+    self.encoding = encoding
+    self.data = MappedFile(path, map_size)
+    if len(self.data) > kMaxFileSize:
+      self.data.close()
+      raise ValueError("{} is larger than the {} bytes a line index can address".format(path, kMaxFileSize))
+    self.lineStarts = array(kOffsetTypecode, [0])
+    # Offset the newline scan goes on from, None once the whole file is indexed
+    self.scanOffset = 0
+    # row => line, dropped whole when full
+    self.lines = {}
+    self.lineCacheSize = line_cache_size
+    # The file never changes: the line states are never synced again and lexed lines aren't tracked
+    # per row, which would keep every line alive
+    self.changedTick = 0
+    self.lineTokenCache = LineTokenCache(kLexedLineCacheSize, track_rows = False)
+
+  def close(self):
+    self.data.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.close()
+
+  def indexThrough(self, row):
+    """
+    Scans newlines until row has a start offset or the file ends
+    """
+    starts = self.lineStarts
+    data = self.data
+    offset = self.scanOffset
+    while len(starts) <= row and offset is not None:
+      offset = data.find(b"\n", offset)
+      if offset == -1:
+        offset = None
+      else:
+        offset += 1
+        starts.append(offset)
+    self.scanOffset = offset
+
+  def lineBytes(self, row):
+    start = self.lineStarts[row]
+    if row + 1 < len(self.lineStarts):
+      end = self.lineStarts[row + 1] - 1
+    else:
+      end = len(self.data)
+      # The line may not be the last one, it ends at the next newline
+      newline = self.data.find(b"\n", start)
+      if newline != -1:
+        end = newline
+    return self.data.slice(start, end)
+
+  def getLine(self, row):
+    if row < 0:
+      return None
+    line = self.lines.get(row)
+    if line is not None:
+      return line
+    self.indexThrough(row)
+    if row >= len(self.lineStarts):
+      return None
+    line = self.lineBytes(row)
+    if nonAsciiRegex.search(line) is not None:
+      line = line.decode(self.encoding, "replace")
+    if len(self.lines) >= self.lineCacheSize:
+      self.lines.clear()
+    self.lines[row] = line
+    return line
+
+  def maxLines(self):
+    self.indexThrough(len(self.data) + 1)
+    return len(self.lineStarts)
+
+  def getChar(self, cursor):
+    line = self.getLine(cursor.row)
+    if line is not None:
+      if 0 <= cursor.column < len(line):
+        return line[cursor.column]
+      elif cursor.column == len(line) and self.getLine(cursor.row + 1) is not None:
+        return '\n'
+    return None
+
+  def getSpan(self, text_span):
+    """
+    Text of text_span, only its rows are read
+    """
+    start = text_span.start
+    end = text_span.end
+    if self.getChar(start) is None:
+      return ''
+    if start.row == end.row:
+      return self.getLine(start.row)[start.column:end.column]
+    parts = [self.getLine(start.row)[start.column:]]
+    for row in xrange(start.row + 1, end.row):
+      line = self.getLine(row)
+      if line is None:
+        return '\n'.join(parts)
+      parts.append(line)
+    line = self.getLine(end.row)
+    if line is not None:
+      parts.append(line[:end.column])
+    return '\n'.join(parts)
@@ -0,0 +1,166 @@
+import importlib
+import os
+import sys
+import types
+
+# Modules the editor entry points run
+textObjectModules = [
+  "text_object_function",
+  "text_object_param",
+  "text_object_type",
+  "text_object_comment",
+]
+
+generatorModules = [
+  "ctor_stub",
+  "stub_opeq",
+]
+
+def sourcePath(module):
+  """
+  Path of the source of module, None when it has none
+  """
+  path = getattr(module, "__file__", None)
+  if path is not None and path.endswith((".pyc", ".pyo")):
+    path = path[:-1]
+  return path
+
+def sourceMtime(module):
+  """
+  Modification time of the source of module, None when it has none
+  """
+  path = sourcePath(module)
+  if path is None:
+    return None
+  try:
+    return os.path.getmtime(path)
+  except OSError:
+    return None
+
+def sourceDirectory(module):
+  path = sourcePath(module)
+  if path is None:
+    return None
+  return os.path.dirname(os.path.abspath(path))
+
+def packageDependencies(module):
+  """
+  Names of the modules in the directory of module that it reads, imported whole or through the
+  functions, classes and objects it imports from them
+  """
+  directory = sourceDirectory(module)
+  names = set()
+  if directory is None:
+    return names
+  for value in vars(module).values():
+    if isinstance(value, types.ModuleType):
+      name = value.__name__
+    else:
+      name = getattr(value, "__module__", None)
+    if not isinstance(name, str) or name == module.__name__:
+      continue
+    dependency = sys.modules.get(name)
+    if dependency is not None and sourceDirectory(dependency) == directory:
+      names.add(name)
+  return names
+
+def dependencyOrder(module):
+  """
+  Names of module and of its package dependencies, transitively, every module after the ones it depends
+  on
+  """
+  order = []
+  seen = set()
+  def visit(name):
+    seen.add(name)
+    for dependency in sorted(packageDependencies(sys.modules[name])):
+      if dependency not in seen:
+        visit(dependency)
+    order.append(name)
+  visit(module.__name__)
+  return order
+
+class ModuleRegistry(object):
+  """
+  Entry point modules imported and warmed once, through their warm function when they have one, so an
+  invocation only looks its module up. With reload_modules, the modules of the package an entry point
+  depends on (see packageDependencies) whose source changed since they were loaded are reloaded, then
+  every module depending on a reloaded one, dependencies first. The entry point is warmed again when it
+  was reloaded
+  """
+  def __init__(self, reload_modules = False):
+    self.reloadModules = reload_modules
+    # entry point module name => (module, dependencyOrder of the module)
+    self.entries = {}
+    # module name => (source mtime, load sequence number, packageDependencies) when the module was last
+    # loaded
+    self.loaded = {}
+    self.sequence = 0
+    self.loads = 0
+
+  def __contains__(self, module_name):
+    return module_name in self.entries
+
+  def setLoaded(self, name):
+    module = sys.modules[name]
+    self.loaded[name] = (sourceMtime(module), self.sequence, packageDependencies(module))
+
+  def track(self, order):
+    for name in order:
+      if name not in self.loaded:
+        self.setLoaded(name)
+
+  def isCurrent(self, name):
+    """
+    Whether module name was loaded from its current source after every package module it depends on
+    """
+    mtime, sequence, dependencies = self.loaded[name]
+    if sourceMtime(sys.modules[name]) != mtime:
+      return False
+    return all(x not in self.loaded or self.loaded[x][1] <= sequence for x in dependencies)
+
+  def reloadChanged(self, order):
+    """
+    Reloads the modules of order that aren't current, in order. Whether any was reloaded
+    """
+    reloaded = False
+    for name in order:
+      if name not in self.loaded:
+        self.setLoaded(name)
+      elif not self.isCurrent(name):
+        reload(sys.modules[name])
+        self.sequence += 1
+        self.setLoaded(name)
+        reloaded = True
+    return reloaded
+
+  def warm(self, module_name, module):
+    warm = getattr(module, "warm", None)
+    if warm is not None:
+      warm()
+    order = dependencyOrder(module)
+    self.track(order)
+    self.entries[module_name] = (module, order)
+    self.loads += 1
+    return module
+
+  def load(self, module_name):
+    return self.warm(module_name, importlib.import_module(module_name))
+
+  def get(self, module_name):
+    entry = self.entries.get(module_name)
+    if entry is None:
+      return self.load(module_name)
+    module, order = entry
+    if self.reloadModules and self.reloadChanged(order):
+      return self.warm(module_name, module)
+    return module
+
+  def warmAll(self, module_names = None):
+    """
+    Loads module_names, every text object and generator module by default
+    """
+    if module_names is None:
+      module_names = textObjectModules + generatorModules
+    for module_name in module_names:
+      self.get(module_name)
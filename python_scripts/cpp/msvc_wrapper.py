@@ -8,9 +8,11 @@ from System.Diagnostics import Trace
 clr.AddReference("Microsoft.VisualStudio.TextManager.Interop")
 from Microsoft.VisualStudio.TextManager.Interop import *
 import stream_parser
-import importlib
+import snapshot_buffer
+import module_registry
 import traceback
 import logging
+from lru_cache import LruCache
 
 out_int = 1
 out_str = ""
@@ -40,14 +42,45 @@ logger.setLevel(logging.DEBUG)
 def log(*args):
   Trace.WriteLine(" ".join(map(lambda x : str(x), args)))
 
+registry = module_registry.ModuleRegistry()
+
+# Documents whose caches are kept at once
+kBufferCacheSize = 16
+
+# ITextBuffer hash code => (ITextBuffer, {cache attribute: value})
+# A buffer is created per invocation over the current snapshot, the lexed lines and line states of the
+# kBufferCacheSize documents last read are kept
+bufferCaches = LruCache(kBufferCacheSize)
+
+def getBufferCaches(textBuffer):
+  """
+  Caches of the document of textBuffer. pythonnet may wrap the ITextBuffer in a new object per call, so
+  the document is looked up by the hash code of the .NET object, which is kept for its life, and told
+  apart from another one with the same hash code by Equals
+  """
+  key = textBuffer.GetHashCode()
+  entry = bufferCaches.get(key)
+  if entry is None or not entry[0].Equals(textBuffer):
+    entry = (textBuffer, {})
+    bufferCaches.put(key, entry)
+  return entry[1]
+
+def msvcWarmModules():
+  try:
+    registry.warmAll()
+  except Exception as e:
+    log(traceback.format_exc())
+    raise e
+
 def msvcMain(vsTextView, textBuffer, module_name, inner):
   try:
-    module = importlib.import_module(module_name)
+    module = registry.get(module_name)
     ret, line, column = vsTextView.GetCaretPos(out_int, out_int)
-    text = textBuffer.currentSnapshot.GetText()
-    text_buffer = stream_parser.Buffer(text)
+    # Only the lines the parse reaches are read from the snapshot
+    caches = getBufferCaches(textBuffer)
+    text_buffer = snapshot_buffer.snapshotBuffer(textBuffer.currentSnapshot, line, caches = caches)
     # column may include virtual space, move it so it does not
-    column = min(len(text_buffer.text[line]), column)
+    column = min(len(text_buffer.getLine(line)), column)
     cursor = stream_parser.Cursor(line, column)
     span = module.main(cursor, text_buffer, inner=inner, logger = logger)
     # log(span)
@@ -58,7 +91,7 @@ def msvcMain(vsTextView, textBuffer, module_name, inner):
 
 def msvcMainSelectionAppend(text, module_name):
   try:
-    module = importlib.import_module(module_name)
+    module = registry.get(module_name)
     # file output stream for parser seems to not work when streaming output with debug mode
     out_text = module.main(text, debug = False, logger = logger)
     return out_text
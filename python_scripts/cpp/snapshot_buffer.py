@@ -0,0 +1,49 @@
+import re
+import stream_parser
+
+# Line breaks of Visual Studio text snapshots
+lineBreakRegex = re.compile(u"\r\n|[\r\n\u0085\u2028\u2029]")
+
+class SnapshotLineWindow(stream_parser.LineWindow):
+  """
+  LineWindow over a Visual Studio ITextSnapshot. A range of lines is one GetText of the span from the
+  start of its first line to the end of its last one, split on the line breaks. bridgeCalls counts the
+  calls made to the snapshot
+  """
+  def __init__(self, snapshot, row, window = stream_parser.kDefaultLineWindow):
+    self.snapshot = snapshot
+    self.bridgeCalls = 1
+    stream_parser.LineWindow.__init__(self, snapshot.LineCount, row, window)
+
+  def fetchLines(self, start, end):
+    if start >= end:
+      return []
+    snapshot = self.snapshot
+    start_position = snapshot.GetLineFromLineNumber(start).Start.Position
+    end_position = snapshot.GetLineFromLineNumber(end - 1).End.Position
+    self.bridgeCalls += 3
+    lines = lineBreakRegex.split(snapshot.GetText(start_position, end_position - start_position))
+    if len(lines) != end - start:
+      # A line break the snapshot doesn't count as one, read the lines one by one
+      self.bridgeCalls += 2 * (end - start)
+      lines = [snapshot.GetLineFromLineNumber(row).GetText() for row in xrange(start, end)]
+    return lines
+
+class SnapshotBuffer(stream_parser.SharedCaches, stream_parser.WindowBuffer):
+  """
+  WindowBuffer over the lines of a snapshot. With a caches dict, the lexed lines and line states the
+  text objects attach to the buffer are kept there instead, so the buffers of the snapshots of one
+  document share them between invocations. The version number of the snapshot stands in for the
+  changedTick, the line states are only checked again once the document changed
+  """
+  def __init__(self, snapshot, row, window = stream_parser.kDefaultLineWindow, caches = None):
+    stream_parser.WindowBuffer.__init__(self, SnapshotLineWindow(snapshot, row, window))
+    self.caches = caches
+    if caches is not None:
+      self.changedTick = snapshot.Version.VersionNumber
+
+def snapshotBuffer(snapshot, row, window = stream_parser.kDefaultLineWindow, caches = None):
+  """
+  SnapshotBuffer over the lines of snapshot, starting with a window around row
+  """
+  return SnapshotBuffer(snapshot, row, window, caches)
@@ -87,6 +87,8 @@ def isSymbol(symbol):
     if s:
       return s == symbol
     return False
+  # Lets compileTransitions resolve this predicate into a table lookup
+  isThisSymbol.symbol = symbol
   return isThisSymbol
 
 def transition(state):
@@ -239,14 +241,39 @@ def backwardNewLineEvent(cursor, text_buffer):
       return backwardNewLineEvent(Cursor(row, column), text_buffer)
   return Cursor(row, column), "\n"
 
-# We assume we do not start inside of a string or a /* */ comment block
+def buildTransitions(forward_direction, allow_space_token):
+  transitions = copy.deepcopy(stateTransitionBase)
+  stateTransitionSpaces(transitions, allow_space_token)
+  stateTransitionDirectional(transitions, forward_direction)
+  stateTransitionFinalize(transitions)
+  return transitions
+
+# (forward_direction, allow_space_token) => (transitions, dispatch)
+compiledTransitionCache = {}
+
+def getCompiledTransitions(forward_direction, allow_space_token):
+  key = (forward_direction, allow_space_token)
+  if key not in compiledTransitionCache:
+    transitions = buildTransitions(forward_direction, allow_space_token)
+    compiledTransitionCache[key] = (transitions, compileTransitions(transitions))
+  return compiledTransitionCache[key]
+
+# We assume we do not start inside of a string or a /* */ comment block, unless lexing forward from the
+# start of a line with the start_state line_lexer_cpp.LineStateCheckpoints has for it
 class CppStreamLexer(Lexer):
-  def __init__(self, forward_direction = True, allow_space_token = False):
-    transitions = copy.deepcopy(stateTransitionBase)
-    stateTransitionSpaces(transitions, allow_space_token)
-    stateTransitionDirectional(transitions, forward_direction)
-    stateTransitionFinalize(transitions)
-    Lexer.__init__(self, transitions, LexerState.kDefault)
+  def __init__(self, forward_direction = True, allow_space_token = False, compiled = True,
+      start_state = LexerState.kDefault, trace = None):
+    """
+    compiled looks up transitions through per state dispatch tables shared between lexers of the
+    same configuration, otherwise the predicate lists are walked for every char.
+    trace keeps the per char logging, see stream_parser.traceEnabled
+    """
+    if compiled:
+      transitions, dispatch = getCompiledTransitions(forward_direction, allow_space_token)
+    else:
+      transitions = buildTransitions(forward_direction, allow_space_token)
+      dispatch = None
+    Lexer.__init__(self, transitions, start_state, dispatch, trace)
     if forward_direction:
       pass
     else:
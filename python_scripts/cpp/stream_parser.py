@@ -1,15 +1,84 @@
 import functools
 import logging
 import sys
+import bisect
+import time
+from array import array
 
 logging.basicConfig(stream=sys.stdout)
 logger = logging.getLogger(__name__)
 parserLogger = logging.getLogger(__name__ + ".Parser")
 lexLogger = logging.getLogger(__name__ + ".Lexer")
 
+# Typecode of the arrays of offsets from the head of a buffer. Python 2 arrays have no 64 bit typecode,
+# a C long is 32 bits on Windows where buffers from 2GB up can't be addressed
+kOffsetTypecode = 'l'
+
 def inRange(x, lst):
   return x >= 0 and x < len(lst)
 
+class ParseMetrics(object):
+  """
+  Counters of the work done by one text object invocation. Opt-in, lexers, token streams, parsers and
+  the parse loops only fill them in when given an instance
+  """
+  def __init__(self):
+    # Tokens produced by the lexer or the token source
+    self.tokens = 0
+    # Parser transition functions called
+    self.transitions = 0
+    # Lines of a LineTokenStream found in the line token cache, and the ones lexed for missing from it
+    self.lineCacheHits = 0
+    self.lineCacheMisses = 0
+    # Chars of the lines lexed, or the chars a Lexer consumed one at a time
+    self.charsLexed = 0
+    # Lines scanned for the lexer state they end in, to find the state of the lines below
+    self.statesScanned = 0
+    # Lines a BracketScanner went through pairing brackets
+    self.bracketLines = 0
+    # Whole buffer BracketIndex builds
+    self.indexBuilds = 0
+    # Phase name => wall time in seconds
+    self.phaseTimes = {}
+
+  def addTime(self, phase, seconds):
+    self.phaseTimes[phase] = self.phaseTimes.get(phase, 0.0) + seconds
+
+  def asDict(self):
+    return {
+      "tokens": self.tokens,
+      "transitions": self.transitions,
+      "lineCacheHits": self.lineCacheHits,
+      "lineCacheMisses": self.lineCacheMisses,
+      "charsLexed": self.charsLexed,
+      "statesScanned": self.statesScanned,
+      "bracketLines": self.bracketLines,
+      "indexBuilds": self.indexBuilds,
+      "phaseTimes": dict(self.phaseTimes),
+    }
+
+  def __str__(self):
+    return "ParseMetrics({})".format(self.asDict())
+
+  def __repr__(self):
+    return str(self)
+
+def withMetrics(main):
+  """
+  Decorates a text object main taking a metrics keyword argument. When given a ParseMetrics, main returns
+  (span, metrics) with the wall time of the whole call added as the "total" phase
+  """
+  @functools.wraps(main)
+  def mainWithMetrics(*args, **kargs):
+    metrics = kargs.get("metrics")
+    if metrics is None:
+      return main(*args, **kargs)
+    start = time.time()
+    span = main(*args, **kargs)
+    metrics.addTime("total", time.time() - start)
+    return span, metrics
+  return mainWithMetrics
+
 class StateExitAction(object):
   kAllActions = [
     "kPushToken",
@@ -19,7 +88,56 @@ class StateExitAction(object):
 for x in StateExitAction.kAllActions:
   setattr(StateExitAction, x, x)
 
-class Buffer(object):
+class LineBuffer(object):
+  """
+  Lines of a document. Lexers, parsers, text objects and Cursor moves read every document through these
+  methods, never through the lines themselves:
+    maxLines()          number of lines
+    getLine(row)        line row without its '\n', None out of the document
+    lineLength(row)     len(getLine(row))
+    getChar(cursor)     char at cursor, '\n' past the end of every line but the last, None out of the
+                        document
+    getSpan(text_span)  text of text_span
+  A buffer only has to give maxLines and getLine, the rest is built on them here. Buffer keeps the lines
+  of a string in a list, FlatBuffer keeps the string and WindowBuffer reads lines from a line provider
+  only when they are asked for
+  """
+  def getLine(self, row):
+    raise NotImplementedError()
+
+  def maxLines(self):
+    raise NotImplementedError()
+
+  def lineLength(self, row):
+    return len(self.getLine(row))
+
+  def getChar(self, cursor):
+    line = self.getLine(cursor.row)
+    if line is not None:
+      if 0 <= cursor.column < len(line):
+        return line[cursor.column]
+      elif cursor.column == len(line) and cursor.row + 1 != self.maxLines():
+        return '\n'
+    return None
+
+  def getLastCursorPos(self):
+    last_row = self.maxLines() - 1
+    return Cursor(last_row, self.lineLength(last_row) - 1)
+
+  def getSpan(self, text_span):
+    chars = []
+    cursor_it = text_span.start.clone()
+    c = self.getChar(cursor_it)
+    while c is not None and cursor_it != text_span.end:
+      chars.append(c)
+      cursor_it.moveForward(self)
+      c = self.getChar(cursor_it)
+    return ''.join(chars)
+
+class Buffer(LineBuffer):
+  """
+  LineBuffer keeping the lines of a string in the text list
+  """
   def __init__(self, text):
     self.text = text.split('\n')
 
@@ -41,18 +159,242 @@ class Buffer(object):
   def maxLines(self):
     return len(self.text)
 
+  def lineLength(self, row):
+    return len(self.text[row])
+
+class FlatBufferLines(object):
+  """
+  Read only sequence of the lines of a FlatBuffer, standing in for Buffer.text
+  """
+  def __init__(self, text_buffer):
+    self.textBuffer = text_buffer
+
+  def __len__(self):
+    return self.textBuffer.maxLines()
+
+  def __getitem__(self, row):
+    if row < 0:
+      row += self.textBuffer.maxLines()
+    line = self.textBuffer.getLine(row)
+    if line is None:
+      raise IndexError(row)
+    return line
+
+class FlatBuffer(Buffer):
+  """
+  Buffer keeping the original string with the offset every line starts at. Positions map to offsets in
+  O(1), offsets back to positions with a bisect and getSpan is a single slice
+  """
+  def __init__(self, text):
+    self.string = text
+    self.lineStarts = array(kOffsetTypecode, [0])
+    offset = text.find('\n')
+    while offset != -1:
+      self.lineStarts.append(offset + 1)
+      offset = text.find('\n', offset + 1)
+    self.text = FlatBufferLines(self)
+
+  def lineLimit(self, row):
+    """
+    Offset past the last char of row, its newline included
+    """
+    if row + 1 < len(self.lineStarts):
+      return self.lineStarts[row + 1]
+    return len(self.string)
+
+  def toOffset(self, cursor):
+    return self.lineStarts[cursor.row] + cursor.column
+
+  def toCursor(self, offset):
+    row = bisect.bisect_right(self.lineStarts, offset) - 1
+    return Cursor(row, offset - self.lineStarts[row])
+
+  def getChar(self, cursor):
+    if inRange(cursor.row, self.lineStarts) and cursor.column >= 0:
+      offset = self.toOffset(cursor)
+      if offset < self.lineLimit(cursor.row):
+        return self.string[offset]
+    return None
+
+  def getLine(self, line):
+    if inRange(line, self.lineStarts):
+      end = self.lineLimit(line)
+      if line + 1 < len(self.lineStarts):
+        end -= 1
+      return self.string[self.lineStarts[line]:end]
+    else:
+      return None
+
+  def maxLines(self):
+    return len(self.lineStarts)
+
+  def lineLength(self, row):
+    length = self.lineLimit(row) - self.lineStarts[row]
+    if row + 1 < len(self.lineStarts):
+      length -= 1
+    return length
+
   def getLastCursorPos(self):
-    return Cursor(self.maxLines() - 1, len(self.text[-1]) - 1)
+    return Cursor(self.maxLines() - 1, len(self.string) - self.lineStarts[-1] - 1)
 
   def getSpan(self, text_span):
-    chars = []
-    cursor_it = text_span.start.clone()
-    c = self.getChar(cursor_it)
-    while c is not None and cursor_it != text_span.end:
-      chars.append(c)
-      cursor_it.moveForward(self)
-      c = self.getChar(cursor_it)
-    return ''.join(chars)
+    if self.getChar(text_span.start) is None:
+      return ''
+    if text_span.end.row < len(self.lineStarts):
+      end = self.toOffset(text_span.end)
+    else:
+      end = len(self.string)
+    return self.string[self.toOffset(text_span.start):end]
+
+# Lines a LineWindow fetches around its row on creation
+kDefaultLineWindow = 100
+
+class LineWindow(object):
+  """
+  Read only sequence of the lines of a document fetched from a line range provider a slice at a time,
+  standing in for Buffer.text. The lines start with a window around row and grow, at least doubling,
+  toward any row asked for out of them, fetched lines are kept for the life of the object.
+  Subclasses fetch with fetchLines(start, end) and count the calls they make to the provider in
+  bridgeCalls, linesFetched counts the lines fetched
+  """
+  def __init__(self, line_count, row, window = kDefaultLineWindow):
+    self.lineCount = line_count
+    self.linesFetched = 0
+    self.start = min(max(row - window // 2, 0), max(line_count - window, 0))
+    self.lines = self.fetch(self.start, min(self.start + window, line_count))
+
+  def fetchLines(self, start, end):
+    raise NotImplementedError()
+
+  def fetch(self, start, end):
+    lines = self.fetchLines(start, end)
+    self.linesFetched += len(lines)
+    return lines
+
+  def __len__(self):
+    return self.lineCount
+
+  def __getitem__(self, row):
+    if row < 0:
+      row += self.lineCount
+    if row < 0 or row >= self.lineCount:
+      raise IndexError(row)
+    if row < self.start:
+      self.growBackward(row)
+    elif row >= self.start + len(self.lines):
+      self.growForward(row)
+    return self.lines[row - self.start]
+
+  def growForward(self, row):
+    end = self.start + len(self.lines)
+    new_end = min(max(row + 1, end + max(len(self.lines), 1)), self.lineCount)
+    self.lines.extend(self.fetch(end, new_end))
+
+  def growBackward(self, row):
+    new_start = max(min(row, self.start - max(len(self.lines), 1)), 0)
+    self.lines[0:0] = self.fetch(new_start, self.start)
+    self.start = new_start
+
+class ProviderLineWindow(LineWindow):
+  """
+  LineWindow over a line provider: get_line(row) gives line row, None past the last line. get_lines(start,
+  end) gives the lines of a range in one call when there is one, otherwise get_line is called per line.
+  line_count() gives the number of lines, without it they are counted by probing get_line at doubling
+  rows then bisecting. bridgeCalls counts the calls made to the provider
+  """
+  def __init__(self, get_line, get_lines = None, line_count = None, row = 0, window = kDefaultLineWindow):
+    self.provideLine = get_line
+    self.provideLines = get_lines
+    self.bridgeCalls = 0
+    if line_count is not None:
+      self.bridgeCalls += 1
+      count = line_count()
+    else:
+      count = self.countLines()
+    LineWindow.__init__(self, count, row, window)
+
+  def lineAt(self, row):
+    self.bridgeCalls += 1
+    return self.provideLine(row)
+
+  def countLines(self):
+    if self.lineAt(0) is None:
+      return 0
+    # low is a row of the document, high is past its end
+    low = 0
+    high = 1
+    while self.lineAt(high) is not None:
+      low = high
+      high *= 2
+    while high - low > 1:
+      middle = (low + high) // 2
+      if self.lineAt(middle) is None:
+        high = middle
+      else:
+        low = middle
+    return high
+
+  def fetchLines(self, start, end):
+    if self.provideLines is None:
+      return [self.lineAt(row) for row in xrange(start, end)]
+    self.bridgeCalls += 1
+    return list(self.provideLines(start, end))
+
+def providerBuffer(get_line, get_lines = None, line_count = None, row = 0, window = kDefaultLineWindow):
+  """
+  WindowBuffer over a line provider, see ProviderLineWindow. The lines are read starting with a window
+  around row
+  """
+  return WindowBuffer(ProviderLineWindow(get_line, get_lines, line_count, row, window))
+
+class WindowBuffer(LineBuffer):
+  """
+  LineBuffer over the lines of a LineWindow, only the lines a parse touches are read from the document.
+  Text objects touch the lines between the cursor and the brackets around it, whole buffer indices like
+  the BracketIndex of the function outline read them all
+  """
+  def __init__(self, lines):
+    self.text = lines
+
+  def getLine(self, row):
+    if 0 <= row < self.text.lineCount:
+      return self.text[row]
+    return None
+
+  def maxLines(self):
+    return self.text.lineCount
+
+  def bridgeCalls(self):
+    return self.text.bridgeCalls
+
+  def linesFetched(self):
+    return self.text.linesFetched
+
+class SharedCaches(object):
+  """
+  Buffer mixin keeping the lexing caches the text objects attach to a buffer in its caches dict instead
+  of on the object, when it has one. Editors create a buffer per invocation, the buffers of one document
+  are given the same dict so they share the lexed lines, line states and indices
+  """
+  # Attributes the lexing caches attach to a buffer
+  cacheAttributes = frozenset(["lineTokenCache", "lineStateCheckpoints", "bracketIndex", "functionOutline"])
+
+  def __getattr__(self, name):
+    # Only called for attributes not set on the object itself
+    caches = self.__dict__.get("caches")
+    if name in self.cacheAttributes and caches is not None:
+      try:
+        return caches[name]
+      except KeyError:
+        pass
+    raise AttributeError(name)
+
+  def __setattr__(self, name, value):
+    caches = self.__dict__.get("caches")
+    if name in self.cacheAttributes and caches is not None:
+      caches[name] = value
+    else:
+      object.__setattr__(self, name, value)
 
 @functools.total_ordering
 class Cursor(object):
@@ -60,9 +402,7 @@ class Cursor(object):
   row == -1 and column == -1 is the non-positional head of the file used when the cursor moves
   backwards from (0, 0) position and will become (0, 0) again when moved forward
   """
-  def __init__(self):
-    self.row = 0
-    self.column = 0
+  __slots__ = ("row", "column")
 
   def __init__(self, row = 0, column = 0):
     self.row = row
@@ -71,7 +411,7 @@ class Cursor(object):
   def __eq__(self, other):
     if type(self) != type(other):
       return False
-    return self.__dict__ == other.__dict__
+    return self.row == other.row and self.column == other.column
 
   def __ne__(self, other):
     return not self.__eq__(other)
@@ -105,13 +445,13 @@ class Cursor(object):
         if self.row < 0:
           self.column = -1
         else:
-          self.column = len(text_buffer.text[self.row])
+          self.column = text_buffer.lineLength(self.row)
 
   def moveForward(self, text_buffer = None):
     if text_buffer:
-      if inRange(self.row , text_buffer.text):
+      if 0 <= self.row < text_buffer.maxLines():
         self.column += 1
-        if len(text_buffer.text[self.row]) < self.column:
+        if text_buffer.lineLength(self.row) < self.column:
           self.column = 0
           self.row += 1
       elif self.row == -1 and self.column == -1:
@@ -121,6 +461,8 @@ class Cursor(object):
       self.column += 1
 
 class TextSpan(object):
+  __slots__ = ("start", "end")
+
   def __init__(self, start_cursor = None, end_cursor = None, inclusive = False):
     if not start_cursor:
       start_cursor = Cursor(0, 0)
@@ -138,7 +480,7 @@ class TextSpan(object):
   def __eq__(self, other):
     if type(self) != type(other):
       return False
-    return self.__dict__ == other.__dict__
+    return self.start == other.start and self.end == other.end
 
   def __ne__(self, other):
     return not self.__eq__(other)
@@ -167,9 +509,24 @@ class TextSpan(object):
     self.start = min(self.start, span.start)
     self.end = max(self.end, span.end)
 
+def makeSpan(start_cursor, end_cursor):
+  """
+  TextSpan owning start_cursor and end_cursor as they are, for callers creating both cursors themselves.
+  start_cursor must not be after end_cursor
+  """
+  span = TextSpan.__new__(TextSpan)
+  span.start = start_cursor
+  span.end = end_cursor
+  return span
+
 class Token(object):
+  """
+  The token owns span, which must not be changed by whoever created it
+  """
+  __slots__ = ("span", "tokenType")
+
   def __init__(self, span, token_type):
-    self.span = span.clone()
+    self.span = span
     self.tokenType = token_type
   def __str__(self):
       return "Token({}, {})".format(self.span, self.tokenType)
@@ -178,13 +535,28 @@ class Token(object):
   def __eq__(self, other):
     if type(self) != type(other):
       return False
-    return self.__dict__ == other.__dict__
+    return self.tokenType == other.tokenType and self.span == other.span
 
   def __ne__(self, other):
     return not self.__eq__(other)
 
+def traceEnabled(logger, trace):
+  """
+  Whether the per token/char logging of a Lexer or Parser is kept. trace None follows the level
+  logger has when the object is created, so the hot loops skip building log records otherwise
+  """
+  if trace is None:
+    return logger.isEnabledFor(logging.INFO)
+  return trace
+
 class Parser(object):
-  def __init__(self, transitions, start_state, end_state = None):
+  def __init__(self, transitions, start_state, end_state = None, trace = None, metrics = None):
+    """
+    trace keeps the per token logging, see traceEnabled. metrics is the ParseMetrics to count
+    transitions in
+    """
+    self.trace = traceEnabled(parserLogger, trace)
+    self.metrics = metrics
     self.transitions = transitions
     self.state = start_state
     self.endState = end_state
@@ -196,30 +568,39 @@ class Parser(object):
 
   def joinToken(self, token):
     if self.span is None:
-      self.span = token.span
+      self.span = token.span.clone()
     else:
       self.span.join(token.span)
-    parserLogger.debug(("Added in span", token.span, "Result", self.span))
+    if self.trace:
+      parserLogger.debug(("Added in span", token.span, "Result", self.span))
 
   def parseToken(self, token):
-    parserLogger.info(("Parsing token", token, "current span", self.span))
+    trace = self.trace
+    if trace:
+      parserLogger.info(("Parsing token", token, "current span", self.span))
     if self.state in self.transitions and \
         token.tokenType in self.transitions[self.state]:
       transition_func = self.transitions[self.state][token.tokenType]
-      parserLogger.debug(("Calling transition_func state:", self.state, " token: ", token.tokenType))
+      if trace:
+        parserLogger.debug(("Calling transition_func state:", self.state, " token: ", token.tokenType))
+      if self.metrics is not None:
+        self.metrics.transitions += 1
       new_state = transition_func(self, token)
       if new_state:
-        parserLogger.info(("transition ", self.state, " => ", new_state, " with ", token.tokenType))
+        if trace:
+          parserLogger.info(("transition ", self.state, " => ", new_state, " with ", token.tokenType))
         self.state = new_state
       if self.getTokenPost:
         self.getTokenPost(self, token)
     else:
       # Terminate
-      parserLogger.info(("Terminate from state ", self.state, " with token ", token.tokenType))
+      if trace:
+        parserLogger.info(("Terminate from state ", self.state, " with token ", token.tokenType))
       return True
 
     if self.state == self.endState:
-      parserLogger.info(("Terminate from end_state ", self.state))
+      if trace:
+        parserLogger.info(("Terminate from end_state ", self.state))
       return True
 
 class LexerReturn(object):
@@ -232,18 +613,77 @@ class LexerReturn(object):
     self.transition = transition
 
 
+class DispatchTable(object):
+  """
+  Compiled form of a state's ordered [predicate, action] list.
+  Predicates tagged with a symbol attribute (see stream_lexer_cpp.isSymbol) are resolved into a
+  char => action table up front. Every other char falls back to the class predicates (ids, spaces,
+  default) in their original order and the result is memoized, so predicates must be pure.
+  """
+  def __init__(self, transition_list):
+    self.transitionList = transition_list
+    self.classTransitions = [x for x in transition_list if getattr(x[0], "symbol", None) is None]
+    self.table = {}
+    for transition_data in transition_list:
+      symbol = getattr(transition_data[0], "symbol", None)
+      if symbol is not None and symbol not in self.table:
+        self.table[symbol] = findTransition(transition_list, symbol)
+
+  def lookup(self, char):
+    try:
+      return self.table[char]
+    except KeyError:
+      action = findTransition(self.classTransitions, char)
+      self.table[char] = action
+      return action
+
+def findTransition(transition_list, char):
+  for transition_data in transition_list:
+    if transition_data[0](char):
+      return transition_data[1]
+  return None
+
+def compileTransitions(transitions):
+  compiled = {}
+  for state, transition_list in transitions.items():
+    compiled[state] = DispatchTable(transition_list)
+  return compiled
+
 class Lexer(object):
-  def __init__(self, transitions, start_state):
+  def __init__(self, transitions, start_state, dispatch = None, trace = None, metrics = None):
+    """
+    dispatch is the compileTransitions() result of transitions. When given, the lexer looks up the
+    action for each char instead of walking the predicate lists
+
+    Actions are given the lexer's own cursors and must not change them.
+    trace keeps the per char logging, see traceEnabled. metrics is the ParseMetrics to count chars and
+    tokens in
+    """
+    self.trace = traceEnabled(lexLogger, trace)
+    self.metrics = metrics
     self.transitions = transitions
+    self.dispatch = dispatch
     self.state = start_state
     self.start_cursor = None
     self.prev_cursor = None
     self.lastLine = None
     self.newLineEvent = None
 
+  def findAction(self, char):
+    if self.dispatch is not None:
+      return self.dispatch[self.state].lookup(char)
+    for transition_data in self.transitions[self.state]:
+      if transition_data[0](char):
+        if self.trace:
+          lexLogger.debug(("Transition success", transition_data))
+        return transition_data[1]
+    return None
+
   def lex(self, cursor, text_buffer):
+    trace = self.trace
     if self.start_cursor is None:
-      lexLogger.debug(("Set start_cursor from none", cursor))
+      if trace:
+        lexLogger.debug(("Set start_cursor from none", cursor))
       self.start_cursor = cursor.clone()
     if self.prev_cursor is None:
       self.prev_cursor = cursor.clone()
@@ -252,46 +692,49 @@ class Lexer(object):
     if self.lastLine != cursor.row:
       if self.newLineEvent:
         cursor, next_char_override = self.newLineEvent(cursor, text_buffer)
-        lexLogger.debug(("New line adjust cursor", cursor))
+        if trace:
+          lexLogger.debug(("New line adjust cursor", cursor))
 
     self.lastLine = cursor.row
     next_char = text_buffer.getChar(cursor)
     if next_char_override:
       next_char = next_char_override
 
+    if self.metrics is not None:
+      self.metrics.charsLexed += 1
     tokens = []
     running = True
     while running:
-      def transition():
-        transitions = self.transitions[self.state]
-        for transition_data in transitions:
-          if transition_data[0](next_char):
-            lexLogger.debug(("Transition success", transition_data))
-            lex_return = transition_data[1](
-                self.start_cursor.clone(),
-                cursor.clone(),
-                self.prev_cursor.clone(), text_buffer)
-            return lex_return
-      lex_return = transition()
-      if lex_return:
+      action = self.findAction(next_char)
+      if action:
+        lex_return = action(self.start_cursor, cursor, self.prev_cursor, text_buffer)
         if len(lex_return.tokens) > 0:
-          lexLogger.info(("Created token", lex_return.tokens))
+          if trace:
+            lexLogger.info(("Created token", lex_return.tokens))
           tokens.extend(lex_return.tokens)
-        if self.start_cursor != lex_return.newStartPos:
-          lexLogger.debug(("New start cursor", self.start_cursor, " => ", lex_return.newStartPos))
-          self.start_cursor = lex_return.newStartPos
+        new_start_pos = lex_return.newStartPos
+        if self.start_cursor != new_start_pos:
+          if trace:
+            lexLogger.debug(("New start cursor", self.start_cursor, " => ", new_start_pos))
+          if new_start_pos is cursor or new_start_pos is self.prev_cursor:
+            # Both keep moving after this call
+            new_start_pos = new_start_pos.clone()
+          self.start_cursor = new_start_pos
         if lex_return.newState:
           if lex_return.newState != self.state:
-            lexLogger.info(("Changing state", self.state, " => ", lex_return.newState, "Cursor", self.start_cursor))
+            if trace:
+              lexLogger.info(("Changing state", self.state, " => ", lex_return.newState, "Cursor", self.start_cursor))
             self.state = lex_return.newState
         if lex_return.transition:
           running = False
-        else:
+        elif trace:
           lexLogger.debug("Continuing state transitions")
       else:
         running = False
 
     self.prev_cursor.copy(cursor)
+    if self.metrics is not None:
+      self.metrics.tokens += len(tokens)
     return tokens, cursor
 
 def addParserRule(transition_map, current_state, next_token_state, func):
@@ -299,8 +742,16 @@ def addParserRule(transition_map, current_state, next_token_state, func):
     transition_map[current_state] = {}
   transition_map[current_state][next_token_state] = func
 
-def parseText(lexer, parser, text_buffer, cursor, forward=True):
+def parseText(lexer, parser, text_buffer, cursor, forward=True, metrics = None):
+  """
+  Lexes text_buffer from cursor one char at a time feeding the tokens to parser until it terminates.
+  A ParseMetrics given is handed to the lexer and the parser as well, with the time spent in the "lex"
+  and "parse" phases added
+  """
   parserLogger.info(("parseText BEGIN", cursor, "Forward:", forward))
+  if metrics is not None:
+    lexer.metrics = metrics
+    parser.metrics = metrics
   iterator_cursor = cursor.clone()
   terminate = False
   first_run = True
@@ -312,11 +763,53 @@ def parseText(lexer, parser, text_buffer, cursor, forward=True):
         iterator_cursor.moveForward(text_buffer)
       else:
         iterator_cursor.moveBack(text_buffer)
-    new_tokens, iterator_cursor = lexer.lex(iterator_cursor, text_buffer)
-    for token in new_tokens:
+    if metrics is None:
+      new_tokens, iterator_cursor = lexer.lex(iterator_cursor, text_buffer)
+      for token in new_tokens:
+        terminate = parser.parseToken(token)
+        if terminate:
+          break
+    else:
+      start = time.time()
+      new_tokens, iterator_cursor = lexer.lex(iterator_cursor, text_buffer)
+      lexed = time.time()
+      metrics.addTime("lex", lexed - start)
+      for token in new_tokens:
+        terminate = parser.parseToken(token)
+        if terminate:
+          break
+      metrics.addTime("parse", time.time() - lexed)
+  parserLogger.info(("parseText END Result", parser.span))
+  return parser.span
+
+
+def parseTokens(parser, tokens, metrics = None):
+  """
+  Counterpart of parseText for token sources that produce tokens without a Lexer,
+  feeds the tokens to the parser until it terminates.
+  metrics defaults to the one of parser, tokens taken are counted in it with the time spent in the
+  "tokens" (taking tokens from the source) and "parse" phases
+  """
+  parserLogger.info(("parseTokens BEGIN",))
+  if metrics is None:
+    metrics = parser.metrics
+  if metrics is None:
+    for token in tokens:
+      if parser.parseToken(token):
+        break
+  else:
+    tokens = iter(tokens)
+    while True:
+      start = time.time()
+      token = next(tokens, None)
+      taken = time.time()
+      metrics.addTime("tokens", taken - start)
+      if token is None:
+        break
+      metrics.tokens += 1
       terminate = parser.parseToken(token)
+      metrics.addTime("parse", time.time() - taken)
       if terminate:
         break
-  parserLogger.info(("parseText END Result", parser.span))
+  parserLogger.info(("parseTokens END Result", parser.span))
   return parser.span
-
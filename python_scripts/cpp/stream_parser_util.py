@@ -1,6 +1,9 @@
 from stream_parser import *
-from stream_lexer_cpp import CppStreamLexer, isSymbol, isId
+from line_lexer_cpp import LineTokenStream
+from bracket_index import BracketScanner, parseTokensSkipPairs
+from token_store import headTokenTypes
 import logging
+import time
 logging.basicConfig(stream=sys.stdout)
 logger = logging.getLogger(__name__)
 
@@ -14,48 +17,117 @@ def addParserRuleDefault(token_class, transition_map, state, transition, ignore=
     if ignore is None or token not in ignore:
       addParserRule(transition_map, state, token, transition)
 
-def reverseToTokenBountry(cursor, text_buffer, same_cursor_start = False):
-  # Check for line comments
-  line = text_buffer.getLine(cursor.row)
-  if line is None:
+class SharedTokens(object):
+  """
+  Token stream and bracket scanner of a buffer, synced with the buffer once and shared by the text
+  object calls of a batch instead of once per call. Nothing is lexed up front, only the lines the calls
+  reach
+  """
+  def __init__(self, text_buffer, allow_space_token = False):
+    self.textBuffer = text_buffer
+    self.tokenStream = LineTokenStream(text_buffer, allow_space_token = allow_space_token)
+    self.brackets = BracketScanner(text_buffer, self.tokenStream)
+
+  def tokenHead(self, cursor):
+    """
+    reverseToTokenBountry through the shared token stream
+    """
+    return reverseToTokenBountry(cursor, self.textBuffer, token_stream = self.tokenStream)
+
+  def headKey(self, cursor):
+    """
+    Key of the cursors a text object gives the same span at, the ones on the same id or keyword
+    """
+    head = self.tokenHead(cursor)
+    return (head.row, head.column)
+
+def resolveMany(cursors, resolve, key):
+  """
+  resolve(cursor) of each of cursors in input order. Cursors of the same key(cursor) share one call,
+  each getting its own copy of the span
+  """
+  spans = {}
+  results = []
+  for cursor in cursors:
+    cursor_key = key(cursor)
+    if cursor_key in spans:
+      span = spans[cursor_key]
+    else:
+      span = resolve(cursor)
+      spans[cursor_key] = span
+    results.append(span.clone() if span is not None else None)
+  return results
+
+def reverseToTokenBountry(cursor, text_buffer, same_cursor_start = False, token_stream = None):
+  """
+  token_stream is the LineTokenStream of text_buffer the caller parses with, a new one is synced with
+  the buffer otherwise
+  """
+  if text_buffer.getLine(cursor.row) is None:
     return cursor
-  slash_index = line.find("//")
-  if slash_index != -1:
-    return Cursor(cursor.row, slash_index)
-
-  # Seek cursor to head of token so lexer could grab keywords or -> token
-  cursor = cursor.clone()
-  char = text_buffer.getChar(cursor)
-  if char is not None:
-    if isId(char):
-      # We want cursor to be at the head of the id
-      cursor_it = cursor.clone()
-      while char is not None and isId(char):
-        cursor.copy(cursor_it)
-        cursor_it.moveBack(text_buffer)
-        char = text_buffer.getChar(cursor_it)
-    elif ">" == char:
-      prev_cursor = cursor.clone()
-      prev_cursor.moveBack(text_buffer)
-      prev_char = text_buffer.getChar(prev_cursor)
-      if prev_char == "-":
-        cursor = prev_cursor
-  return cursor
+
+  # Seek cursor to head of token so lexer could grab keywords or -> token. Those never span lines, so
+  # the line of the cursor is lexed rather than the whole buffer
+  if token_stream is None:
+    token_stream = LineTokenStream(text_buffer)
+  columns, _ = token_stream.lineColumns(cursor.row)
+  for start, end, token_type in columns:
+    if start <= cursor.column < end:
+      if token_type in headTokenTypes:
+        return Cursor(cursor.row, start)
+      break
+  return cursor.clone()
 
 def runCppParser(parser_forward, parser_backward, cursor, text_buffer, allow_space_token = False,
-    same_cursor_start = False):
+    same_cursor_start = False, forward_skip_states = None, backward_skip_states = None,
+    shared_tokens = None):
   """
   Runs the parser both ways using the cpp stream lexer and returns the forward and backward spans
+
+  With skip_states given, the parser of that direction jumps over bracket pairs found by a
+  BracketScanner, see parseTokensSkipPairs. The time to get there is added to the "setup" phase
+  of the metrics of parser_forward. shared_tokens built with the same allow_space_token is used instead
+  of syncing the stream and indices with the buffer again
   """
-  # Seek cursor to head of token so lexer could grab keywords or -> token
-  cursor = reverseToTokenBountry(cursor, text_buffer)
+  metrics = parser_forward.metrics
+  if metrics is not None:
+    start = time.time()
+  # Lines are lexed once and replayed for both directions
+  brackets = None
+  if shared_tokens is None:
+    token_stream = LineTokenStream(text_buffer, allow_space_token = allow_space_token, metrics = metrics)
+    # Seek cursor to head of token so lexer could grab keywords or -> token
+    cursor = reverseToTokenBountry(cursor, text_buffer, token_stream = token_stream)
+    if forward_skip_states or backward_skip_states:
+      brackets = BracketScanner(text_buffer, token_stream)
+  else:
+    token_stream = shared_tokens.tokenStream
+    cursor = shared_tokens.tokenHead(cursor)
+    if forward_skip_states or backward_skip_states:
+      brackets = shared_tokens.brackets
   back_cursor = cursor.clone()
   if not same_cursor_start:
     back_cursor.moveBack(text_buffer)
+  if metrics is not None:
+    metrics.addTime("setup", time.time() - start)
+  if backward_skip_states:
+    backward_span = parseTokensSkipPairs(parser_backward, token_stream, back_cursor, False,
+        backward_skip_states, brackets)
+  else:
+    backward_span = parseTokens(parser_backward, token_stream.backward(back_cursor))
+  if forward_skip_states:
+    forward_span = parseTokensSkipPairs(parser_forward, token_stream, cursor, True,
+        forward_skip_states, brackets)
+  else:
+    forward_span = parseTokens(parser_forward, token_stream.forward(cursor))
+  return forward_span, backward_span
 
-  lexer_backward = CppStreamLexer(forward_direction = False, allow_space_token = allow_space_token)
-  backward_span = parseText(lexer_backward, parser_backward, text_buffer, back_cursor, False)
+# Buffer the text objects rehearse their first invocation on
+warmText = "void f(int a) { g(a); }"
 
-  lexer_forward = CppStreamLexer(forward_direction = True, allow_space_token = allow_space_token)
-  forward_span = parseText(lexer_forward, parser_forward, text_buffer, cursor, True)
-  return forward_span, backward_span
+def warmTextObject(main):
+  """
+  Runs the main of a text object once over warmText, so what it builds on first use is built before
+  the first invocation
+  """
+  main(Cursor(0, 16), Buffer(warmText))
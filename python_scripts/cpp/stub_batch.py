@@ -0,0 +1,314 @@
+"""
+Constructor and operator== stubs of every struct and class of a set of headers
+
+  python stub_batch.py --processes 4 include/ other/header.h
+"""
+import argparse
+import collections
+import logging
+import multiprocessing
+import sys
+import os
+from stream_parser import FlatBuffer
+from stream_lexer_cpp import TokenType
+from token_store import TokenStore
+import cpp_parser
+import cpp_parser_fast
+import ctor_stub
+import stub_opeq
+
+logging.basicConfig()
+default_logger = logging.getLogger(__name__)
+
+headerExtensions = (".h", ".hh", ".hpp", ".hxx")
+
+# Tokens allowed between the name of a type and its {, base classes and template arguments
+headTokenTypes = set([TokenType.kId, TokenType.kColon, TokenType.kComma, TokenType.kLeftAngled,
+    TokenType.kRightAngled, TokenType.kOther, TokenType.kStar])
+
+# Words a type name is never preceded by
+kNotTypeHeads = set(["enum", "friend"])
+
+# First words of member statements that aren't data members of each instance
+kSkippedWords = set(["static", "using", "typedef", "friend", "enum", "template", "virtual", "struct",
+    "class", "union", "constexpr", "explicit", "operator", "inline"])
+
+kAccessWords = set(["public", "private", "protected"])
+
+kDroppedWords = set(["mutable"])
+
+# Member statements with these are functions or arrays, which the stubs leave out
+kSkippedTokenTypes = set([TokenType.kLeftParen, TokenType.kLeftBracket, TokenType.kLeftBrace])
+
+TypeBlock = collections.namedtuple("TypeBlock", ["name", "row", "members"])
+
+# skipped holds the data members the parsers didn't take, left out of ctor and opEq
+TypeStubs = collections.namedtuple("TypeStubs", ["name", "row", "ctor", "opEq", "skipped"])
+
+class TypeBlockFinder(object):
+  """
+  struct and class bodies of a text found on its tokens, comments and strings left out. Types nested in
+  other types are named with the scopes of the types around them
+  """
+  def __init__(self, text):
+    self.text = text
+    self.store = TokenStore(FlatBuffer(text))
+
+  def tokenText(self, index):
+    return self.text[self.store.starts[index]:self.store.ends[index]]
+
+  def isWord(self, index, words):
+    return self.store.tokenType(index) == TokenType.kId and self.tokenText(index) in words
+
+  def bodyStart(self, index):
+    """
+    Index of the { of the body of the type named at index, -1 for declarations and anything else than a
+    type head
+    """
+    angles = 0
+    for index in xrange(index + 1, len(self.store)):
+      token_type = self.store.tokenType(index)
+      if token_type == TokenType.kLeftBrace:
+        return index
+      if token_type not in headTokenTypes:
+        return -1
+      if token_type == TokenType.kLeftAngled:
+        angles += 1
+      elif token_type == TokenType.kRightAngled:
+        angles -= 1
+        # The > closing the template parameters a class T is in
+        if angles < 0:
+          return -1
+    return -1
+
+  def bodyEnd(self, index):
+    """
+    Index of the } closing the { at index, len(store) when it is never closed
+    """
+    depth = 0
+    for index in xrange(index, len(self.store)):
+      token_type = self.store.tokenType(index)
+      if token_type == TokenType.kLeftBrace:
+        depth += 1
+      elif token_type == TokenType.kRightBrace:
+        depth -= 1
+        if depth == 0:
+          return index
+    return len(self.store)
+
+  def continuesInitializers(self, index, end):
+    return index < end and self.store.tokenType(index) in (TokenType.kComma, TokenType.kLeftBrace)
+
+  def statements(self, start, end):
+    """
+    (first, last) token indices of the statements between start and end at the depth of start, without
+    their ; and access labels. Function bodies end their statement
+    """
+    first = start
+    depth = 0
+    has_paren = False
+    index = start
+    while index < end:
+      token_type = self.store.tokenType(index)
+      if depth == 0 and index == first and index + 1 < end and self.isWord(index, kAccessWords) and \
+          self.store.tokenType(index + 1) == TokenType.kColon:
+        index += 2
+        first = index
+        continue
+      if token_type in (TokenType.kLeftBrace, TokenType.kLeftParen, TokenType.kLeftBracket):
+        has_paren = has_paren or (depth == 0 and token_type == TokenType.kLeftParen)
+        depth += 1
+      elif token_type in (TokenType.kRightBrace, TokenType.kRightParen, TokenType.kRightBracket):
+        depth -= 1
+        # Braces of the member initializers of a constructor go on up to its body
+        if depth == 0 and token_type == TokenType.kRightBrace and has_paren and \
+            not self.continuesInitializers(index + 1, end):
+          yield first, index
+          first = index + 1
+          has_paren = False
+      elif depth == 0 and token_type == TokenType.kSemiColon:
+        if index > first:
+          yield first, index - 1
+        first = index + 1
+        has_paren = False
+      index += 1
+
+  def memberText(self, first, last):
+    """
+    Declaration of the data member of statement first..last without its initializer, None when the
+    statement isn't one
+    """
+    if self.isWord(first, kSkippedWords):
+      return None
+    while first <= last and self.isWord(first, kDroppedWords):
+      first += 1
+    end = last + 1
+    for index in xrange(first, last + 1):
+      token_type = self.store.tokenType(index)
+      if token_type == TokenType.kLeftBrace and index > first:
+        # A brace initializer
+        end = index
+        break
+      if token_type in kSkippedTokenTypes:
+        return None
+      if self.tokenText(index) == "=":
+        end = index
+        break
+      if token_type == TokenType.kColon:
+        # Scopes are two colons, a lone one is a bit field
+        is_scope = (index > first and self.store.tokenType(index - 1) == TokenType.kColon) or \
+            (index < last and self.store.tokenType(index + 1) == TokenType.kColon)
+        if not is_scope:
+          return None
+    if end <= first:
+      return None
+    return self.text[self.store.starts[first]:self.store.ends[end - 1]] + ";"
+
+  def blocks(self):
+    """
+    TypeBlock of every struct and class with a body, in the order their names appear
+    """
+    scopes = []
+    index = 0
+    store = self.store
+    while index + 1 < len(store):
+      if self.isWord(index, ("struct", "class")) and store.tokenType(index + 1) == TokenType.kId and \
+          (index == 0 or not self.isWord(index - 1, kNotTypeHeads)):
+        start = self.bodyStart(index + 1)
+        if start != -1:
+          end = self.bodyEnd(start)
+          while scopes and scopes[-1][1] < start:
+            scopes.pop()
+          name = "::".join([x[0] for x in scopes] + [self.tokenText(index + 1)])
+          members = [self.memberText(first, last) for first, last in self.statements(start + 1, end)]
+          row = store.toCursor(store.starts[index]).row
+          yield TypeBlock(name, row, [x for x in members if x is not None])
+          scopes.append((name, end))
+      index += 1
+
+def findTypeBlocks(text):
+  return list(TypeBlockFinder(text).blocks())
+
+# Parser of the members the descent parser doesn't take, one per process
+declarationParser = None
+
+def parseMember(member):
+  """
+  Variables declared by member, None when the grammar doesn't take it
+  """
+  global declarationParser
+  tokens = cpp_parser_fast.scanDeclarations(member)
+  if tokens is None:
+    return None
+  try:
+    return cpp_parser_fast.DescentParser(*tokens).parseStatements()
+  except Exception:
+    pass
+  if declarationParser is None:
+    declarationParser = cpp_parser.DeclarationParser()
+  try:
+    return declarationParser.parse(member)
+  except Exception:
+    return None
+
+def typeStubs(block):
+  """
+  TypeStubs of block, None when it has no data member. ctor and opEq are None when none of its members
+  could be parsed
+  """
+  var_list = []
+  skipped = []
+  for member in block.members:
+    variables = parseMember(member)
+    if variables:
+      var_list.extend(variables)
+    else:
+      skipped.append(member)
+  if not var_list:
+    if not skipped:
+      return None
+    return TypeStubs(block.name, block.row, None, None, skipped)
+  short_name = block.name.split("::")[-1]
+  ctor = short_name + ctor_stub.ctorStub(var_list) + "\n{\n}"
+  return TypeStubs(block.name, block.row, ctor, stub_opeq.opEqStub(var_list, block.name), skipped)
+
+def stubText(text):
+  """
+  TypeStubs of every struct and class of text with a data member
+  """
+  stubs = [typeStubs(x) for x in TypeBlockFinder(text).blocks()]
+  return [x for x in stubs if x is not None]
+
+def stubFile(path):
+  """
+  (path, TypeStubs list) of the header at path, the list is None when it can't be read
+  """
+  try:
+    with open(path) as f:
+      text = f.read()
+  except (IOError, OSError):
+    return path, None
+  return path, stubText(text)
+
+def headerPaths(paths):
+  """
+  paths with the directories among them replaced by the headers under them
+  """
+  for path in paths:
+    if not os.path.isdir(path):
+      yield path
+      continue
+    for directory, _, names in sorted(os.walk(path)):
+      for name in sorted(names):
+        if name.endswith(headerExtensions):
+          yield os.path.join(directory, name)
+
+def stubFiles(paths, processes = None):
+  """
+  Yields stubFile of each of paths as soon as it is done, files spread over a pool of processes
+  (processes = 1 stubs them here, in order)
+  """
+  if processes == 1:
+    for path in paths:
+      yield stubFile(path)
+    return
+  pool = multiprocessing.Pool(processes)
+  try:
+    for result in pool.imap_unordered(stubFile, paths):
+      yield result
+    pool.close()
+  finally:
+    pool.terminate()
+    pool.join()
+
+def formatStubs(path, stubs):
+  """
+  Stubs of a header, each under a comment with its type and position. The members a stub leaves out
+  are listed as "// skipped: <member>" comments, so a missing member is seen before the stub is used
+  """
+  blocks = []
+  for stub in stubs:
+    lines = ["// {} {}:{}".format(stub.name, path, stub.row + 1)]
+    lines.extend("// skipped: " + x for x in stub.skipped)
+    if stub.ctor is not None:
+      lines.extend([stub.ctor, stub.opEq])
+    blocks.append("\n".join(lines) + "\n")
+  return "\n".join(blocks)
+
+def main(paths, processes = None, out = sys.stdout, logger = None):
+  if logger is None:
+    logger = default_logger
+  for path, stubs in stubFiles(list(headerPaths(paths)), processes):
+    if stubs is None:
+      logger.error("Can't read " + path)
+      continue
+    if stubs:
+      out.write(formatStubs(path, stubs) + "\n")
+      out.flush()
+
+if __name__ == "__main__":
+  arg_parser = argparse.ArgumentParser(description='Constructor and operator== stubs of every type of headers')
+  arg_parser.add_argument('paths', nargs='+', help='Headers and directories of headers')
+  arg_parser.add_argument('--processes', type=int, default=None, help='Size of the process pool')
+  args = arg_parser.parse_args()
+  main(args.paths, args.processes)
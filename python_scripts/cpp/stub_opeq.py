@@ -1,5 +1,6 @@
 import argparse
-import cpp_parser
+import cpp_parser_fast
+from lru_cache import LruCache
 import re
 import sys
 import logging
@@ -8,26 +9,44 @@ def convertVar(cppVar):
   name = cppVar.name
   return "  if (a.{var} != b.{var}) {{ return false; }}".format(var = name)
 
-def main(text, debug = False, logger = None):
-  if logger is None:
-    logging.basicConfig()
-    logger = logging.getLogger(__name__)
-  var_list = cpp_parser.parseVariables(text, debug = debug, logger = logger)
-  if var_list is None:
-    logger.error("Error parsing text")
-    return
+def opEqStub(var_list, type_name = "VarType"):
   if_conds = "\n".join(map(lambda x: convertVar(x), var_list))
   template = \
-"""bool operator==(const VarType& a, const VarType& b)
+"""bool operator==(const {type_name}& a, const {type_name}& b)
 {{
 {if_conds}
   return true;
 }}
-bool operator!=(const VarType& a, const VarType& b)
+bool operator!=(const {type_name}& a, const {type_name}& b)
 {{
   return !(a == b);
 }}"""
-  return template.format(if_conds = if_conds)
+  return template.format(if_conds = if_conds, type_name = type_name)
+
+kDefaultStubCacheSize = 128
+
+# Stubs by normalized member text
+stubCache = LruCache(kDefaultStubCacheSize)
+
+def main(text, debug = False, logger = None):
+  key = cpp_parser_fast.normalizeDeclarations(text)
+  if not debug:
+    ret = stubCache.get(key)
+    if ret is not None:
+      return ret
+  if logger is None:
+    logging.basicConfig()
+    logger = logging.getLogger(__name__)
+  var_list = cpp_parser_fast.parseVariables(text, debug = debug, logger = logger)
+  if var_list is None:
+    logger.error("Error parsing text")
+    return
+  ret = opEqStub(var_list)
+  stubCache.put(key, ret)
+  return ret
+
+def warm():
+  cpp_parser_fast.warm()
 
 if __name__ == "__main__":
   arg_parser = argparse.ArgumentParser(description='', add_help=False)
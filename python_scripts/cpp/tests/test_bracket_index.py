@@ -0,0 +1,204 @@
+import unittest
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from bracket_index import *
+from line_lexer_cpp import LineTokenStream
+import text_object_function
+import text_object_param
+
+sampleTexts = [
+  "int test() { if (cond) {all words;} } void main()",
+  "a[(b)] = {c[0], {d}};\n(x\n[y]\n)",
+  "f(\")\" /* ( */ , g) // )\n{ '}' }",
+  "unmatched ( { [ x ] }",
+  "extra ) ] } x ( )",
+  "",
+]
+
+def bruteEnclosing(text_buffer, cursor, kind):
+  """
+  Innermost pair around cursor by scanning the tokens, like the text object parsers do
+  """
+  close_kind = {
+    TokenType.kLeftParen: TokenType.kRightParen,
+    TokenType.kLeftBrace: TokenType.kRightBrace,
+    TokenType.kLeftBracket: TokenType.kRightBracket,
+  }[kind]
+  tokens = [x for x in LineTokenStream(text_buffer).forward(Cursor(0, 0)) if x.tokenType in (kind, close_kind)]
+  pairs = []
+  stack = []
+  for token in tokens:
+    if token.tokenType == kind:
+      stack.append(token.span.start)
+    elif stack:
+      pairs.append(TextSpan(stack.pop(), token.span.start))
+  around = [x for x in pairs if x.start <= cursor and cursor <= x.end]
+  if not around:
+    return None
+  return max(around, key = lambda x: (x.start.row, x.start.column))
+
+class TestBracketIndex(unittest.TestCase):
+  def setUp(self):
+    pass
+
+  def test_partners(self):
+    text_buffer = Buffer("f(a[1], {b})")
+    index = BracketIndex(text_buffer)
+    self.assertEqual(index.partner(Cursor(0, 1)), Cursor(0, 11))
+    self.assertEqual(index.partner(Cursor(0, 11)), Cursor(0, 1))
+    self.assertEqual(index.partner(Cursor(0, 3)), Cursor(0, 5))
+    self.assertEqual(index.partner(Cursor(0, 10)), Cursor(0, 8))
+    self.assertIsNone(index.partner(Cursor(0, 2)))
+
+  def test_skipsStringsAndComments(self):
+    text_buffer = Buffer("f(\")\" /* ) */\n// )\n, g)")
+    index = BracketIndex(text_buffer)
+    self.assertEqual(index.partner(Cursor(0, 1)), Cursor(2, 3))
+    self.assertIsNone(index.partner(Cursor(0, 3)))
+
+  def test_unmatched(self):
+    text_buffer = Buffer(") (a)(")
+    index = BracketIndex(text_buffer)
+    self.assertIsNone(index.partner(Cursor(0, 0)))
+    self.assertIsNone(index.partner(Cursor(0, 5)))
+    self.assertIsNone(index.enclosingPair(Cursor(0, 6), TokenType.kLeftParen))
+
+  def test_offsets(self):
+    text_buffer = Buffer("ab\n\ncde")
+    index = BracketIndex(text_buffer)
+    for cursor in [Cursor(0, 0), Cursor(0, 2), Cursor(1, 0), Cursor(2, 1), Cursor(2, 3)]:
+      self.assertEqual(index.toCursor(index.toOffset(cursor)), cursor)
+
+  def test_offsetTypecode(self):
+    # Same as the line starts of a mapped file, so files past 2GB are indexed where they can be mapped
+    index = BracketIndex(Buffer("f(a[1], {b})"))
+    arrays = [index.lineOffsets] + index.offsets.values() + index.partners.values() + index.parents.values()
+    for offsets in arrays:
+      self.assertEqual(offsets.typecode, kOffsetTypecode)
+
+  def test_enclosingSameAsScan(self):
+    for text in sampleTexts:
+      text_buffer = Buffer(text)
+      index = BracketIndex(text_buffer)
+      for row in xrange(text_buffer.maxLines()):
+        for column in xrange(len(text_buffer.getLine(row)) + 1):
+          cursor = Cursor(row, column)
+          for kind in bracketKinds:
+            self.assertEqual(index.enclosingPair(cursor, kind), bruteEnclosing(text_buffer, cursor, kind))
+
+  def test_parentPair(self):
+    text_buffer = Buffer("{ ( { [ { } ] } }")
+    index = BracketIndex(text_buffer)
+    pair = index.enclosingPair(Cursor(0, 9), TokenType.kLeftBrace)
+    self.assertEqual(pair, TextSpan(Cursor(0, 8), Cursor(0, 10)))
+    pair = index.parentPair(pair, TokenType.kLeftBrace)
+    self.assertEqual(pair, TextSpan(Cursor(0, 4), Cursor(0, 14)))
+    pair = index.parentPair(pair, TokenType.kLeftBrace)
+    self.assertEqual(pair, TextSpan(Cursor(0, 0), Cursor(0, 16)))
+    self.assertIsNone(index.parentPair(pair, TokenType.kLeftBrace))
+
+  def test_reusedUntilChanged(self):
+    text_buffer = Buffer("{\n}")
+    index = getBracketIndex(text_buffer)
+    self.assertIs(getBracketIndex(text_buffer), index)
+    text_buffer.text[1] = "x"
+    changed_index = getBracketIndex(text_buffer)
+    self.assertIsNot(changed_index, index)
+    self.assertIsNone(changed_index.partner(Cursor(0, 0)))
+    text_buffer.text.append("}")
+    self.assertEqual(getBracketIndex(text_buffer).partner(Cursor(0, 0)), Cursor(2, 0))
+
+  def test_indexBuildsCounted(self):
+    text_buffer = Buffer("{\n}")
+    metrics = ParseMetrics()
+    getBracketIndex(text_buffer, LineTokenStream(text_buffer, metrics = metrics))
+    getBracketIndex(text_buffer, LineTokenStream(text_buffer, metrics = metrics))
+    self.assertEqual(metrics.indexBuilds, 1)
+    self.assertEqual(metrics.lineCacheMisses, 2)
+
+  def test_functionParseSameWithIndex(self):
+    text = "int a() { if (x) { b(); } }\nvoid c(int (*f)(int)) const { {} }"
+    text_buffer = Buffer(text)
+    token_stream = LineTokenStream(text_buffer)
+    index = getBracketIndex(text_buffer, token_stream)
+    for row in xrange(text_buffer.maxLines()):
+      for column in xrange(len(text_buffer.getLine(row))):
+        cursor = Cursor(row, column)
+        for forward in [True, False]:
+          expected, _, expected_parser = text_object_function.parse(text_buffer, cursor, forward, token_stream)
+          span, _, parser = text_object_function.parse(text_buffer, cursor, forward, token_stream, index)
+          self.assertEqual(span, expected)
+          self.assertEqual(parser.state, expected_parser.state)
+
+  def test_paramSkipsPairs(self):
+    text_buffer = Buffer("f(a, g(b, [c, d], {e, f}), h)")
+    self.assertEqual(text_object_param.main(Cursor(0, 5), text_buffer),
+        TextSpan(Cursor(0, 5), Cursor(0, 25)))
+
+class RowsBuffer(Buffer):
+  def __init__(self, text):
+    Buffer.__init__(self, text)
+    self.rows = set()
+
+  def getLine(self, row):
+    self.rows.add(row)
+    return Buffer.getLine(self, row)
+
+class TestBracketScanner(unittest.TestCase):
+  def setUp(self):
+    pass
+
+  def test_partnersSameAsIndex(self):
+    for text in sampleTexts:
+      text_buffer = Buffer(text)
+      index = BracketIndex(text_buffer)
+      shared = BracketScanner(text_buffer)
+      for row in xrange(text_buffer.maxLines()):
+        for column in xrange(len(text_buffer.getLine(row)) + 1):
+          cursor = Cursor(row, column)
+          expected = index.partner(cursor)
+          self.assertEqual(BracketScanner(text_buffer).partner(cursor), expected, (text, cursor))
+          self.assertEqual(shared.partner(cursor), expected, (text, cursor))
+
+  def test_enclosingSameAsIndex(self):
+    for text in sampleTexts:
+      text_buffer = Buffer(text)
+      index = BracketIndex(text_buffer)
+      shared = BracketScanner(text_buffer)
+      for row in xrange(text_buffer.maxLines()):
+        for column in xrange(len(text_buffer.getLine(row)) + 1):
+          cursor = Cursor(row, column)
+          for kind in bracketKinds:
+            expected = index.enclosingPair(cursor, kind)
+            self.assertEqual(BracketScanner(text_buffer).enclosingPair(cursor, kind), expected, (text, cursor))
+            self.assertEqual(shared.enclosingPair(cursor, kind), expected, (text, cursor))
+
+  def test_parentPairSameAsIndex(self):
+    text_buffer = Buffer("{ ( { [ { } ] } } {\n{ { } }\n} ) {")
+    index = BracketIndex(text_buffer)
+    scanner = BracketScanner(text_buffer)
+    for row in xrange(text_buffer.maxLines()):
+      for column in xrange(len(text_buffer.getLine(row)) + 1):
+        pair = index.enclosingPair(Cursor(row, column), TokenType.kLeftBrace)
+        while pair is not None:
+          parent = index.parentPair(pair, TokenType.kLeftBrace)
+          self.assertEqual(scanner.parentPair(pair, TokenType.kLeftBrace), parent)
+          pair = parent
+
+  def test_readsNearRows(self):
+    lines = ["int f{}() {{ return {}; }}".format(x, x) for x in xrange(3000)]
+    lines[1500:1500] = ["int test() {", "  if (a) {", "    all words;", "  }", "}"]
+    text_buffer = RowsBuffer("\n".join(lines))
+    scanner = BracketScanner(text_buffer)
+    pair = scanner.enclosingPair(Cursor(1502, 4), TokenType.kLeftBrace)
+    self.assertEqual(pair, TextSpan(Cursor(1501, 9), Cursor(1503, 2)))
+    self.assertEqual(scanner.parentPair(pair, TokenType.kLeftBrace), TextSpan(Cursor(1500, 11), Cursor(1504, 0)))
+    self.assertLess(len(text_buffer.rows), 500)
+    self.assertEqual(text_object_function.main(Cursor(1502, 4), text_buffer),
+        TextSpan(Cursor(1500, 0), Cursor(1504, 1)))
+    self.assertLess(len(text_buffer.rows), 500)
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import random
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from cpp_parser_fast import *
+import test_parser
+
+class TestDescentParser(test_parser.TestParser):
+  """
+  The cpp_parser cases through the descent parser alone
+  """
+  def runTest(self, data, expected_list):
+    result = DescentParser(*scanDeclarations(data)).parseStatements()
+    self.assertListEqual(result, expected_list)
+
+class TestParserFast(unittest.TestCase):
+  vocabulary = ["int", "a", "std", "const", "*", "&", "::", "<", ">", ",", "=", "3", ";", "\n", "// c\n"]
+
+  def plyResult(self, declaration_parser, text):
+    try:
+      return declaration_parser.parse(text)
+    except Exception as e:
+      return type(e)
+
+  def test_sameAsPly(self):
+    rng = random.Random(0)
+    declaration_parser = cpp_parser.DeclarationParser()
+    taken = 0
+    for x in xrange(5000):
+      text = " ".join(rng.choice(self.vocabulary) for y in xrange(rng.randint(1, 10)))
+      expected = self.plyResult(declaration_parser, text)
+      try:
+        result = DescentParser(*scanDeclarations(text)).parseStatements()
+      except Exception:
+        # Handed to cpp_parser, only text it doesn't take either
+        self.assertFalse(isinstance(expected, list), text)
+        continue
+      taken += 1
+      self.assertEqual(result, expected, text)
+      self.assertEqual(repr(result), repr(expected), text)
+    self.assertGreater(taken, 0)
+
+  def test_scan(self):
+    kinds, values = scanDeclarations("const std::map<int, T*>& a_ = 10; // x\n")
+    self.assertListEqual(kinds, ["KEY_CONST", "ID", "SCOPE", "ID", "LANGLED", "ID", ",", "ID", "*", "RANGLED",
+        "&", "ID", "EQUAL", "NUMBER", ";", "EOF"])
+    self.assertEqual(values[-3], 10)
+    self.assertIsNone(scanDeclarations("int $a;"))
+
+  def test_fallback(self):
+    sys.stdout, stdout = open(os.devnull, "w"), sys.stdout
+    try:
+      for text in ["int ;", "int $a;", "a b c;"]:
+        self.assertEqual(parseVariables(text), cpp_parser.parseVariables(text))
+    finally:
+      sys.stdout.close()
+      sys.stdout = stdout
+    self.assertEqual(parseVariables("Type c = 3;"),
+        [CppVariable(CppType("Type"), "c", defaultValue = 3)])
+
+class TestParseCache(unittest.TestCase):
+  def setUp(self):
+    parseCache.clear()
+
+  def tearDown(self):
+    parseCache.resize(kDefaultParseCacheSize)
+
+  def test_normalized(self):
+    first = parseVariables("int  a;\n\n  std::string b_; ")
+    self.assertEqual((parseCache.hits, parseCache.misses), (0, 1))
+    self.assertEqual(parseVariables("int a;\nstd::string   b_;"), first)
+    self.assertEqual((parseCache.hits, parseCache.misses), (1, 1))
+    parseVariables("int a; std::string b_;")
+    self.assertEqual(parseCache.misses, 2)
+
+  def test_resultsNotShared(self):
+    first = parseVariables("const Type* a;")
+    first[0].getType().setReference()
+    first.append(None)
+    second = parseVariables("const Type* a;")
+    self.assertEqual(parseCache.hits, 1)
+    self.assertEqual(second, [CppVariable(CppType(CppType("Type", const = True), pointer = True), "a")])
+    self.assertIsNot(parseVariables("const Type* a;")[0], second[0])
+
+  def test_recoveredNotKept(self):
+    sys.stdout, stdout = open(os.devnull, "w"), sys.stdout
+    try:
+      for text in ["int $a;", "int a; b c d; int e;"]:
+        self.assertIsNotNone(parseVariables(text))
+        self.assertNotIn(text, parseCache)
+    finally:
+      sys.stdout.close()
+      sys.stdout = stdout
+
+  def test_resize(self):
+    parseCache.resize(2)
+    for text in ["int a;", "int b;", "int c;", "int a;"]:
+      parseVariables(text)
+    self.assertEqual(len(parseCache), 2)
+    self.assertEqual(parseCache.hits, 0)
+    self.assertIn("int a;", parseCache)
+
+if __name__ == '__main__':
+  unittest.main()
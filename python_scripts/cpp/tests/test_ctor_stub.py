@@ -4,6 +4,7 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import ctor_stub
+import stub_opeq
 
 class TestCtorStub(unittest.TestCase):
   def setUp(self):
@@ -54,5 +55,14 @@ class TestCtorStub(unittest.TestCase):
   type1_(type1)"""
     self.runTest(data, expected)
 
+  def test_cached(self):
+    for module in [ctor_stub, stub_opeq]:
+      module.stubCache.clear()
+      first = module.main("int a_;\n  Object  b_;")
+      self.assertEqual(module.main("int a_;\nObject b_;  "), first)
+      self.assertEqual((module.stubCache.hits, module.stubCache.misses), (1, 1))
+      self.assertNotEqual(module.main("int a_;"), first)
+      self.assertEqual(module.stubCache.misses, 2)
+
 if __name__ == '__main__':
   unittest.main()
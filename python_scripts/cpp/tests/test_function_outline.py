@@ -0,0 +1,78 @@
+import unittest
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from function_outline import *
+
+sampleText = """#include "header"
+namespace space {
+int first(int a) { if (a) { return 1; } return 0; }
+class Widget {
+  void member() const {
+    auto f = [](int x) { return x; };
+  }
+  int value;
+};
+}
+struct Plain { int x; };
+const int& Class::scoped<int>(
+    int a,
+    int b)
+{
+  switch (a) { case 1: { b; } }
+}
+void main();"""
+
+class TestFunctionOutline(unittest.TestCase):
+  def setUp(self):
+    self.textBuffer = Buffer(sampleText)
+    self.outline = FunctionOutline(self.textBuffer)
+
+  def test_names(self):
+    names = [self.textBuffer.getSpan(self.outline.nameSpan(x)) for x in xrange(len(self.outline))]
+    self.assertListEqual(names, ["first", "member", "scoped"])
+
+  def test_sameSpansAsTextObject(self):
+    for index in xrange(len(self.outline)):
+      body = self.outline.bodySpan(index)
+      self.assertEqual(self.textBuffer.getChar(body.start), "{")
+      span = text_object_function.main(body.start.clone(), self.textBuffer)
+      self.assertEqual(self.outline.span(index), span)
+    self.assertEqual(self.outline.span(2), TextSpan(Cursor(11, 0), Cursor(16, 1)))
+
+  def test_indexAt(self):
+    self.assertEqual(self.outline.indexAt(Cursor(2, 0)), 0)
+    self.assertEqual(self.outline.indexAt(Cursor(2, 50)), 0)
+    self.assertEqual(self.outline.indexAt(Cursor(2, 51)), -1)
+    self.assertEqual(self.outline.indexAt(Cursor(5, 20)), 1)
+    self.assertEqual(self.outline.indexAt(Cursor(10, 0)), -1)
+    self.assertEqual(self.outline.indexAt(Cursor(15, 3)), 2)
+
+  def test_nextPrevious(self):
+    self.assertEqual(self.outline.nextIndex(Cursor(0, 0)), 0)
+    self.assertEqual(self.outline.nextIndex(Cursor(2, 0)), 1)
+    self.assertEqual(self.outline.nextIndex(Cursor(11, 0)), -1)
+    self.assertEqual(self.outline.previousIndex(Cursor(0, 0)), -1)
+    self.assertEqual(self.outline.previousIndex(Cursor(4, 2)), 0)
+    self.assertEqual(self.outline.previousIndex(Cursor(5, 0)), 1)
+    self.assertEqual(self.outline.previousIndex(Cursor(17, 0)), 2)
+
+  def test_empty(self):
+    outline = FunctionOutline(Buffer(""))
+    self.assertEqual(len(outline), 0)
+    self.assertEqual(outline.indexAt(Cursor(0, 0)), -1)
+    self.assertEqual(outline.nextIndex(Cursor(0, 0)), -1)
+
+  def test_reusedUntilChanged(self):
+    text_buffer = Buffer("int a() { x; }\nint b() { y; }")
+    outline = getFunctionOutline(text_buffer)
+    self.assertIs(getFunctionOutline(text_buffer), outline)
+    self.assertEqual(len(outline), 2)
+    text_buffer.text[1] = "int b;"
+    changed_outline = getFunctionOutline(text_buffer)
+    self.assertIsNot(changed_outline, outline)
+    self.assertEqual(len(changed_outline), 1)
+
+if __name__ == '__main__':
+  unittest.main()
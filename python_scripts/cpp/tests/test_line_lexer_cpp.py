@@ -0,0 +1,362 @@
+import unittest
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from line_lexer_cpp import *
+from stream_lexer_cpp import CppStreamLexer
+import text_object_type
+
+import logging
+logging.basicConfig(stream=sys.stdout)
+logger = logging.getLogger(__name__)
+
+sampleTexts = [
+  "words and words",
+  "words(and)words",
+  "{ } < > [ ] ( ): , * ; ",
+  "test->word - > -",
+  "const if else while switch constant",
+  "words and//and words\n//skip this line\nmore words",
+  """words "and more" words""",
+  """words "and \\"more" words""",
+  "words /*and\nmore\nstuff*/ words",
+  "int a = b / c; /**/ d",
+  "x \"multi\nline\n\nstring\" y",
+  "x \"escaped newline\\\nstring\" y",
+  "a  \n\n   b \n",
+  "  leading\n\ttabs\t\n",
+  "int test() const { if (cond) {all words;} } void main()",
+  "std::map<int, std::unique_ptr<Object>> test_ = x[3];",
+  "unterminated \"string",
+  "ends in slash /",
+  "ends in minus -",
+  "",
+  "\n",
+]
+
+def streamLexerTokens(text_buffer, cursor, lexer = None, **kargs):
+  if lexer is None:
+    lexer = CppStreamLexer(forward_direction = True, **kargs)
+  tokens = []
+  cursor = cursor.clone()
+  while not tokens or tokens[-1].tokenType != TokenType.kEnd:
+    new_tokens, cursor = lexer.lex(cursor, text_buffer)
+    tokens.extend(new_tokens)
+    cursor.moveForward(text_buffer)
+  return tokens
+
+class TestLineLexerCpp(unittest.TestCase):
+  def setUp(self):
+    pass
+
+  def runTestSame(self, text, cursor = None, **kargs):
+    if cursor is None:
+      cursor = Cursor(0, 0)
+    text_buffer = Buffer(text)
+    expected = streamLexerTokens(text_buffer, cursor, **kargs)
+    tokens = list(LineTokenStream(text_buffer, **kargs).forward(cursor))
+    self.assertListEqual(tokens, expected)
+
+  def test_sameAsStreamLexer(self):
+    for text in sampleTexts:
+      self.runTestSame(text)
+
+  def test_sameAsStreamLexerSpaces(self):
+    for text in sampleTexts:
+      self.runTestSame(text, allow_space_token = True)
+
+  def test_flatBuffer(self):
+    for text in sampleTexts:
+      expected = streamLexerTokens(Buffer(text), Cursor(0, 0))
+      self.assertListEqual(streamLexerTokens(FlatBuffer(text), Cursor(0, 0)), expected)
+      self.assertListEqual(list(LineTokenStream(FlatBuffer(text)).forward(Cursor(0, 0))), expected)
+
+  def runTestAllCursors(self, text, **kargs):
+    text_buffer = Buffer(text)
+    stream = LineTokenStream(text_buffer, **kargs)
+    tokens = list(stream.forward(Cursor(0, 0)))
+    end_token = tokens.pop()
+    for row in xrange(text_buffer.maxLines()):
+      for column in xrange(len(text_buffer.getLine(row)) + 1):
+        cursor = Cursor(row, column)
+        expected = [x for x in tokens if cursor < x.span.end] + [end_token]
+        self.assertListEqual(list(stream.forward(cursor)), expected)
+        expected = [x for x in reversed(tokens) if x.span.start <= cursor] + [end_token]
+        self.assertListEqual(list(stream.backward(cursor)), expected)
+
+  def test_allCursors(self):
+    for text in sampleTexts:
+      self.runTestAllCursors(text)
+      self.runTestAllCursors(text, allow_space_token = True)
+
+  def test_backwardSameAsStreamLexer(self):
+    text = "int test() const { if (cond) {all words;} } void main()"
+    text_buffer = Buffer(text)
+    lexer = CppStreamLexer(forward_direction = False)
+    cursor = text_buffer.getLastCursorPos()
+    expected = []
+    while not expected or expected[-1].tokenType != TokenType.kEnd:
+      new_tokens, cursor = lexer.lex(cursor, text_buffer)
+      expected.extend(new_tokens)
+      cursor.moveBack(text_buffer)
+    tokens = list(LineTokenStream(text_buffer).backward(text_buffer.getLastCursorPos()))
+    self.assertListEqual(tokens, expected)
+
+  def test_backwardCommentMarkerInString(self):
+    text_buffer = Buffer("a = \"http://x\"; b")
+    tokens = list(LineTokenStream(text_buffer).backward(Cursor(0, 17)))
+    self.assertListEqual([x.tokenType for x in tokens], [
+      TokenType.kId,
+      TokenType.kSemiColon,
+      TokenType.kString,
+      TokenType.kOther,
+      TokenType.kId,
+      TokenType.kEnd,
+    ])
+
+  def test_backwardInsideMultilineComment(self):
+    text_buffer = Buffer("a /*\nb\n*/ c")
+    tokens = list(LineTokenStream(text_buffer).backward(Cursor(2, 4)))
+    self.assertListEqual(tokens, [
+      Token(TextSpan(Cursor(2, 3), Cursor(2, 4)), TokenType.kId),
+      Token(TextSpan(Cursor(0, 0), Cursor(0, 1)), TokenType.kId),
+      Token(TextSpan(), TokenType.kEnd),
+    ])
+
+  def test_lineEndState(self):
+    for text in sampleTexts + ["\"a\\", "/* \" */ \"", "// \" /*", "\"/*\" /*/"]:
+      lines = text.split("\n")
+      state = LexerState.kDefault
+      for row, line in enumerate(lines):
+        has_newline = row + 1 < len(lines)
+        _, expected = lexLine(line, row, state, has_newline = has_newline)
+        state = lineEndState(line, state)
+        if has_newline:
+          self.assertEqual(state, expected)
+
+  def test_lexLineStates(self):
+    tokens, state = lexLine("a /* b", 0)
+    self.assertEqual([x.tokenType for x in tokens], [TokenType.kId])
+    self.assertEqual(state, LexerState.kCommentMultiline)
+
+    tokens, state = lexLine("b */ c \"d", 1, state)
+    self.assertEqual([x.tokenType for x in tokens], [TokenType.kId, TokenType.kString])
+    self.assertEqual(state, LexerState.kString)
+
+    tokens, state = lexLine("e\" f", 2, state)
+    self.assertEqual(tokens[0], Token(TextSpan(Cursor(2, 0), Cursor(2, 2)), TokenType.kString))
+    self.assertEqual(state, LexerState.kDefault)
+
+  def test_endToken(self):
+    tokens = list(LineTokenStream(Buffer("a")).forward(Cursor(0, 1)))
+    self.assertListEqual(tokens, [Token(TextSpan(), TokenType.kEnd)])
+
+  def test_unterminatedComment(self):
+    tokens = list(LineTokenStream(Buffer("a /* comment\nhere")).forward(Cursor(0, 0)))
+    self.assertListEqual(tokens, [
+      Token(TextSpan(Cursor(0, 0), Cursor(0, 1)), TokenType.kId),
+      Token(TextSpan(), TokenType.kEnd),
+    ])
+
+  def test_parseTokens(self):
+    text_buffer = Buffer("std::map<int, int> test")
+    parser = Parser(text_object_type.parserTransitionForward, text_object_type.ParserStates.kStart)
+    span = parseTokens(parser, LineTokenStream(text_buffer).forward(Cursor(0, 0)))
+    self.assertEqual(span, TextSpan(Cursor(0, 0), Cursor(0, 18)))
+
+class TestLineTokenCache(unittest.TestCase):
+  def setUp(self):
+    pass
+
+  def test_reusedAcrossStreams(self):
+    text_buffer = Buffer("int a;\nint b;\nint a;")
+    tokens = list(LineTokenStream(text_buffer).forward(Cursor(0, 0)))
+    cache = getLineTokenCache(text_buffer)
+    misses = cache.entries.misses
+    self.assertEqual(misses, 3)
+    self.assertListEqual(list(LineTokenStream(text_buffer).forward(Cursor(0, 0))), tokens)
+    self.assertEqual(cache.entries.misses, misses)
+
+  def test_movedLine(self):
+    text_buffer = Buffer("int a;\nint b;")
+    list(LineTokenStream(text_buffer).forward(Cursor(0, 0)))
+    cache = getLineTokenCache(text_buffer)
+    text_buffer.text.insert(0, "int c;")
+    misses = cache.entries.misses
+    tokens = list(LineTokenStream(text_buffer).forward(Cursor(0, 0)))
+    # Only the inserted line is new
+    self.assertEqual(cache.entries.misses, misses + 1)
+    self.assertEqual(tokens[4], Token(TextSpan(Cursor(1, 4), Cursor(1, 5)), TokenType.kId))
+
+  def test_changedLineEvicted(self):
+    text_buffer = Buffer("int a;\nint b;")
+    list(LineTokenStream(text_buffer).forward(Cursor(0, 0)))
+    cache = getLineTokenCache(text_buffer)
+    self.assertEqual(len(cache), 2)
+    text_buffer.text[0] = "int changed;"
+    list(LineTokenStream(text_buffer).forward(Cursor(0, 0)))
+    LineTokenStream(text_buffer)
+    self.assertEqual(len(cache), 2)
+    self.assertNotIn(("int a;", LexerState.kDefault, False, True), cache.entries)
+
+  def test_sharedLineKept(self):
+    text_buffer = Buffer("}\n}\n")
+    list(LineTokenStream(text_buffer).forward(Cursor(0, 0)))
+    cache = getLineTokenCache(text_buffer)
+    text_buffer.text[0] = "{"
+    list(LineTokenStream(text_buffer).forward(Cursor(0, 0)))
+    LineTokenStream(text_buffer)
+    self.assertIn(("}", LexerState.kDefault, False, True), cache.entries)
+
+  def test_maxSize(self):
+    text_buffer = Buffer("\n".join("int a{};".format(x) for x in xrange(10)))
+    cache = getLineTokenCache(text_buffer, max_size = 4)
+    list(LineTokenStream(text_buffer).forward(Cursor(0, 0)))
+    self.assertEqual(len(cache), 4)
+
+class CountingBuffer(Buffer):
+  def __init__(self, text):
+    Buffer.__init__(self, text)
+    self.reads = 0
+
+  def getLine(self, row):
+    self.reads += 1
+    return Buffer.getLine(self, row)
+
+class TestLineStateCheckpoints(unittest.TestCase):
+  def setUp(self):
+    pass
+
+  def getStates(self, text_buffer, rows):
+    checkpoints = getLineStateCheckpoints(text_buffer)
+    checkpoints.sync(text_buffer)
+    return [checkpoints.stateAt(text_buffer, x) for x in rows]
+
+  def test_states(self):
+    text_buffer = Buffer("a /*\nb\nc */ \"d\ne\" // \"\nf")
+    self.assertListEqual(self.getStates(text_buffer, xrange(5)), [
+      LexerState.kDefault,
+      LexerState.kCommentMultiline,
+      LexerState.kCommentMultiline,
+      LexerState.kString,
+      LexerState.kDefault,
+    ])
+
+  def test_lazy(self):
+    text_buffer = Buffer("a\nb\nc\nd")
+    self.getStates(text_buffer, [1])
+    self.assertEqual(len(getLineStateCheckpoints(text_buffer)), 2)
+
+  def test_changedLine(self):
+    text_buffer = Buffer("a /*\nb\nc */\nd")
+    self.getStates(text_buffer, xrange(4))
+    text_buffer.text[0] = "a"
+    self.assertListEqual(self.getStates(text_buffer, xrange(4)), [LexerState.kDefault] * 4)
+
+  def test_changedLineKeepsStatesBefore(self):
+    text_buffer = Buffer("a /*\nb\nc */\nd")
+    self.getStates(text_buffer, xrange(4))
+    checkpoints = getLineStateCheckpoints(text_buffer)
+    version = checkpoints.version
+    text_buffer.text[2] = "c"
+    # Only the lines above the row asked for are checked
+    self.getStates(text_buffer, [2])
+    self.assertEqual(checkpoints.version, version)
+    self.assertEqual(self.getStates(text_buffer, [3]), [LexerState.kCommentMultiline])
+    self.assertEqual(checkpoints.version, version + 1)
+    self.assertEqual(len(checkpoints), 4)
+
+  def test_syncReadsRowsAskedFor(self):
+    text_buffer = CountingBuffer("\n".join("int a{};".format(x) for x in xrange(100)))
+    self.getStates(text_buffer, [99])
+    text_buffer.reads = 0
+    self.getStates(text_buffer, [10])
+    self.assertEqual(text_buffer.reads, 10)
+    # Checked once per sync
+    getLineStateCheckpoints(text_buffer).stateAt(text_buffer, 10)
+    self.assertEqual(text_buffer.reads, 10)
+
+  def test_changedTick(self):
+    text_buffer = Buffer("a /*\nb")
+    text_buffer.changedTick = 1
+    self.getStates(text_buffer, xrange(2))
+    text_buffer.text[0] = "a"
+    # Same tick, states are trusted
+    self.assertEqual(self.getStates(text_buffer, [1]), [LexerState.kCommentMultiline])
+    text_buffer.changedTick = 2
+    self.assertEqual(self.getStates(text_buffer, [1]), [LexerState.kDefault])
+
+  def test_streamLexerResume(self):
+    text_buffer = Buffer("x = \"a\nb\" /* c\nd */ e")
+    checkpoints = getLineStateCheckpoints(text_buffer)
+    for row in [1, 2]:
+      lexer = CppStreamLexer(start_state = checkpoints.stateAt(text_buffer, row))
+      tokens = streamLexerTokens(text_buffer, Cursor(row, 0), lexer = lexer)
+      expected = list(LineTokenStream(text_buffer).forward(Cursor(row, 0)))
+      if expected[0].span.start.row < row:
+        # The stream lexer only sees the string from row on
+        expected[0] = Token(TextSpan(Cursor(row, 0), expected[0].span.end), expected[0].tokenType)
+      self.assertListEqual(tokens, expected)
+
+class TestSyncLines(unittest.TestCase):
+  def setUp(self):
+    pass
+
+  def largeBuffer(self, comment_row = None):
+    lines = ["int a{} = f(\"{}\");".format(x, x) for x in xrange(1000)]
+    if comment_row is not None:
+      lines[comment_row] = "/* opened"
+      lines[comment_row + 20] = "closed */ int b;"
+    return CountingBuffer("\n".join(lines))
+
+  def test_readsNearRows(self):
+    text_buffer = self.largeBuffer()
+    stream = LineTokenStream(text_buffer, sync_lines = 50)
+    self.assertEqual(stream.lineState(900), LexerState.kDefault)
+    self.assertLessEqual(text_buffer.reads, 50)
+    self.assertEqual(len(getLineStateCheckpoints(text_buffer)), 1)
+
+  def test_sameAsCheckpoints(self):
+    text_buffer = self.largeBuffer(comment_row = 880)
+    stream = LineTokenStream(text_buffer, sync_lines = 50)
+    expected = LineTokenStream(text_buffer, sync_lines = 1000)
+    for row in [890, 900, 850, 600, 0, 950]:
+      self.assertEqual(stream.lineState(row), expected.lineState(row), row)
+    cursor = Cursor(895, 3)
+    self.assertListEqual(list(stream.backward(cursor)), list(expected.backward(cursor)))
+    self.assertListEqual(list(stream.forward(cursor)), list(expected.forward(cursor)))
+
+  def test_backwardScansRowsOnce(self):
+    text_buffer = self.largeBuffer()
+    stream = LineTokenStream(text_buffer, sync_lines = 50)
+    for row in xrange(900, -1, -1):
+      stream.lineState(row)
+    self.assertLess(len(stream.syncStates), 1000)
+    self.assertLess(text_buffer.reads, 2000)
+
+  def test_statesScannedCounted(self):
+    text_buffer = self.largeBuffer()
+    metrics = ParseMetrics()
+    stream = LineTokenStream(text_buffer, sync_lines = 50, metrics = metrics)
+    stream.lineColumns(900)
+    self.assertEqual(metrics.statesScanned, 50)
+    self.assertEqual(metrics.lineCacheMisses, 1)
+    self.assertEqual(metrics.charsLexed, len(text_buffer.getLine(900)))
+    metrics = ParseMetrics()
+    stream = LineTokenStream(text_buffer, metrics = metrics)
+    stream.lineColumns(40)
+    stream.lineColumns(20)
+    self.assertEqual(metrics.statesScanned, 40)
+    self.assertEqual(metrics.lineCacheMisses, 2)
+
+  def test_commentAboveWindow(self):
+    # Opened further up than the rows scanned, the lines are lexed as code
+    text_buffer = self.largeBuffer(comment_row = 800)
+    stream = LineTokenStream(text_buffer, sync_lines = 10)
+    self.assertEqual(stream.lineState(815), LexerState.kDefault)
+    self.assertEqual(LineTokenStream(text_buffer, sync_lines = 1000).lineState(815),
+        LexerState.kCommentMultiline)
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import mmap
+import tempfile
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from mmap_buffer import *
+from stream_parser import Buffer, Cursor, TextSpan
+import text_object_function
+import text_object_comment
+
+class TestMmapBuffer(unittest.TestCase):
+  def setUp(self):
+    self.paths = []
+
+  def tearDown(self):
+    for path in self.paths:
+      os.remove(path)
+
+  def mmapBuffer(self, text, **kwargs):
+    fd, path = tempfile.mkstemp(suffix = ".cpp")
+    os.write(fd, text)
+    os.close(fd)
+    self.paths.append(path)
+    text_buffer = MmapBuffer(path, **kwargs)
+    self.addCleanup(text_buffer.close)
+    return text_buffer
+
+  def assertSameAsBuffer(self, text, text_buffer):
+    expected = Buffer(text)
+    self.assertEqual(text_buffer.maxLines(), expected.maxLines())
+    self.assertEqual(text_buffer.getLastCursorPos(), expected.getLastCursorPos())
+    rows = range(expected.maxLines())
+    for row in rows:
+      self.assertEqual(text_buffer.getLine(row), expected.getLine(row))
+      for column in xrange(len(expected.getLine(row)) + 2):
+        cursor = Cursor(row, column)
+        self.assertEqual(text_buffer.getChar(cursor), expected.getChar(cursor), cursor)
+    for start_row in rows:
+      for end_row in rows[start_row:start_row + 3]:
+        span = TextSpan(Cursor(start_row, min(1, len(expected.getLine(start_row)))),
+            Cursor(end_row, min(2, len(expected.getLine(end_row)))))
+        self.assertEqual(text_buffer.getSpan(span), expected.getSpan(span), span)
+
+  def test_sameAsBuffer(self):
+    for text in ["", "\n", "a", "int a;\n\nint b;\n", "int a;\r\nint b;", "\n\n{\n  x;\n}"]:
+      self.assertSameAsBuffer(text, self.mmapBuffer(text))
+
+  def test_linesAcrossMappings(self):
+    # Lines straddling the end of the single page mapped at once
+    text = "\n".join("int value{} = {};".format(x, x * 7) for x in xrange(1000))
+    text_buffer = self.mmapBuffer(text, map_size = mmap.ALLOCATIONGRANULARITY)
+    self.assertGreater(len(text), 4 * text_buffer.data.mapSize)
+    self.assertSameAsBuffer(text, text_buffer)
+
+  def test_longLine(self):
+    text = "int a;\n" + "x" * (3 * mmap.ALLOCATIONGRANULARITY) + "\nint b;"
+    self.assertSameAsBuffer(text, self.mmapBuffer(text, map_size = mmap.ALLOCATIONGRANULARITY))
+
+  def test_lazyIndex(self):
+    text_buffer = self.mmapBuffer("\n".join("line {}".format(x) for x in xrange(100)))
+    self.assertEqual(text_buffer.getLine(10), "line 10")
+    self.assertEqual(len(text_buffer.lineStarts), 11)
+    self.assertEqual(text_buffer.maxLines(), 100)
+    self.assertIsNone(text_buffer.scanOffset)
+
+  def test_bytesLines(self):
+    text_buffer = self.mmapBuffer(u"int a;\n// d\u00e9j\u00e0 vu\nint b;".encode("utf-8"))
+    self.assertIs(type(text_buffer.getLine(0)), str)
+    self.assertEqual(text_buffer.getLine(1), u"// d\u00e9j\u00e0 vu")
+    self.assertEqual(text_buffer.getChar(Cursor(1, 5)), u"j")
+    self.assertEqual(text_buffer.getChar(Cursor(1, 10)), "\n")
+
+  def test_textObjects(self):
+    lines = ["int f{}() {{ return {}; }}".format(x, x) for x in xrange(2000)]
+    lines[1000:1000] = ["// adds", "// a and b", "int test(int a,", "    int b)", "{", "  all words;", "}"]
+    text = "\n".join(lines)
+    text_buffer = self.mmapBuffer(text, map_size = mmap.ALLOCATIONGRANULARITY)
+    self.assertEqual(text_object_function.main(Cursor(1005, 3), text_buffer),
+        text_object_function.main(Cursor(1005, 3), Buffer(text)))
+    self.assertEqual(text_object_comment.main(Cursor(1001, 3), text_buffer),
+        text_object_comment.main(Cursor(1001, 3), Buffer(text)))
+    # Only the rows up to the objects are indexed
+    self.assertIsNotNone(text_buffer.scanOffset)
+    self.assertLess(len(text_buffer.lineStarts), 1500)
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+import shutil
+import tempfile
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from module_registry import *
+import cpp_parser
+
+moduleSource = """
+value = {value}
+warmCalls = []
+def warm():
+  warmCalls.append(value)
+"""
+
+# registry_sample reading a function of registry_base
+dependentSource = """
+from registry_base import baseValue
+warmCalls = []
+def warm():
+  warmCalls.append(baseValue())
+"""
+
+baseSource = """
+def baseValue():
+  return {value}
+"""
+
+class TestModuleRegistry(unittest.TestCase):
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+    sys.path.insert(0, self.directory)
+    self.writeModule(1, 1000)
+
+  def tearDown(self):
+    sys.path.remove(self.directory)
+    sys.modules.pop("registry_sample", None)
+    sys.modules.pop("registry_base", None)
+    shutil.rmtree(self.directory)
+
+  def writeModule(self, value, mtime, source = moduleSource, module_name = "registry_sample"):
+    path = os.path.join(self.directory, module_name + ".py")
+    with open(path, "w") as f:
+      f.write(source.format(value = value))
+    # No bytecode so a reload reads the new source whatever the mtime resolution
+    for bytecode_path in [path + "c", path + "o"]:
+      if os.path.exists(bytecode_path):
+        os.remove(bytecode_path)
+    os.utime(path, (mtime, mtime))
+
+  def test_loadedOnce(self):
+    registry = ModuleRegistry()
+    module = registry.get("registry_sample")
+    self.assertListEqual(module.warmCalls, [1])
+    self.writeModule(2, 2000)
+    self.assertIs(registry.get("registry_sample"), module)
+    self.assertEqual(module.value, 1)
+    self.assertEqual(registry.loads, 1)
+
+  def test_reloadedOnChange(self):
+    registry = ModuleRegistry(reload_modules = True)
+    module = registry.get("registry_sample")
+    registry.get("registry_sample")
+    self.assertEqual(registry.loads, 1)
+    self.writeModule(2, 2000)
+    module = registry.get("registry_sample")
+    self.assertEqual(module.value, 2)
+    self.assertListEqual(module.warmCalls, [2])
+    registry.get("registry_sample")
+    self.assertEqual(registry.loads, 2)
+
+  def test_dependencyReloaded(self):
+    self.writeModule(1, 1000, baseSource, "registry_base")
+    self.writeModule(None, 1000, dependentSource)
+    registry = ModuleRegistry(reload_modules = True)
+    module = registry.get("registry_sample")
+    self.assertListEqual(dependencyOrder(module), ["registry_base", "registry_sample"])
+    base_value = module.baseValue
+    self.assertIs(registry.get("registry_sample").baseValue, base_value)
+    # Only the base changed, the sample is reloaded after it to read the new function
+    self.writeModule(2, 2000, baseSource, "registry_base")
+    module = registry.get("registry_sample")
+    self.assertEqual(module.baseValue(), 2)
+    self.assertListEqual(module.warmCalls, [2])
+    self.assertEqual(registry.loads, 2)
+    registry.get("registry_sample")
+    self.assertEqual(registry.loads, 2)
+
+  def test_packageDependencies(self):
+    import text_object_function
+    order = dependencyOrder(text_object_function)
+    self.assertEqual(order[-1], "text_object_function")
+    for module_name in ["stream_parser", "stream_parser_util", "line_lexer_cpp", "bracket_index"]:
+      self.assertIn(module_name, order)
+    self.assertLess(order.index("stream_parser"), order.index("stream_parser_util"))
+    self.assertNotIn("logging", order)
+
+  def test_warmAll(self):
+    registry = ModuleRegistry()
+    registry.warmAll()
+    for module_name in textObjectModules + generatorModules:
+      self.assertIn(module_name, registry)
+    self.assertIsNotNone(cpp_parser.parser)
+    self.assertEqual(registry.get("ctor_stub").main("int a_;"), "(int a) :\n  a_(a)")
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+
+import sys
+import os
+import types
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from test_snapshot_buffer import FakeSnapshot
+
+class FakeTrace(object):
+  lines = []
+
+  @classmethod
+  def WriteLine(cls, line):
+    cls.lines.append(line)
+
+def fakeModule(name, **names):
+  module = types.ModuleType(name)
+  module.__dict__.update(names)
+  sys.modules[name] = module
+  return module
+
+# Stand ins for the .NET modules pythonnet gives msvc_wrapper
+fakeModule("clr", AddReference = lambda name: None)
+fakeModule("System", String = str, Char = str, Int32 = int)
+fakeModule("System.Collections")
+fakeModule("System.Diagnostics", Trace = FakeTrace)
+fakeModule("Microsoft")
+fakeModule("Microsoft.VisualStudio")
+fakeModule("Microsoft.VisualStudio.TextManager")
+fakeModule("Microsoft.VisualStudio.TextManager.Interop")
+import msvc_wrapper
+from stream_parser import Cursor, TextSpan
+
+class FakeDocument(object):
+  def __init__(self, text):
+    self.currentSnapshot = FakeSnapshot(text)
+
+class FakeTextBuffer(object):
+  """
+  Stand in for the pythonnet wrapper of an ITextBuffer, a new one wraps the same document per call
+  """
+  def __init__(self, document):
+    self.document = document
+    self.currentSnapshot = document.currentSnapshot
+
+  def GetHashCode(self):
+    return id(self.document)
+
+  def Equals(self, other):
+    return self.document is other.document
+
+class FakeTextView(object):
+  def __init__(self, line, column):
+    self.line = line
+    self.column = column
+
+  def GetCaretPos(self, line, column):
+    return 0, self.line, self.column
+
+class TestMsvcWrapper(unittest.TestCase):
+  def setUp(self):
+    msvc_wrapper.bufferCaches.clear()
+
+  def test_cachesKept(self):
+    lines = ["int f{}() {{ return {}; }}".format(x, x) for x in xrange(100)]
+    lines[50:50] = ["int test(int a,", "    int b)", "{", "  all words;", "}"]
+    document = FakeDocument("\n".join(lines))
+    span = msvc_wrapper.msvcMain(FakeTextView(53, 3), FakeTextBuffer(document), "text_object_function", True)
+    self.assertEqual(span, TextSpan(Cursor(50, 0), Cursor(54, 1)))
+    caches = msvc_wrapper.getBufferCaches(FakeTextBuffer(document))
+    cache = caches["lineTokenCache"]
+    misses = cache.entries.misses
+    span = msvc_wrapper.msvcMain(FakeTextView(53, 3), FakeTextBuffer(document), "text_object_function", True)
+    self.assertEqual(span, TextSpan(Cursor(50, 0), Cursor(54, 1)))
+    self.assertIs(msvc_wrapper.getBufferCaches(FakeTextBuffer(document))["lineTokenCache"], cache)
+    self.assertEqual(cache.entries.misses, misses)
+    self.assertGreater(cache.entries.hits, 0)
+
+  def test_cachesPerDocument(self):
+    first = FakeTextBuffer(FakeDocument("int a;"))
+    second = FakeTextBuffer(FakeDocument("int b;"))
+    self.assertIsNot(msvc_wrapper.getBufferCaches(first), msvc_wrapper.getBufferCaches(second))
+    self.assertIs(msvc_wrapper.getBufferCaches(FakeTextBuffer(first.document)), msvc_wrapper.getBufferCaches(first))
+
+  def test_hashCodeCollision(self):
+    first = FakeTextBuffer(FakeDocument("int a;"))
+    second = FakeTextBuffer(FakeDocument("int b;"))
+    second.GetHashCode = first.GetHashCode
+    caches = msvc_wrapper.getBufferCaches(first)
+    self.assertIsNot(msvc_wrapper.getBufferCaches(second), caches)
+
+  def test_cachesBounded(self):
+    documents = [FakeDocument("int a;") for x in xrange(msvc_wrapper.kBufferCacheSize + 1)]
+    for document in documents:
+      msvc_wrapper.msvcMain(FakeTextView(0, 4), FakeTextBuffer(document), "text_object_function", True)
+    self.assertEqual(len(msvc_wrapper.bufferCaches), msvc_wrapper.kBufferCacheSize)
+    self.assertNotIn(id(documents[0]), msvc_wrapper.bufferCaches)
+
+if __name__ == '__main__':
+  unittest.main()
@@ -4,6 +4,11 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from cpp_parser import *
+import cpp_parser
+import ply.yacc
+import shutil
+import tempfile
+import threading
 
 class TestParser(unittest.TestCase):
   cppTypeConstInt = CppType("int", const = True)
@@ -129,6 +134,107 @@ class TestParser(unittest.TestCase):
     expected_list = [CppVariable(CppType("int"), "test_")]
     self.runTest(data, expected_list)
 
+class TestDeclarationParser(unittest.TestCase):
+  texts = [
+    "int a;",
+    "const std::vector<int>& values_; int* count_ = 0",
+    "int ;",
+    "std::map<int, std::unique_ptr<Object>> test_;",
+    "a b c d;",
+    "",
+    "char const* name",
+  ]
+
+  def expected(self):
+    return [DeclarationParser().parse(x) for x in self.texts]
+
+  def test_recoversFromErrors(self):
+    results = list(parseVariablesMany(self.texts))
+    self.assertEqual(len(results), len(self.texts))
+    self.assertEqual(results[0], [CppVariable(CppType("int"), "a")])
+    self.assertIsNone(results[2])
+    self.assertIsNone(results[4])
+    self.assertEqual(results[6], [CppVariable(CppType(CppType("char", const = True), pointer = True), "name")])
+    for text, result in zip(self.texts, results):
+      if result is not None:
+        self.assertEqual(result, parseVariables(text))
+
+  def test_interleaved(self):
+    first = parseVariablesMany(iter(self.texts))
+    second = parseVariablesMany(reversed(self.texts))
+    results = []
+    for x in xrange(len(self.texts)):
+      results.append(next(first))
+      results.append(next(second))
+    expected = self.expected()
+    self.assertListEqual(results[::2], expected)
+    self.assertListEqual(results[1::2], list(reversed(expected)))
+
+  def test_threads(self):
+    expected = self.expected()
+    results = {}
+    def run(index):
+      results[index] = list(parseVariablesMany(self.texts * 20))
+    threads = [threading.Thread(target = run, args = (x,)) for x in xrange(4)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    for x in xrange(4):
+      self.assertListEqual(results[x], expected * 20)
+
+class TestParserTables(unittest.TestCase):
+  def setUp(self):
+    self.tempDir = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self.tempDir)
+
+  def test_tablesCurrent(self):
+    tables = loadTables()
+    self.assertIsNotNone(tables)
+    lextab, parsetab = tables
+    lex.lex(module = cpp_parser, errorlog = lex.NullLogger()).writetab(lexTableModule, self.tempDir)
+    with open(os.path.join(self.tempDir, lexTableModule + ".py")) as f:
+      fresh_lextab = f.read()
+    with open(os.path.join(tableDir, lexTableModule + ".py")) as f:
+      self.assertEqual(f.read(), fresh_lextab, "rerun python cpp_parser.py")
+    reflect = ply.yacc.ParserReflect(vars(cpp_parser))
+    reflect.get_all()
+    self.assertEqual(parsetab._lr_signature, reflect.signature(), "rerun python cpp_parser.py")
+
+  def test_writeTables(self):
+    tables = loadTables()
+    writeTables(self.tempDir)
+    self.assertListEqual(self.sourceFiles(self.tempDir), [lexTableModule + ".py", parseTableModule + ".py"])
+    fresh_parsetab = {}
+    with open(os.path.join(self.tempDir, parseTableModule + ".py")) as f:
+      exec f.read() in fresh_parsetab
+    parsetab = tables[1]
+    self.assertEqual(fresh_parsetab["_lr_signature"], parsetab._lr_signature)
+    self.assertEqual(fresh_parsetab["_lr_action"], parsetab._lr_action)
+    self.assertEqual(fresh_parsetab["_lr_goto"], parsetab._lr_goto)
+    # The shipped modules are still the ones imported
+    self.assertIs(loadTables()[1], parsetab)
+
+  def sourceFiles(self, directory):
+    return sorted(x for x in os.listdir(directory) if not x.endswith(".pyc"))
+
+  def test_nothingWritten(self):
+    table_files = self.sourceFiles(tableDir)
+    cwd = os.getcwd()
+    saved = (cpp_parser.lexer, cpp_parser.parser)
+    try:
+      os.chdir(self.tempDir)
+      cpp_parser.lexer = None
+      cpp_parser.parser = None
+      self.assertEqual(parseVariables("int a;"), [CppVariable(CppType("int"), "a")])
+    finally:
+      os.chdir(cwd)
+      cpp_parser.lexer, cpp_parser.parser = saved
+    self.assertListEqual(os.listdir(self.tempDir), [])
+    self.assertListEqual(self.sourceFiles(tableDir), table_files)
+
 if __name__ == '__main__':
   # TestParser.setDebug()
   # unittest.main(defaultTest="TestParser.test_intType")
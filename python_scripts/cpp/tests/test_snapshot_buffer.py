@@ -0,0 +1,120 @@
+import unittest
+import re
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from snapshot_buffer import *
+from stream_parser import Cursor, TextSpan, FlatBuffer, ParseMetrics
+import text_object_function
+import text_object_param
+import text_object_type
+
+class FakeSnapshotPoint(object):
+  def __init__(self, position):
+    self.Position = position
+
+class FakeSnapshotLine(object):
+  def __init__(self, snapshot, start, end):
+    self.snapshot = snapshot
+    self.Start = FakeSnapshotPoint(start)
+    self.End = FakeSnapshotPoint(end)
+
+  def GetText(self):
+    self.snapshot.calls += 1
+    return self.snapshot.text[self.Start.Position:self.End.Position]
+
+class FakeSnapshotVersion(object):
+  def __init__(self, version_number):
+    self.VersionNumber = version_number
+
+class FakeSnapshot(object):
+  """
+  Pure Python stand in for an ITextSnapshot, breaking lines on break_regex and counting the calls made
+  to it and its lines
+  """
+  def __init__(self, text, break_regex = lineBreakRegex, version = 0):
+    self.text = text
+    self.Version = FakeSnapshotVersion(version)
+    self.lineSpans = []
+    start = 0
+    for match in break_regex.finditer(text):
+      self.lineSpans.append((start, match.start()))
+      start = match.end()
+    self.lineSpans.append((start, len(text)))
+    self.calls = 0
+
+  @property
+  def LineCount(self):
+    self.calls += 1
+    return len(self.lineSpans)
+
+  def GetLineFromLineNumber(self, row):
+    self.calls += 1
+    start, end = self.lineSpans[row]
+    return FakeSnapshotLine(self, start, end)
+
+  def GetText(self, start, length):
+    self.calls += 1
+    return self.text[start:start + length]
+
+class TestSnapshotBuffer(unittest.TestCase):
+  def test_lines(self):
+    snapshot = FakeSnapshot(u"int a;\r\nint b;\n\r\nint c;\u2028last")
+    text_buffer = snapshotBuffer(snapshot, 0, window = 2)
+    self.assertEqual(text_buffer.maxLines(), 5)
+    self.assertListEqual([text_buffer.getLine(x) for x in xrange(5)], ["int a;", "int b;", "", "int c;", "last"])
+    self.assertEqual(text_buffer.getChar(Cursor(0, 6)), "\n")
+    self.assertIsNone(text_buffer.getChar(Cursor(4, 4)))
+    self.assertEqual(text_buffer.bridgeCalls(), snapshot.calls)
+
+  def test_lineBreakInLine(self):
+    # A snapshot only breaking on \n keeps the \r in the line
+    snapshot = FakeSnapshot(u"a\rb\nc", re.compile("\n"))
+    text_buffer = snapshotBuffer(snapshot, 0)
+    self.assertListEqual([text_buffer.getLine(x) for x in xrange(2)], [u"a\rb", u"c"])
+    self.assertEqual(text_buffer.bridgeCalls(), snapshot.calls)
+
+  def test_sameAsFlatBuffer(self):
+    lines = ["int f{}() {{ return {}; }}".format(x, x) for x in xrange(2000)]
+    lines[1000:1000] = ["int test(int a,", "    int b)", "{", "  all words;", "}"]
+    text = "\r\n".join(lines)
+    snapshot = FakeSnapshot(text)
+    text_buffer = snapshotBuffer(snapshot, 1003)
+    span = text_object_function.main(Cursor(1003, 3), text_buffer)
+    self.assertEqual(span, text_object_function.main(Cursor(1003, 3), FlatBuffer("\n".join(lines))))
+    self.assertLess(snapshot.calls, 30)
+
+  def test_readsNearRows(self):
+    lines = ["int f{}(int a, int b) {{ return a + {}; }}".format(x, x) for x in xrange(10000)]
+    lines[5000:5000] = ["std::string test(int a,", "    const std::map<int, int>& b)", "{", "  all words;", "}"]
+    text = "\r\n".join(lines)
+    for module, cursor in [(text_object_function, Cursor(5003, 3)), (text_object_param, Cursor(5000, 21)),
+        (text_object_type, Cursor(5001, 16))]:
+      text_buffer = snapshotBuffer(FakeSnapshot(text), cursor.row)
+      expected = module.main(cursor.clone(), FlatBuffer("\n".join(lines)))
+      self.assertIsNotNone(expected)
+      self.assertEqual(module.main(cursor, text_buffer), expected)
+      self.assertLess(text_buffer.linesFetched(), 1000)
+
+  def test_cachesKept(self):
+    lines = ["int f{}() {{ return {}; }}".format(x, x) for x in xrange(100)]
+    lines[50:50] = ["int test(int a,", "    int b)", "{", "  all words;", "}"]
+    caches = {}
+    text_buffer = snapshotBuffer(FakeSnapshot("\n".join(lines)), 53, caches = caches)
+    self.assertEqual(text_object_function.main(Cursor(53, 3), text_buffer), TextSpan(Cursor(50, 0), Cursor(54, 1)))
+    self.assertIn("lineTokenCache", caches)
+    self.assertIn("lineStateCheckpoints", caches)
+    # A later invocation on the same version of the document lexes nothing again
+    text_buffer = snapshotBuffer(FakeSnapshot("\n".join(lines)), 53, caches = caches)
+    span, metrics = text_object_function.main(Cursor(53, 3), text_buffer, metrics = ParseMetrics())
+    self.assertEqual(span, TextSpan(Cursor(50, 0), Cursor(54, 1)))
+    self.assertEqual(metrics.lineCacheMisses, 0)
+    # The function is commented out in a new version, its line states are checked again
+    lines[49] = "/*"
+    lines[55] = "*/"
+    text_buffer = snapshotBuffer(FakeSnapshot("\n".join(lines), version = 1), 53, caches = caches)
+    self.assertEqual(text_object_function.main(Cursor(53, 3), text_buffer), TextSpan(Cursor(56, 0), Cursor(56, 24)))
+
+if __name__ == '__main__':
+  unittest.main()
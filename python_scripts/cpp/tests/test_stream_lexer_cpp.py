@@ -10,6 +10,8 @@ logging.basicConfig(stream=sys.stdout)
 logger = logging.getLogger(__name__)
 
 class TestStreamLexerCpp(unittest.TestCase):
+  lexerArgs = {}
+
   def setUp(self):
     pass
 
@@ -57,6 +59,7 @@ class TestStreamLexerCpp(unittest.TestCase):
     return tokens
 
   def runTestTokenType(self, text, expected_tokens, **kargs):
+    kargs.update(self.lexerArgs)
     tokens = TestStreamLexerCpp.getTokenList(text, **kargs)
     tokens = [x.tokenType for x in tokens]
     self.assertListEqual(tokens, expected_tokens)
@@ -66,10 +69,10 @@ class TestStreamLexerCpp(unittest.TestCase):
     self.assertListEqual(tokens, expected_tokens)
 
   def runTest(self, text, expected_tokens):
-    tokens = TestStreamLexerCpp.getTokenList(text)
+    tokens = TestStreamLexerCpp.getTokenList(text, **self.lexerArgs)
     self.assertListEqual(tokens, expected_tokens)
 
-    tokens = TestStreamLexerCpp.getTokenListReverse(text)
+    tokens = TestStreamLexerCpp.getTokenListReverse(text, **self.lexerArgs)
     self.assertListEqual(tokens, expected_tokens)
 
   def test_basic(self):
@@ -165,6 +168,53 @@ class TestStreamLexerCpp(unittest.TestCase):
         Token(TextSpan(Cursor(2, 8), Cursor(2, 13)), TokenType.kId),
     ])
 
+  def test_dispatchMatchesPredicates(self):
+    chars = [None, "\n", "\t", " ", "a", "Z", "0", "_", ">", "-", "/", "*", "\"", "\\", "=", "#", "."]
+    for forward in [True, False]:
+      for allow_space_token in [True, False]:
+        transitions = buildTransitions(forward, allow_space_token)
+        dispatch = compileTransitions(transitions)
+        for state, transition_list in transitions.items():
+          for char in chars:
+            self.assertIs(dispatch[state].lookup(char), findTransition(transition_list, char))
+
+class TestParseMetrics(unittest.TestCase):
+  def setUp(self):
+    pass
+
+  def parseAll(self, text, **kargs):
+    metrics = ParseMetrics()
+    lexer = CppStreamLexer(**kargs)
+    transitions = {"kStart": dict((x, lambda parser, token: parser.joinToken(token))
+        for x in TokenType.kAllTokens if x != TokenType.kEnd)}
+    parser = Parser(transitions, "kStart")
+    span = parseText(lexer, parser, Buffer(text), Cursor(0, 0), metrics = metrics)
+    return span, metrics
+
+  def test_counters(self):
+    span, metrics = self.parseAll("int a(b);")
+    self.assertEqual(span, TextSpan(Cursor(0, 0), Cursor(0, 9)))
+    # Every char and the end of the buffer
+    self.assertEqual(metrics.charsLexed, 10)
+    self.assertEqual(metrics.tokens, 7)
+    self.assertEqual(metrics.transitions, 6)
+    self.assertEqual(sorted(metrics.phaseTimes.keys()), ["lex", "parse"])
+
+  def test_notCompiled(self):
+    _, metrics = self.parseAll("int a(b);", compiled = False)
+    self.assertEqual(metrics.charsLexed, 10)
+    self.assertEqual(metrics.tokens, 7)
+
+  def test_optIn(self):
+    lexer = CppStreamLexer()
+    parser = Parser({}, "kStart")
+    parseText(lexer, parser, Buffer("a"), Cursor(0, 0))
+    self.assertIsNone(lexer.metrics)
+    self.assertIsNone(parser.metrics)
+
+class TestStreamLexerCppPredicateList(TestStreamLexerCpp):
+  lexerArgs = {"compiled": False}
+
 if __name__ == '__main__':
   logger.setLevel(logging.DEBUG)
   logging.getLogger("stream_parser").setLevel(logging.DEBUG)
@@ -4,6 +4,7 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from stream_parser import *
+import logging
 
 class TestStreamParserTextSpan(unittest.TestCase):
   def setUp(self):
@@ -70,6 +71,233 @@ class TestStreamParserTextSpan(unittest.TestCase):
     self.assertEqual(a, Cursor(0, 3))
     self.assertEqual(b, Cursor(0, 10))
 
+class TestStreamParserToken(unittest.TestCase):
+  def setUp(self):
+    pass
+
+  def test_equality(self):
+    self.assertEqual(Cursor(1, 2), Cursor(1, 2))
+    self.assertNotEqual(Cursor(1, 2), Cursor(2, 1))
+    self.assertNotEqual(Cursor(1, 2), (1, 2))
+    span = TextSpan(Cursor(0, 1), Cursor(1, 2))
+    self.assertEqual(span, makeSpan(Cursor(0, 1), Cursor(1, 2)))
+    self.assertEqual(Token(span, "kId"), Token(span.clone(), "kId"))
+    self.assertNotEqual(Token(span, "kId"), Token(span, "kOther"))
+    self.assertNotEqual(Token(span, "kId"), Token(TextSpan(), "kId"))
+
+  def test_noInstanceDict(self):
+    for obj in [Cursor(), TextSpan(), Token(TextSpan(), "kId")]:
+      self.assertFalse(hasattr(obj, "__dict__"))
+
+  def test_joinTokenKeepsTokenSpan(self):
+    token = Token(TextSpan(Cursor(0, 0), Cursor(0, 1)), "kId")
+    parser = Parser({}, "kStart")
+    parser.joinToken(token)
+    parser.joinToken(Token(TextSpan(Cursor(0, 2), Cursor(0, 3)), "kId"))
+    self.assertEqual(parser.span, TextSpan(Cursor(0, 0), Cursor(0, 3)))
+    self.assertEqual(token.span, TextSpan(Cursor(0, 0), Cursor(0, 1)))
+
+class TestStreamParserTrace(unittest.TestCase):
+  class RecordHandler(logging.Handler):
+    def __init__(self):
+      logging.Handler.__init__(self)
+      self.records = []
+
+    def emit(self, record):
+      self.records.append(record)
+
+  def setUp(self):
+    self.handler = self.RecordHandler()
+    parserLogger.addHandler(self.handler)
+    parserLogger.propagate = False
+
+  def tearDown(self):
+    parserLogger.removeHandler(self.handler)
+    parserLogger.setLevel(logging.NOTSET)
+    parserLogger.propagate = True
+
+  def parse(self, **kargs):
+    parser = Parser({"kStart": {"kId": lambda parser, token: parser.joinToken(token)}}, "kStart", **kargs)
+    parser.parseToken(Token(TextSpan(Cursor(0, 0), Cursor(0, 1)), "kId"))
+    return parser
+
+  def test_followsLoggerLevel(self):
+    self.assertFalse(self.parse().trace)
+    self.assertEqual(self.handler.records, [])
+    parserLogger.setLevel(logging.DEBUG)
+    self.assertTrue(self.parse().trace)
+    self.assertNotEqual(self.handler.records, [])
+
+  def test_explicitSwitch(self):
+    parserLogger.setLevel(logging.DEBUG)
+    self.assertFalse(self.parse(trace = False).trace)
+    self.assertEqual(self.handler.records, [])
+
+class TestFlatBuffer(unittest.TestCase):
+  texts = ["", "\n", "abc", "12345\n1234567890\n123", "a\n\nb\n"]
+
+  def setUp(self):
+    pass
+
+  def cursors(self, text_buffer):
+    for row in xrange(-1, text_buffer.maxLines() + 1):
+      for column in xrange(-1, 12):
+        yield Cursor(row, column)
+
+  def test_sameAsBuffer(self):
+    for text in self.texts:
+      expected = Buffer(text)
+      text_buffer = FlatBuffer(text)
+      self.assertEqual(text_buffer.maxLines(), expected.maxLines())
+      self.assertEqual(text_buffer.getLastCursorPos(), expected.getLastCursorPos())
+      self.assertEqual(list(text_buffer.text), expected.text)
+      for row in xrange(-1, expected.maxLines() + 1):
+        self.assertEqual(text_buffer.getLine(row), expected.getLine(row))
+      for cursor in self.cursors(expected):
+        self.assertEqual(text_buffer.getChar(cursor), expected.getChar(cursor))
+
+  def test_getSpanSameAsBuffer(self):
+    for text in self.texts:
+      expected = Buffer(text)
+      text_buffer = FlatBuffer(text)
+      cursors = [x for x in self.cursors(expected) if expected.getChar(x) is not None]
+      cursors.append(expected.getLastCursorPos())
+      cursors[-1].moveForward()
+      for start in cursors:
+        for end in cursors:
+          if start <= end:
+            span = TextSpan(start, end)
+            self.assertEqual(text_buffer.getSpan(span), expected.getSpan(span))
+
+  def test_offsets(self):
+    text_buffer = FlatBuffer("12345\n1234567890\n123")
+    self.assertEqual(text_buffer.toOffset(Cursor(1, 2)), 8)
+    self.assertEqual(text_buffer.toCursor(8), Cursor(1, 2))
+    self.assertEqual(text_buffer.toCursor(5), Cursor(0, 5))
+    self.assertEqual(text_buffer.toCursor(17), Cursor(2, 0))
+
+  def test_cursorMoves(self):
+    text_buffer = FlatBuffer("ab\n\nc")
+    cursor = Cursor(0, 0)
+    visited = []
+    while text_buffer.getChar(cursor) is not None:
+      visited.append(cursor.clone())
+      cursor.moveForward(text_buffer)
+    expected = TextSpan(Cursor(0, 0), Cursor(2, 1)).iterate(Buffer("ab\n\nc"))
+    self.assertEqual(visited, [x.clone() for x in expected])
+    cursor.moveBack(text_buffer)
+    cursor.moveBack(text_buffer)
+    self.assertEqual(cursor, Cursor(1, 0))
+
+class LinesOnlyBuffer(LineBuffer):
+  """
+  LineBuffer giving nothing but its lines and their number
+  """
+  def __init__(self, text):
+    self.lines = text.split('\n')
+
+  def getLine(self, row):
+    if 0 <= row < len(self.lines):
+      return self.lines[row]
+    return None
+
+  def maxLines(self):
+    return len(self.lines)
+
+class TestProviderBuffer(TestFlatBuffer):
+  def providerBuffers(self, text, window = 2):
+    lines = text.split('\n')
+    def getLine(row):
+      if 0 <= row < len(lines):
+        return lines[row]
+      return None
+    yield providerBuffer(getLine, window = window)
+    yield providerBuffer(getLine, lambda start, end: lines[start:end], window = window)
+    yield providerBuffer(getLine, lambda start, end: lines[start:end], lambda: len(lines),
+        row = len(lines) - 1, window = window)
+
+  def test_sameAsBuffer(self):
+    for text in self.texts:
+      expected = Buffer(text)
+      for text_buffer in self.providerBuffers(text):
+        self.assertEqual(text_buffer.maxLines(), expected.maxLines())
+        self.assertEqual(text_buffer.getLastCursorPos(), expected.getLastCursorPos())
+        for row in xrange(-1, expected.maxLines() + 1):
+          self.assertEqual(text_buffer.getLine(row), expected.getLine(row))
+        for cursor in self.cursors(expected):
+          self.assertEqual(text_buffer.getChar(cursor), expected.getChar(cursor))
+
+  def test_getSpanSameAsBuffer(self):
+    text = "12345\n1234567890\n123"
+    expected = Buffer(text)
+    span = TextSpan(Cursor(0, 3), Cursor(2, 1))
+    for text_buffer in self.providerBuffers(text):
+      self.assertEqual(text_buffer.getSpan(span), expected.getSpan(span))
+
+  def test_countLines(self):
+    lines = ["line {}".format(x) for x in xrange(1000)]
+    calls = []
+    def getLine(row):
+      calls.append(row)
+      if row < len(lines):
+        return lines[row]
+      return None
+    text_buffer = providerBuffer(getLine, row = 500, window = 10)
+    self.assertEqual(text_buffer.maxLines(), 1000)
+    self.assertLess(len(calls), 40)
+    self.assertEqual(text_buffer.getLine(999), "line 999")
+    self.assertEqual(text_buffer.bridgeCalls(), len(calls))
+    self.assertEqual(providerBuffer(lambda row: None).maxLines(), 0)
+
+  def test_onlyTouchedLines(self):
+    lines = ["line {}".format(x) for x in xrange(1000)]
+    fetched = []
+    def getLines(start, end):
+      fetched.extend(xrange(start, end))
+      return lines[start:end]
+    text_buffer = providerBuffer(lines.__getitem__, getLines, lambda: len(lines), row = 500, window = 10)
+    cursor = Cursor(500, 0)
+    for x in xrange(20):
+      cursor.moveForward(text_buffer)
+    self.assertEqual(cursor, Cursor(502, 2))
+    self.assertListEqual(fetched, range(495, 505))
+
+  def test_cursorMoves(self):
+    text_buffer = LinesOnlyBuffer("ab\n\nc")
+    cursor = Cursor(0, 0)
+    visited = []
+    while text_buffer.getChar(cursor) is not None:
+      visited.append(cursor.clone())
+      cursor.moveForward(text_buffer)
+    expected = TextSpan(Cursor(0, 0), Cursor(2, 1)).iterate(Buffer("ab\n\nc"))
+    self.assertEqual(visited, [x.clone() for x in expected])
+    cursor.moveBack(text_buffer)
+    cursor.moveBack(text_buffer)
+    self.assertEqual(cursor, Cursor(1, 0))
+    self.assertEqual(text_buffer.getLastCursorPos(), Cursor(2, 0))
+
+class SharedCachesBuffer(SharedCaches, Buffer):
+  def __init__(self, text, caches):
+    Buffer.__init__(self, text)
+    self.caches = caches
+
+class TestSharedCaches(unittest.TestCase):
+  def test_sharedByBuffers(self):
+    caches = {}
+    first = SharedCachesBuffer("a", caches)
+    first.lineTokenCache = "cache"
+    first.other = "other"
+    self.assertDictEqual(caches, {"lineTokenCache": "cache"})
+    second = SharedCachesBuffer("a", caches)
+    self.assertEqual(second.lineTokenCache, "cache")
+    self.assertFalse(hasattr(second, "other"))
+    self.assertFalse(hasattr(second, "bracketIndex"))
+
+  def test_noCaches(self):
+    text_buffer = SharedCachesBuffer("a", None)
+    text_buffer.lineTokenCache = "cache"
+    self.assertEqual(text_buffer.__dict__["lineTokenCache"], "cache")
+
 if __name__ == '__main__':
   unittest.main()
   # unittest.main(defaultTest="StreamParserTextSpan.")
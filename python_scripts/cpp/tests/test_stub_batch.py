@@ -0,0 +1,111 @@
+import unittest
+import shutil
+import tempfile
+from StringIO import StringIO
+import logging
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from stub_batch import *
+
+sampleHeader = """#include <string>
+namespace ns {
+template <class T> struct Box { T value; };
+class Widget : public Base<int, ns::X> {
+public:
+  Widget() : a{1}, b{2} {}
+  void f() const { if (x) { y(); } }
+  virtual ~Widget();
+  static int count;
+  int a : 3;
+  char buf[4];
+private:
+  std::string name_ = "x"; // { ;
+  const std::vector<int>* values_;
+  mutable int hits_{0};
+  struct Inner { double d; } inner;
+  enum class Kind { A, B };
+  friend class Other;
+};
+struct Declared;
+struct Empty { void f(); };
+}
+"""
+
+class TestStubBatch(unittest.TestCase):
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self.directory)
+
+  def writeHeader(self, name, text):
+    path = os.path.join(self.directory, name)
+    with open(path, "w") as f:
+      f.write(text)
+    return path
+
+  def test_findTypeBlocks(self):
+    blocks = findTypeBlocks(sampleHeader)
+    self.assertListEqual(blocks, [
+        TypeBlock("Box", 2, ["T value;"]),
+        TypeBlock("Widget", 3, ["std::string name_;", "const std::vector<int>* values_;", "int hits_;"]),
+        TypeBlock("Widget::Inner", 15, ["double d;"]),
+        TypeBlock("Empty", 20, [])])
+
+  def test_stubText(self):
+    stubs = stubText(sampleHeader)
+    self.assertListEqual([x.name for x in stubs], ["Box", "Widget", "Widget::Inner"])
+    self.assertEqual(stubs[1].ctor, """Widget(const std::string& name, const std::vector<int>* values, int hits) :
+  name_(name),
+  values_(values),
+  hits_(hits)
+{
+}""")
+    self.assertEqual(stubs[2].opEq, stub_opeq.opEqStub(cpp_parser.parseVariables("double d;"), "Widget::Inner"))
+
+  def test_stubFiles(self):
+    paths = [self.writeHeader("h{}.h".format(x), "struct T{} {{ int v{}; }};".format(x, x))
+        for x in xrange(6)]
+    paths.append(os.path.join(self.directory, "missing.h"))
+    expected = sorted(stubFiles(paths, processes = 1))
+    self.assertEqual(expected[0][1][0].name, "T0")
+    self.assertIsNone(expected[-1][1])
+    self.assertListEqual(sorted(stubFiles(paths, processes = 2)), expected)
+
+  def test_main(self):
+    self.writeHeader("a.hpp", "struct A { int x; };")
+    self.writeHeader("notes.txt", "struct B { int y; };")
+    out = StringIO()
+    main([self.directory], processes = 1, out = out)
+    text = out.getvalue()
+    self.assertTrue(text.startswith("// A {}:1\nA(int x) :\n".format(os.path.join(self.directory, "a.hpp"))))
+    self.assertNotIn("B(", text)
+
+  def test_skippedMembers(self):
+    stubs = stubText("struct P { int a, b; unsigned int flags; int c; };\nstruct Q { int x, y; };")
+    self.assertListEqual([x.skipped for x in stubs], [["int a, b;", "unsigned int flags;"], ["int x, y;"]])
+    self.assertEqual(stubs[0].ctor, "P(int c) :\n  c(c)\n{\n}")
+    self.assertIsNone(stubs[1].ctor)
+    text = formatStubs("p.h", stubs)
+    self.assertIn("// P p.h:1\n// skipped: int a, b;\n// skipped: unsigned int flags;\nP(int c)", text)
+    self.assertIn("// Q p.h:2\n// skipped: int x, y;\n", text)
+    self.assertNotIn("Q(", text)
+
+  def test_mainLogsUnreadable(self):
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    default_logger.addHandler(handler)
+    default_logger.propagate = False
+    try:
+      main([os.path.join(self.directory, "missing.h")], processes = 1, out = StringIO())
+    finally:
+      default_logger.removeHandler(handler)
+      default_logger.propagate = True
+    self.assertEqual(len(records), 1)
+    self.assertIn("missing.h", records[0].getMessage())
+
+if __name__ == '__main__':
+  unittest.main()
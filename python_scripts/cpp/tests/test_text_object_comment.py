@@ -0,0 +1,25 @@
+import unittest
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from text_object_comment import *
+
+class TestTextObjectComment(unittest.TestCase):
+  def setUp(self):
+    pass
+
+  def test_block(self):
+    text_buffer = Buffer("int a;\n// one\n\n  // two\nint b;")
+    self.assertEqual(main(Cursor(1, 2), text_buffer), TextSpan(Cursor(1, 0), Cursor(4, 0)))
+    self.assertEqual(main(Cursor(0, 2), text_buffer), None)
+
+  def test_mainMany(self):
+    text_buffer = Buffer("// head\n\nint a;\n// one\n\n  // two\n\nint b;\n// tail")
+    cursors = [Cursor(row, 0) for row in reversed(xrange(text_buffer.maxLines()))]
+    for inner in [True, False]:
+      expected = [main(x, text_buffer, inner) for x in cursors]
+      self.assertListEqual(mainMany(cursors, text_buffer, inner), expected)
+
+if __name__ == '__main__':
+  unittest.main()
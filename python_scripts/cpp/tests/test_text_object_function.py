@@ -22,6 +22,8 @@ class TestTextObjectFunction(unittest.TestCase):
       result = main(cursor, text_buffer)
 
       self.assertEqual(result, expected_span)
+    cursors = [x.clone() for x in expected_span.iterate(text_buffer)]
+    self.assertListEqual(mainMany(cursors, text_buffer), [expected_span] * len(cursors))
 
   def test_basicInBlock(self):
     self.runTest(Cursor(0, 14), "int test() { all words; } void main();", TextSpan(Cursor(0, 0), Cursor(0, 25)))
@@ -29,6 +31,24 @@ class TestTextObjectFunction(unittest.TestCase):
   def test_basicOutOfBlock(self):
     self.runTest(Cursor(0, 2), "int test() { all words; } void main();", TextSpan(Cursor(0, 0), Cursor(0, 25)))
 
+  def test_metrics(self):
+    text_buffer = Buffer("int test() { all words; } void main();")
+    span, metrics = main(Cursor(0, 14), text_buffer, metrics = ParseMetrics())
+    self.assertEqual(span, TextSpan(Cursor(0, 0), Cursor(0, 25)))
+    self.assertGreater(metrics.tokens, 0)
+    self.assertGreater(metrics.transitions, 0)
+    self.assertIn("total", metrics.phaseTimes)
+    self.assertIn("setup", metrics.phaseTimes)
+    self.assertEqual(metrics.lineCacheMisses, 1)
+    self.assertEqual(metrics.charsLexed, len(text_buffer.getLine(0)))
+    self.assertGreater(metrics.bracketLines, 0)
+    self.assertEqual(metrics.indexBuilds, 0)
+    # The line is lexed once per buffer
+    _, metrics = main(Cursor(0, 14), text_buffer, metrics = ParseMetrics())
+    self.assertEqual(metrics.lineCacheMisses, 0)
+    self.assertGreater(metrics.lineCacheHits, 0)
+    self.assertEqual(metrics.charsLexed, 0)
+
   def test_basicAll(self):
     self.runTestAll("int test() { all words; } void main();", TextSpan(Cursor(0, 0), Cursor(0, 25)))
 
@@ -93,6 +113,41 @@ class TestTextObjectFunction(unittest.TestCase):
     self.runTestAll("""int func() // comments here \n{ all words; } void main()""",
         TextSpan(Cursor(0, 0), Cursor(1, 14)))
 
+  def test_commentMarkerInString(self):
+    self.runTestAll("""int func() { x = "http://a"; } void main()""", TextSpan(Cursor(0, 0), Cursor(0, 30)))
+
+  def test_braceInMultilineComment(self):
+    self.runTestAll("""int func() { /* } \n { */ x; } void main()""", TextSpan(Cursor(0, 0), Cursor(1, 10)))
+
+  def test_deepNesting(self):
+    depth = 30
+    lines = ["int func() {"] + ["if (a) {"] * depth + ["all words;"] + ["}"] * depth + ["}", "void main()"]
+    text_buffer = Buffer("\n".join(lines))
+    span, metrics = main(Cursor(depth + 1, 2), text_buffer, metrics = ParseMetrics())
+    self.assertEqual(span, TextSpan(Cursor(0, 0), Cursor(2 * depth + 2, 1)))
+    # Blocks are walked through the bracket scanner, only the heads of the braces are parsed
+    self.assertLess(metrics.tokens, 6 * depth)
+
+  def test_providerBufferReadsNearRows(self):
+    lines = ["int f{}() {{ if (a) {{ return {}; }} }}".format(x, x) for x in xrange(10000)]
+    lines[5000:5000] = ["int test() {", "  if (a) {", "    all words;", "  }", "}"]
+    text_buffer = providerBuffer(lines.__getitem__, lambda start, end: lines[start:end], lambda: len(lines),
+        row = 5002)
+    self.assertEqual(main(Cursor(5002, 4), text_buffer), TextSpan(Cursor(5000, 0), Cursor(5004, 1)))
+    self.assertLess(text_buffer.linesFetched(), 1000)
+
+  def test_mainManyInInputOrder(self):
+    text_buffer = Buffer("struct A { int x; };\nint a() { if (x) { y; } }\nint b() const { z; }")
+    cursors = [Cursor(row, column) for row in reversed(xrange(3))
+        for column in xrange(len(text_buffer.getLine(row)) + 1)]
+    expected = [main(x.clone(), text_buffer) for x in cursors]
+    self.assertListEqual(mainMany(cursors, text_buffer), expected)
+    self.assertIn(None, expected)
+
+  def test_notInFunction(self):
+    self.runTest(Cursor(0, 15), "struct A { int x; }; int func() { all words; }", None)
+    self.runTest(Cursor(0, 3), "} x; int func() { all words; }", None)
+
 # operator()()
 # strings (best effort, assume cursor is outside of the string)
 # comments
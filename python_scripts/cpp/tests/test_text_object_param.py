@@ -25,6 +25,8 @@ class TestTextObjectParamInner(unittest.TestCase):
       result = main(cursor, text_buffer, inner=True)
 
       self.assertEqual(result, expected_span)
+    cursors = [x.clone() for x in expected_span.iterate(text_buffer)]
+    self.assertListEqual(mainMany(cursors, text_buffer, inner=True), [expected_span] * len(cursors))
 
   def test_basic(self):
     self.runTestAll("func(hello)", TextSpan(Cursor(0, 5), Cursor(0, 10)))
@@ -64,6 +66,18 @@ class TestTextObjectParamInner(unittest.TestCase):
   def test_noMatchingParen(self):
     self.runTest(Cursor(0, 21), "func(hello, world, tests", TextSpan(Cursor(0, 19), Cursor(0, 24)))
 
+  def test_endOfBuffer(self):
+    self.runTest(Cursor(0, 11), "func(hello)", None)
+    self.runTest(Cursor(1, 0), "func(hello)\n", None)
+
+  def test_providerBufferReadsNearRows(self):
+    lines = ["int f{}(int a, int b) {{ return g(a, {}); }}".format(x, x) for x in xrange(10000)]
+    lines[5000:5000] = ["int test(int a,", "    int b,", "    int c) {}"]
+    text_buffer = providerBuffer(lines.__getitem__, lambda start, end: lines[start:end], lambda: len(lines),
+        row = 5001)
+    self.assertEqual(main(Cursor(5001, 8), text_buffer, inner=True), TextSpan(Cursor(5001, 4), Cursor(5001, 9)))
+    self.assertLess(text_buffer.linesFetched(), 1000)
+
   def test_arrow(self):
     self.runTestAll("func(hello, world->member, tests", TextSpan(Cursor(0, 12), Cursor(0, 25)))
     #                            ^^^^^^^^^^^^^
@@ -85,6 +99,8 @@ class TestTextObjectParamOutter(unittest.TestCase):
       result = main(cursor, text_buffer, inner=False)
 
       self.assertEqual(result, expected_span)
+    cursors = [x.clone() for x in test_span.iterate(text_buffer)]
+    self.assertListEqual(mainMany(cursors, text_buffer, inner=False), [expected_span] * len(cursors))
 
   def test_basic(self):
     self.runTestAll("func(hello)", TextSpan(Cursor(0, 5), Cursor(0, 10)))
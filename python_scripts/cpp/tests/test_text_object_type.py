@@ -54,6 +54,28 @@ class TestTextObjectType(unittest.TestCase):
   def test_multiline(self):
     self.runTest(Cursor(0, 2), "std::string\ntest", TextSpan(Cursor(0, 0), Cursor(0, 11)))
 
+  def test_mainMany(self):
+    text_buffer = Buffer("const std::map<int, Type*>& value,\nstd::string\ntest")
+    cursors = [Cursor(row, column) for row in xrange(text_buffer.maxLines())
+        for column in xrange(len(text_buffer.getLine(row)) + 1)]
+    expected = [main(x.clone(), text_buffer) for x in cursors]
+    self.assertListEqual(mainMany(cursors, text_buffer), expected)
+
+  def test_mainManyReadsNearRows(self):
+    lines = ["std::map<int, int> value{0};".format(x) for x in xrange(3000)]
+    text_buffer = Buffer("\n".join(lines))
+    rows = set()
+    get_line = text_buffer.getLine
+    def getLine(row):
+      rows.add(row)
+      return get_line(row)
+    text_buffer.getLine = getLine
+    cursors = [Cursor(1500, 2), Cursor(1500, 10), Cursor(1501, 2)]
+    expected = [main(x.clone(), Buffer("\n".join(lines))) for x in cursors]
+    self.assertListEqual(mainMany(cursors, text_buffer), expected)
+    self.assertEqual(expected[0], TextSpan(Cursor(1500, 0), Cursor(1500, 18)))
+    self.assertLess(len(rows), 500)
+
 if __name__ == '__main__':
   logging.getLogger("stream_parser.Parser").setLevel(logging.DEBUG)
   # logging.getLogger("stream_parser.Lexer").setLevel(logging.WARNING)
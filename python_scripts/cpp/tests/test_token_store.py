@@ -0,0 +1,75 @@
+import unittest
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from token_store import *
+from stream_lexer_cpp import isId
+from test_line_lexer_cpp import sampleTexts
+
+def charSeekHead(cursor, text_buffer):
+  """
+  Head of the token under cursor found one char at a time, like reverseToTokenBountry used to
+  """
+  cursor = cursor.clone()
+  char = text_buffer.getChar(cursor)
+  if char is not None:
+    if isId(char):
+      cursor_it = cursor.clone()
+      while char is not None and isId(char):
+        cursor.copy(cursor_it)
+        cursor_it.moveBack(text_buffer)
+        char = text_buffer.getChar(cursor_it)
+    elif ">" == char:
+      prev_cursor = cursor.clone()
+      prev_cursor.moveBack(text_buffer)
+      if text_buffer.getChar(prev_cursor) == "-":
+        cursor = prev_cursor
+  return cursor
+
+def allCursors(text_buffer):
+  for row in xrange(text_buffer.maxLines()):
+    for column in xrange(len(text_buffer.getLine(row)) + 1):
+      yield Cursor(row, column)
+
+class TestTokenStore(unittest.TestCase):
+  def setUp(self):
+    pass
+
+  def test_sameTokensAsStream(self):
+    for text in sampleTexts:
+      for allow_space_token in [False, True]:
+        text_buffer = Buffer(text)
+        store = TokenStore(text_buffer, allow_space_token)
+        expected = list(LineTokenStream(text_buffer, allow_space_token).forward(Cursor(0, 0)))[:-1]
+        self.assertListEqual([store.token(x) for x in xrange(len(store))], expected)
+
+  def test_tokenAt(self):
+    for text in sampleTexts:
+      text_buffer = Buffer(text)
+      store = TokenStore(text_buffer, True)
+      tokens = [store.token(x) for x in xrange(len(store))]
+      for cursor in allCursors(text_buffer):
+        expected = [x for x in tokens if x.span.start <= cursor and cursor < x.span.end]
+        self.assertEqual(store.tokenAt(cursor), expected[0] if expected else None)
+
+  def test_typeIds(self):
+    store = TokenStore(Buffer("if (a) {}"))
+    self.assertEqual(store.types[0], tokenTypeIds[TokenType.kIf])
+    self.assertEqual(store.tokenType(1), TokenType.kLeftParen)
+
+  def test_tokenHeadSameAsCharSeek(self):
+    for text in sampleTexts + ["a->b - > c", "x \"some words\" /* more words */ y"]:
+      text_buffer = Buffer(text)
+      store = TokenStore(text_buffer)
+      for cursor in allCursors(text_buffer):
+        head = store.tokenHead(cursor)
+        expected = charSeekHead(cursor, text_buffer)
+        if head != expected:
+          # Words inside strings and comments are left alone
+          token = store.tokenAt(cursor)
+          self.assertTrue(token is None or token.tokenType not in headTokenTypes)
+          self.assertEqual(head, cursor)
+
+if __name__ == '__main__':
+  unittest.main()
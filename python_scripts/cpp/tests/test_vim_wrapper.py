@@ -0,0 +1,213 @@
+import unittest
+
+import sys
+import os
+import types
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+class FakeVimBuffer(list):
+  """
+  Stand in for a vim buffer counting the line reads that would go through the vim bridge
+  """
+  def __init__(self, lines, number, changed_tick):
+    list.__init__(self, lines)
+    self.number = number
+    self.vars = {"changedtick": changed_tick}
+    self.calls = 0
+
+  def __len__(self):
+    self.calls += 1
+    return list.__len__(self)
+
+  def __getitem__(self, index):
+    self.calls += 1
+    return list.__getitem__(self, index)
+
+  def __getslice__(self, start, end):
+    self.calls += 1
+    return list.__getslice__(self, start, end)
+
+  def mark(self, name):
+    return (1, 0)
+
+class FakeVim(types.ModuleType):
+  """
+  Stand in for the vim module recording the commands sent to vim
+  """
+  def __init__(self):
+    types.ModuleType.__init__(self, "vim")
+    self.current = types.ModuleType("current")
+    self.current.window = types.ModuleType("window")
+    self.commands = []
+
+  def setBuffer(self, lines, cursor, number = 1, changed_tick = 1):
+    self.current.buffer = FakeVimBuffer(lines, number, changed_tick)
+    self.current.window.cursor = cursor
+
+  def eval(self, expression):
+    self.commands.append(expression)
+
+  def command(self, command):
+    self.commands.append(command)
+
+fakeVim = FakeVim()
+sys.modules["vim"] = fakeVim
+import vim_wrapper
+import bracket_index
+from stream_parser import Buffer, Cursor, TextSpan
+
+class TestVimWrapper(unittest.TestCase):
+  def setUp(self):
+    fakeVim.commands = []
+    vim_wrapper.bufferCaches.clear()
+
+  def test_selectFunction(self):
+    fakeVim.setBuffer(["int test() {", "  all words;", "}"], (2, 3))
+    vim_wrapper.vimMainTextObject("text_object_function")
+    self.assertListEqual(fakeVim.commands, ["cursor(1, 1)", "normal! v", "cursor(3, 1)"])
+
+  def test_lineTokenCacheKept(self):
+    fakeVim.setBuffer(["int test() {", "  all words;", "}"], (2, 3))
+    vim_wrapper.vimMainTextObject("text_object_function")
+    cache = vim_wrapper.bufferCaches.get(1)["lineTokenCache"]
+    misses = cache.entries.misses
+    fakeVim.setBuffer(["int test() {", "  all words;", "}"], (1, 3))
+    vim_wrapper.vimMainTextObject("text_object_function")
+    self.assertEqual(cache.entries.misses, misses)
+    self.assertGreater(cache.entries.hits, 0)
+
+  def test_lineTokenCachePerBuffer(self):
+    fakeVim.setBuffer(["int test() {}"], (1, 0), number = 1)
+    vim_wrapper.vimMainTextObject("text_object_function")
+    fakeVim.setBuffer(["int test() {}"], (1, 0), number = 2)
+    vim_wrapper.vimMainTextObject("text_object_function")
+    self.assertIsNot(vim_wrapper.bufferCaches.get(1), vim_wrapper.bufferCaches.get(2))
+
+  def test_bufferCachesBounded(self):
+    for number in xrange(1, vim_wrapper.kBufferCacheSize + 2):
+      fakeVim.setBuffer(["int test() {}"], (1, 0), number = number)
+      vim_wrapper.vimMainTextObject("text_object_function")
+    self.assertEqual(len(vim_wrapper.bufferCaches), vim_wrapper.kBufferCacheSize)
+    self.assertNotIn(1, vim_wrapper.bufferCaches)
+    vim_wrapper.clearBufferCaches(2)
+    self.assertNotIn(2, vim_wrapper.bufferCaches)
+
+  def test_lineStatesSyncedOnChange(self):
+    fakeVim.setBuffer(["int a; /*", "}", "*/ int test() {}"], (3, 8), changed_tick = 1)
+    vim_wrapper.vimMainTextObject("text_object_function")
+    self.assertListEqual(fakeVim.commands, ["cursor(3, 4)", "normal! v", "cursor(3, 16)"])
+    fakeVim.commands = []
+    # The comment is gone so */ joins the function return type
+    fakeVim.setBuffer(["int a;", "}", "*/ int test() {}"], (3, 8), changed_tick = 2)
+    vim_wrapper.vimMainTextObject("text_object_function")
+    self.assertListEqual(fakeVim.commands, ["cursor(3, 1)", "normal! v", "cursor(3, 16)"])
+
+  def test_indicesKept(self):
+    fakeVim.setBuffer(["int test() {", "  all words;", "}"], (2, 3))
+    vim_wrapper.vimMainTextObject("text_object_function")
+    checkpoints = vim_wrapper.bufferCaches.get(1)["lineStateCheckpoints"]
+    vim_wrapper.vimMainTextObject("text_object_function")
+    self.assertIs(vim_wrapper.bufferCaches.get(1)["lineStateCheckpoints"], checkpoints)
+    # Text objects pair brackets around the cursor, only a whole buffer outline indexes them all
+    self.assertNotIn("bracketIndex", vim_wrapper.bufferCaches.get(1))
+    index = bracket_index.getBracketIndex(vim_wrapper.VimBuffer(fakeVim.current.buffer))
+    self.assertIs(bracket_index.getBracketIndex(vim_wrapper.VimBuffer(fakeVim.current.buffer)), index)
+    fakeVim.setBuffer(["int test() {", "  all words;", "}", ""], (2, 3), changed_tick = 2)
+    self.assertIsNot(bracket_index.getBracketIndex(vim_wrapper.VimBuffer(fakeVim.current.buffer)), index)
+
+  def test_logMetrics(self):
+    fakeVim.setBuffer(["int test() {", "  all words;", "}"], (2, 3))
+    vim_wrapper.setLogMetrics(True)
+    try:
+      vim_wrapper.vimMainTextObject("text_object_function")
+    finally:
+      vim_wrapper.setLogMetrics(False)
+    self.assertListEqual(fakeVim.commands, ["cursor(1, 1)", "normal! v", "cursor(3, 1)"])
+
+  def test_moduleLoadedOnce(self):
+    fakeVim.setBuffer(["int test() {", "  all words;", "}"], (2, 3))
+    vim_wrapper.vimMainTextObject("text_object_type")
+    loads = vim_wrapper.registry.loads
+    vim_wrapper.setReloadModules(True)
+    try:
+      vim_wrapper.vimMainTextObject("text_object_type")
+    finally:
+      vim_wrapper.setReloadModules(False)
+    self.assertIn("text_object_type", vim_wrapper.registry)
+    self.assertEqual(vim_wrapper.registry.loads, loads)
+
+class TestVimWindowBuffer(unittest.TestCase):
+  def setUp(self):
+    fakeVim.commands = []
+    vim_wrapper.bufferCaches.clear()
+
+  def largeBuffer(self):
+    lines = ["int f{}() {{ return {}; }}".format(x, x) for x in xrange(1500)]
+    lines += ["int test() {", "  all words;", "}"]
+    lines += ["int g{}() {{ return {}; }}".format(x, x) for x in xrange(1500)]
+    return lines
+
+  def selectTest(self, windowed):
+    fakeVim.commands = []
+    fakeVim.setBuffer(self.largeBuffer(), (1502, 3), number = 3 if windowed else 4)
+    vim_wrapper.setWindowedBuffer(windowed)
+    try:
+      vim_wrapper.vimMainTextObject("text_object_function")
+    finally:
+      vim_wrapper.setWindowedBuffer(True)
+    return fakeVim.commands, fakeVim.current.buffer.calls
+
+  def test_sameSelection(self):
+    commands, calls = self.selectTest(True)
+    direct_commands, direct_calls = self.selectTest(False)
+    self.assertListEqual(commands, ["cursor(1501, 1)", "normal! v", "cursor(1503, 1)"])
+    self.assertListEqual(commands, direct_commands)
+    self.assertLess(calls, 10)
+    self.assertGreater(direct_calls, 100)
+
+  def test_windowGrows(self):
+    vim_buffer = FakeVimBuffer(["line {}".format(x) for x in xrange(1000)], 5, 1)
+    window = vim_wrapper.VimLineWindow(vim_buffer, 500, window = 10)
+    self.assertEqual((window.start, len(window.lines)), (495, 10))
+    self.assertEqual(window[500], "line 500")
+    self.assertEqual(window.bridgeCalls, 2)
+    self.assertEqual(window[505], "line 505")
+    self.assertEqual((window.start, len(window.lines)), (495, 20))
+    self.assertEqual(window[0], "line 0")
+    self.assertEqual(window[-1], "line 999")
+    self.assertEqual(window.bridgeCalls, 5)
+    self.assertEqual(window.bridgeCalls, vim_buffer.calls)
+    self.assertRaises(IndexError, lambda: window[1000])
+
+  def test_bufferEdges(self):
+    vim_buffer = FakeVimBuffer(["a", "b", "c"], 6, 1)
+    text_buffer = vim_wrapper.VimWindowBuffer(vim_buffer, 2)
+    self.assertEqual(text_buffer.maxLines(), 3)
+    self.assertEqual(text_buffer.getChar(Cursor(2, 1)), "\n")
+    self.assertIsNone(text_buffer.getChar(Cursor(3, 0)))
+    self.assertIsNone(text_buffer.getLine(-1))
+    self.assertEqual(text_buffer.getSpan(TextSpan(Cursor(0, 0), Cursor(2, 1))), "a\nb\nc")
+    self.assertEqual(text_buffer.bridgeCalls(), 2)
+
+  def test_linesFetched(self):
+    lines = ["int f{}(int a, int b) {{ return a + {}; }}".format(x, x) for x in xrange(7500)]
+    lines += ["std::string test(int a,", "    const std::map<int, int>& b)", "{", "  all words;", "}"]
+    lines += ["int g{}(int a, int b) {{ return a + {}; }}".format(x, x) for x in xrange(7500)]
+    vim_buffer = FakeVimBuffer(lines, 7, 1)
+    cases = [
+      ("text_object_function", Cursor(7503, 3)),
+      ("text_object_param", Cursor(7500, 21)),
+      ("text_object_type", Cursor(7501, 16)),
+    ]
+    for module_name, cursor in cases:
+      module = vim_wrapper.registry.get(module_name)
+      expected = module.main(cursor.clone(), Buffer("\n".join(lines)))
+      self.assertIsNotNone(expected, module_name)
+      text_buffer = vim_wrapper.VimWindowBuffer(vim_buffer, cursor.row)
+      self.assertEqual(module.main(cursor, text_buffer), expected, module_name)
+      # The lines around the cursor, not the whole buffer
+      self.assertLess(text_buffer.linesFetched(), 1000, module_name)
+      self.assertLess(text_buffer.bridgeCalls(), 10, module_name)
+
+if __name__ == '__main__':
+  unittest.main()
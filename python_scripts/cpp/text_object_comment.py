@@ -1,4 +1,5 @@
 from stream_parser import *
+import itertools
 import logging
 
 logging.basicConfig()
@@ -21,9 +22,12 @@ def isBlankLine(line):
   log.debug(("line len", len(line.strip()), line))
   return len(line.strip()) == 0
 
-def main(cursor, text_buffer, inner=True, logger = None):
+@withMetrics
+def main(cursor, text_buffer, inner=True, logger = None, metrics = None):
   """
-  Comment text object for visual studio
+  Comment text object for visual studio.
+  Works on whole lines without lexing, a ParseMetrics given only gets the total time and is returned
+  as (span, metrics)
   """
   if logger is None:
     logger = default_logger
@@ -42,11 +46,8 @@ def main(cursor, text_buffer, inner=True, logger = None):
     back_index += 1
   logger.debug(("back_index", back_index))
 
-  forward_index = searchLines(text_buffer, xrange(line_number, text_buffer.maxLines()))
-  if forward_index is None:
-    forward_index = text_buffer.maxLines() - 1
-  else:
-    forward_index -= 1
+  # Stops at the first row past the buffer at the latest
+  forward_index = searchLines(text_buffer, itertools.count(line_number)) - 1
 
   logger.debug(("forward_index", forward_index))
 
@@ -67,3 +68,23 @@ def main(cursor, text_buffer, inner=True, logger = None):
   span = TextSpan(Cursor(back_index, 0), Cursor(forward_index + 1, 0))
   logger.debug(("span", span))
   return span
+
+def mainMany(cursors, text_buffer, inner = True, logger = None):
+  """
+  main at each of cursors, in input order. Every comment line of a run of comments gives the same span,
+  so the run is searched once for all of the cursors in it
+  """
+  spans = {}
+  results = []
+  for cursor in cursors:
+    if cursor.row in spans:
+      span = spans[cursor.row]
+    else:
+      span = main(cursor, text_buffer, inner, logger)
+      spans[cursor.row] = span
+      if span is not None:
+        for row in xrange(span.start.row, span.end.row):
+          if isCommentLine(text_buffer.getLine(row)):
+            spans[row] = span
+    results.append(span.clone() if span is not None else None)
+  return results
@@ -1,7 +1,10 @@
 import argparse
+import time
 from stream_parser import *
 from stream_lexer_cpp import *
 import stream_parser_util
+from line_lexer_cpp import LineTokenStream
+from bracket_index import BracketScanner, parseTokensSkipPairs
 
 import logging
 logging.basicConfig()
@@ -61,6 +64,23 @@ def stayAndJoin(parser, token):
   parser.joinToken(token)
   return None
 
+def trackFunctionName(next_state):
+  """
+  Joins token keeping the first id outside of template arguments as data["nameToken"]
+  """
+  def func(parser, token):
+    parser.joinToken(token)
+    angles = parser.data.get("angles", 0)
+    if token.tokenType == TokenType.kRightAngled:
+      angles += 1
+    elif token.tokenType == TokenType.kLeftAngled:
+      angles = max(angles - 1, 0)
+    elif angles == 0 and "nameToken" not in parser.data:
+      parser.data["nameToken"] = token
+    parser.data["angles"] = angles
+    return next_state
+  return func
+
 def terminateGood(parser, token):
   parser.data['result'] = True
   return ParserStates.kTerminate
@@ -135,75 +155,165 @@ addParserRuleDefault(parserTransitionBackward, ParserStates.kFunctionParams, sta
 addParserRule(parserTransitionBackward, ParserStates.kFunctionParams, TokenType.kLeftParen, checkLevel(ParserStates.kFunctionName))
 addParserRule(parserTransitionBackward, ParserStates.kFunctionParams, TokenType.kRightParen, incrementLevel)
 
-addParserRule(parserTransitionBackward, ParserStates.kFunctionName, TokenType.kId, transitionTo(ParserStates.kFunctionType))
+addParserRule(parserTransitionBackward, ParserStates.kFunctionName, TokenType.kId, trackFunctionName(ParserStates.kFunctionType))
 addParserRule(parserTransitionBackward, ParserStates.kFunctionName, TokenType.kLeftParen, stayAndJoin)
 addParserRule(parserTransitionBackward, ParserStates.kFunctionName, TokenType.kRightParen, stayAndJoin)
-addParserRule(parserTransitionBackward, ParserStates.kFunctionName, TokenType.kLeftAngled, stayAndJoin)
-addParserRule(parserTransitionBackward, ParserStates.kFunctionName, TokenType.kRightAngled, stayAndJoin)
+addParserRule(parserTransitionBackward, ParserStates.kFunctionName, TokenType.kLeftAngled, trackFunctionName(None))
+addParserRule(parserTransitionBackward, ParserStates.kFunctionName, TokenType.kRightAngled, trackFunctionName(None))
 
+# The name of a template function comes after its arguments
 addParserRuleDefault(parserTransitionBackward, ParserStates.kFunctionType, stayAndJoin)
+addParserRule(parserTransitionBackward, ParserStates.kFunctionType, TokenType.kId, trackFunctionName(None))
+addParserRule(parserTransitionBackward, ParserStates.kFunctionType, TokenType.kLeftAngled, trackFunctionName(None))
+addParserRule(parserTransitionBackward, ParserStates.kFunctionType, TokenType.kRightAngled, trackFunctionName(None))
 addParserRule(parserTransitionBackward, ParserStates.kFunctionType, TokenType.kSemiColon, terminateGood)
 addParserRule(parserTransitionBackward, ParserStates.kFunctionType, TokenType.kRightBrace, terminateGood)
 addParserRule(parserTransitionBackward, ParserStates.kFunctionType, TokenType.kLeftBrace, terminateGood)
 addParserRule(parserTransitionBackward, ParserStates.kFunctionType, TokenType.kString, terminateGood)
 addParserRule(parserTransitionBackward, ParserStates.kFunctionType, TokenType.kEnd, terminateGood)
 
-def parse(text_buffer, cursor, forward = True):
+# Resolving
+# Goal: Find the token telling which brace pair the cursor is in, scanning no further than the end of
+# the current statement. The pairs around it are then walked outwards with the bracket scanner
+# If we encounter } first, the cursor is on the end of the block it closes
+# If we encounter ;, the cursor is inside of the block around it
+# If we encounter {, the cursor is in the head of the block it opens
+def stopAt(parser, token):
+  parser.data["stopToken"] = token
+  return ParserStates.kTerminate
+
+parserTransitionResolve = {}
+addParserRuleDefault(parserTransitionResolve, ParserStates.kStart, transitionTo(ParserStates.kUnknown))
+addParserRule(parserTransitionResolve, ParserStates.kStart, TokenType.kRightBrace, stopAt)
+addParserRule(parserTransitionResolve, ParserStates.kStart, TokenType.kSemiColon, stopAt)
+
+addParserRuleDefault(parserTransitionResolve, ParserStates.kUnknown, stayAndJoin)
+addParserRule(parserTransitionResolve, ParserStates.kUnknown, TokenType.kLeftBrace, stopAt)
+addParserRule(parserTransitionResolve, ParserStates.kUnknown, TokenType.kSemiColon, stopAt)
+
+# States where the tokens up to the partner of a bracket only count levels, the bracket scanner jumps
+# straight to the partner instead
+forwardSkipStates = {
+  TokenType.kLeftBrace: [ParserStates.kInBlock],
+}
+backwardSkipStates = {
+  TokenType.kRightBrace: [ParserStates.kInBlock],
+  TokenType.kRightParen: [ParserStates.kFunctionParams],
+}
+
+def parse(text_buffer, cursor, forward = True, token_stream = None, bracket_index = None, metrics = None):
+  """
+  token_stream is the LineTokenStream of text_buffer to take tokens from, shared between calls so
+  lines are only lexed once. With a bracket_index (a BracketIndex or a BracketScanner) blocks and
+  parameter lists are jumped over
+  """
   logger.debug(("Start cursor", cursor))
-  lexer = CppStreamLexer(forward_direction = forward)
+  if token_stream is None:
+    token_stream = LineTokenStream(text_buffer)
   if forward:
-    parser = Parser(parserTransitionForward, ParserStates.kStart)
+    parser = Parser(parserTransitionForward, ParserStates.kStart, metrics = metrics)
+    skip_states = forwardSkipStates
   else:
-    parser = Parser(parserTransitionBackward, ParserStates.kStart)
+    parser = Parser(parserTransitionBackward, ParserStates.kStart, metrics = metrics)
+    skip_states = backwardSkipStates
 
   # Hook events
   parser.getTokenPost = getTokenPost
 
-  span = parseText(lexer, parser, text_buffer, cursor, forward)
-  return span, lexer, parser
+  if bracket_index is None:
+    if forward:
+      tokens = token_stream.forward(cursor)
+    else:
+      tokens = token_stream.backward(cursor)
+    span = parseTokens(parser, tokens)
+  else:
+    span = parseTokensSkipPairs(parser, token_stream, cursor, forward, skip_states, bracket_index)
+  return span, token_stream, parser
 
-def isEof(cursor, text_buffer):
-  char = text_buffer.getChar(cursor)
-  return char is None
+def resolvePair(cursor, token_stream, brackets, metrics = None):
+  """
+  TextSpan of the { and } of the innermost brace pair the cursor is in or on the head of, found from
+  the tokens from cursor up to the end of the statement. None if there is none
+  """
+  parser = Parser(parserTransitionResolve, ParserStates.kStart, metrics = metrics)
+  parseTokens(parser, token_stream.forward(cursor))
+  token = parser.data.get("stopToken")
+  if token is None:
+    return None
+  return brackets.enclosingPair(token.span.start, TokenType.kLeftBrace)
+
+def functionAround(text_buffer, pair, token_stream, brackets, metrics = None, spans = None):
+  """
+  Span of the function of the brace pair or the first one around it, None if there is none. The pairs
+  are walked outwards until the tokens before a { make it a function body, each { costing one backward
+  parse of its head. With a spans dict the result of every { walked over is kept there by its
+  (row, column) and reused
+  """
+  walked = []
+  span = None
+  while pair is not None:
+    key = (pair.start.row, pair.start.column)
+    if spans is not None and key in spans:
+      span = spans[key]
+      break
+    walked.append(key)
+    head_span, _, parser_backward = parse(text_buffer, pair.start, False, token_stream, brackets, metrics)
+    if parser_backward.data.get('result', False):
+      span = TextSpan(head_span.start, Cursor(pair.end.row, pair.end.column + 1))
+      break
+    pair = brackets.parentPair(pair, TokenType.kLeftBrace)
+  if spans is not None:
+    for key in walked:
+      spans[key] = span
+  return span
+
+def resolve(text_buffer, cursor, token_stream, brackets, metrics = None):
+  """
+  Span of the function around or starting at cursor, None if there is none
+  """
+  pair = resolvePair(cursor, token_stream, brackets, metrics)
+  return functionAround(text_buffer, pair, token_stream, brackets, metrics)
 
-def main(cursor, text_buffer, inner = True, logger = None):
+@withMetrics
+def main(cursor, text_buffer, inner = True, logger = None, metrics = None, shared_tokens = None):
   """
   Attempts to find a cpp function text span at the cursor position by streaming input starting from the
   the cursor location.
   inner object includes the full return type without leading whitespace and the closing right brace
 
-  For strings, since we cannot know if we are in a string or not without parsing the entire file, we'll
-  make the assumption that the cursor is currently not inside a string
+  Strings and comments are recognized from the lexer state at the start of each line, so the cursor may
+  be inside of either. With a ParseMetrics given (span, metrics) is returned
   """
-  cursor = stream_parser_util.reverseToTokenBountry(cursor, text_buffer)
-
-  processed_span = TextSpan(cursor, cursor)
-  last_span = processed_span.clone()
-
-  infinite_loop_guard = 0
-  while infinite_loop_guard < 100:
-    forward_span, _, _ = parse(text_buffer, processed_span.end, True)
-    if forward_span is None:
-      return None
-    processed_span.join(forward_span)
-
-    # start from ending brace parse backwards
-    backward_cursor = processed_span.end.clone()
-    if isEof(backward_cursor, text_buffer):
-      backward_cursor.moveBack(text_buffer)
-    backward_span, _, parser_backward = parse(text_buffer, backward_cursor, False)
-    if parser_backward.data.get('result', False):
-      # Function detected (good exit)
-      processed_span.join(backward_span)
-      return processed_span
-
-    # No function join last brace detection
-    brace_span = parser_backward.data.get("braceSpan")
-    if brace_span is None:
-      # Error getting starting brace
-      return None
-    processed_span.join(brace_span)
-    if last_span == processed_span:
-      break
-    last_span = processed_span.clone()
-    infinite_loop_guard += 1
+  if metrics is not None:
+    start = time.time()
+  if shared_tokens is None:
+    token_stream = LineTokenStream(text_buffer, metrics = metrics)
+    cursor = stream_parser_util.reverseToTokenBountry(cursor, text_buffer, token_stream = token_stream)
+    brackets = BracketScanner(text_buffer, token_stream)
+  else:
+    cursor = shared_tokens.tokenHead(cursor)
+    token_stream = shared_tokens.tokenStream
+    brackets = shared_tokens.brackets
+  if metrics is not None:
+    metrics.addTime("setup", time.time() - start)
+
+  return resolve(text_buffer, cursor, token_stream, brackets, metrics)
+
+def mainMany(cursors, text_buffer, inner = True, logger = None):
+  """
+  main at each of cursors, in input order. Lines are lexed and brackets paired once for all of them,
+  and cursors in the same block share the walk out to their function
+  """
+  shared_tokens = stream_parser_util.SharedTokens(text_buffer)
+  token_stream = shared_tokens.tokenStream
+  brackets = shared_tokens.brackets
+  spans = {}
+  results = []
+  for cursor in cursors:
+    pair = resolvePair(shared_tokens.tokenHead(cursor), token_stream, brackets)
+    span = functionAround(text_buffer, pair, token_stream, brackets, spans = spans)
+    results.append(span.clone() if span is not None else None)
+  return results
+
+def warm():
+  stream_parser_util.warmTextObject(main)
@@ -130,17 +130,29 @@ for brace_data in braces:
 
   addParserRule(parserTransitionBackward, brace_data[2], TokenType.kSpace, stayIgnore)
 
+# States where the tokens up to the partner of a bracket only count levels, the bracket scanner jumps
+# straight to the partner instead
+forwardSkipStates = {}
+backwardSkipStates = {}
+for brace_data in braces:
+  if brace_data[0] != TokenType.kLeftAngled:
+    forwardSkipStates[brace_data[0]] = [brace_data[2]]
+    backwardSkipStates[brace_data[1]] = [brace_data[2]]
+
 def searchUntil(text_buffer, cursor, pred, forward=True):
   it_cursor = cursor.clone()
+  trace = logger.isEnabledFor(logging.INFO)
   char = text_buffer.getChar(it_cursor)
-  logger.info(("searching char", char))
+  if trace:
+    logger.info(("searching char", char))
   while char is not None and not pred(char):
     if forward:
       it_cursor.moveForward(text_buffer)
     else:
       it_cursor.moveBack(text_buffer)
     char = text_buffer.getChar(it_cursor)
-    logger.info(("searching char", char))
+    if trace:
+      logger.info(("searching char", char))
   return it_cursor
 
 def forwardSearch(text_buffer, cursor, pred):
@@ -162,19 +174,32 @@ def isNotWhitespace(s):
 #  start on ,: take parameter on the left
 #  start on (: treat as a paren inside a parameter and search outwards
 #  start on ): treat as a paren inside a parameter and search outwards
-def main(cursor, text_buffer, inner=True, logger = None):
+@withMetrics
+def main(cursor, text_buffer, inner=True, logger = None, metrics = None, shared_tokens = None):
+  """
+  With a ParseMetrics given (span, metrics) is returned. shared_tokens is the SharedTokens of a batch,
+  see mainMany
+  """
   if logger is None:
     logger = logging.getLogger(__name__)
+  if text_buffer.getChar(cursor) is None:
+    # Past the end of the buffer, where the stream lexers found no tokens either way
+    return None
 
-  parser_forward = Parser(parserTransitionForward, ParserStates.kDefault, end_state = ParserStates.kInnerTerminate)
-  parser_backward = Parser(parserTransitionBackward, ParserStates.kStart, end_state = ParserStates.kInnerTerminate)
+  parser_forward = Parser(parserTransitionForward, ParserStates.kDefault,
+      end_state = ParserStates.kInnerTerminate, metrics = metrics)
+  parser_backward = Parser(parserTransitionBackward, ParserStates.kStart,
+      end_state = ParserStates.kInnerTerminate, metrics = metrics)
   forward_span, backward_span = runCppParser(
       parser_forward,
       parser_backward, 
       cursor, 
       text_buffer, 
       allow_space_token = True,
-      same_cursor_start = True)
+      same_cursor_start = True,
+      forward_skip_states = forwardSkipStates,
+      backward_skip_states = backwardSkipStates,
+      shared_tokens = shared_tokens)
 
   logger.info(("forward_span", forward_span))
   logger.info(("backward_span", backward_span))
@@ -217,3 +242,16 @@ def main(cursor, text_buffer, inner=True, logger = None):
       logger.info(("back cursor move forward", backward_cursor, "With char", backward_char))
 
   return TextSpan(backward_cursor, forward_cursor)
+
+def mainMany(cursors, text_buffer, inner = True, logger = None):
+  """
+  main at each of cursors, in input order. Lines are lexed once for all of them, and
+  cursors on the same id or keyword share one parse
+  """
+  shared_tokens = SharedTokens(text_buffer, allow_space_token = True)
+  return resolveMany(cursors,
+      lambda cursor: main(cursor, text_buffer, inner, logger, shared_tokens = shared_tokens),
+      shared_tokens.headKey)
+
+def warm():
+  warmTextObject(main)
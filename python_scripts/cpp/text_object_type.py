@@ -65,14 +65,20 @@ addParserRule(parserTransitionBackward, ParserStates.kTypeColon1, TokenType.kCol
 addParserRule(parserTransitionBackward, ParserStates.kTypeColon2, TokenType.kId, transitionTo(ParserStates.kType))
 
 
-def main(cursor, text_buffer, inner=True, logger = None):
-  parser_forward = Parser(parserTransitionForward, ParserStates.kStart)
-  parser_backward = Parser(parserTransitionBackward, ParserStates.kStart)
+@withMetrics
+def main(cursor, text_buffer, inner=True, logger = None, metrics = None, shared_tokens = None):
+  """
+  With a ParseMetrics given (span, metrics) is returned. shared_tokens is the SharedTokens of a batch,
+  see mainMany
+  """
+  parser_forward = Parser(parserTransitionForward, ParserStates.kStart, metrics = metrics)
+  parser_backward = Parser(parserTransitionBackward, ParserStates.kStart, metrics = metrics)
   forward_span, backward_span = stream_parser_util.runCppParser(
       parser_forward,
       parser_backward,
       cursor,
-      text_buffer)
+      text_buffer,
+      shared_tokens = shared_tokens)
   # lexer_backward = CppStreamLexer()
   # parser_backward = Parser(parserTransitionBackward, ParserStates.kStart)
   # backward_span = parseText(lexer_backward, parser_backward, TokenType.kEnd, text_buffer, cursor, False)
@@ -87,3 +93,16 @@ def main(cursor, text_buffer, inner=True, logger = None):
     return backward_span
   else:
     return forward_span
+
+def mainMany(cursors, text_buffer, inner = True, logger = None):
+  """
+  main at each of cursors, in input order. The buffer is lexed once for all of them, and cursors on
+  the same id or keyword share one parse
+  """
+  shared_tokens = stream_parser_util.SharedTokens(text_buffer)
+  return stream_parser_util.resolveMany(cursors,
+      lambda cursor: main(cursor, text_buffer, inner, logger, shared_tokens = shared_tokens),
+      shared_tokens.headKey)
+
+def warm():
+  stream_parser_util.warmTextObject(main)
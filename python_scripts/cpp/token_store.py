@@ -0,0 +1,108 @@
+from stream_parser import *
+from stream_lexer_cpp import TokenType, LexerState, keyWords
+from line_lexer_cpp import LineTokenStream
+from array import array
+import bisect
+
+# Small integer id of every token type, and back
+tokenTypes = list(TokenType.kAllTokens)
+tokenTypeIds = dict((x, i) for i, x in enumerate(tokenTypes))
+
+# Tokens a cursor inside of is moved to the head of, so the lexer grabs them whole
+headTokenTypes = set([TokenType.kId, TokenType.kArrow] + keyWords.values())
+
+class TokenStore(object):
+  """
+  Tokens of a whole buffer kept in parallel array columns: the type id, start offset and end offset
+  (exclusive) of every token in buffer order, multiline tokens joined like LineTokenStream does.
+
+  Offsets count from the head of the buffer with one char for each '\\n', so the token under a cursor is
+  a bisect on the start offsets. Token objects are only created when asked for.
+  """
+  def __init__(self, text_buffer, allow_space_token = False, token_stream = None):
+    if token_stream is None or token_stream.allowSpaceToken != allow_space_token:
+      token_stream = LineTokenStream(text_buffer, allow_space_token)
+    self.allowSpaceToken = allow_space_token
+    # Offset of the head of every row
+    self.lineOffsets = array(kOffsetTypecode)
+    self.types = array('i')
+    self.starts = array(kOffsetTypecode)
+    self.ends = array(kOffsetTypecode)
+
+    space_id = tokenTypeIds[TokenType.kSpace]
+    offset = 0
+    # Whether the last token may continue on the next line
+    continues = False
+    for row in xrange(text_buffer.maxLines()):
+      self.lineOffsets.append(offset)
+      line = text_buffer.getLine(row)
+      columns, next_state = token_stream.lineColumns(row)
+      for start, end, token_type in columns:
+        type_id = tokenTypeIds[token_type]
+        if continues and start == 0 and self.types[-1] == type_id:
+          self.ends[-1] = offset + end
+        else:
+          self.types.append(type_id)
+          self.starts.append(offset + start)
+          self.ends.append(offset + end)
+        continues = False
+      if columns:
+        continues = next_state == LexerState.kString or \
+            (self.types[-1] == space_id and self.ends[-1] == offset + len(line) + 1)
+      else:
+        continues = False
+      offset += len(line) + 1
+
+  def __len__(self):
+    return len(self.types)
+
+  def toOffset(self, cursor):
+    return self.lineOffsets[cursor.row] + cursor.column
+
+  def toCursor(self, offset):
+    row = bisect.bisect_right(self.lineOffsets, offset) - 1
+    return Cursor(row, offset - self.lineOffsets[row])
+
+  def toEndCursor(self, offset):
+    """
+    Cursor of an exclusive end offset, a token ending with a '\\n' ends past the end of its own row
+    """
+    row = max(bisect.bisect_left(self.lineOffsets, offset) - 1, 0)
+    return Cursor(row, offset - self.lineOffsets[row])
+
+  def tokenType(self, index):
+    return tokenTypes[self.types[index]]
+
+  def token(self, index):
+    return Token(makeSpan(self.toCursor(self.starts[index]), self.toEndCursor(self.ends[index])),
+        tokenTypes[self.types[index]])
+
+  def tokenIndexAt(self, cursor):
+    """
+    Index of the token under cursor, -1 when cursor is in spaces or a comment
+    """
+    if not inRange(cursor.row, self.lineOffsets) or cursor.column < 0:
+      return -1
+    offset = self.toOffset(cursor)
+    index = bisect.bisect_right(self.starts, offset) - 1
+    if index >= 0 and offset < self.ends[index]:
+      return index
+    return -1
+
+  def tokenAt(self, cursor):
+    """
+    Token under cursor, None when there is none
+    """
+    index = self.tokenIndexAt(cursor)
+    if index == -1:
+      return None
+    return self.token(index)
+
+  def tokenHead(self, cursor):
+    """
+    cursor moved to the head of the id, keyword or -> it is on, unchanged otherwise
+    """
+    index = self.tokenIndexAt(cursor)
+    if index == -1 or tokenTypes[self.types[index]] not in headTokenTypes:
+      return cursor.clone()
+    return self.toCursor(self.starts[index])
@@ -1,16 +1,69 @@
 import vim
 import sys
-import importlib
 import stream_parser
+import module_registry
+from lru_cache import LruCache
 import logging
 
-reloadModules = False
+logging.basicConfig()
+logger = logging.getLogger(__name__)
+
+# Text object and generator modules, loaded once. With setReloadModules on they are reloaded, along with
+# the modules of this package they depend on, when one of their sources changes
+registry = module_registry.ModuleRegistry()
 def setReloadModules(x):
-  reloadModules = x
+  registry.reloadModules = x
+
+def vimWarmModules():
+  registry.warmAll()
+
+# Logs the ParseMetrics of every text object invocation
+logMetrics = False
+def setLogMetrics(x):
+  global logMetrics
+  logMetrics = x
+
+# Reads the vim buffer a window of lines at a time instead of a line or a char per call
+windowedBuffer = True
+def setWindowedBuffer(x):
+  global windowedBuffer
+  windowedBuffer = x
+
+# Lines fetched around the cursor by the first call of a windowed buffer
+kInitialWindow = stream_parser.kDefaultLineWindow
+
+# Buffers whose caches are kept at once
+kBufferCacheSize = 16
+
+# vim buffer number => {cache attribute: value}
+# A VimBuffer is created per invocation but its lexed lines, line states and indices are kept, for the
+# kBufferCacheSize buffers last read
+bufferCaches = LruCache(kBufferCacheSize)
+
+def clearBufferCaches(buffer_number):
+  bufferCaches.discard(buffer_number)
+
+def getBufferCaches(buffer_number):
+  caches = bufferCaches.get(buffer_number)
+  if caches is None:
+    caches = {}
+    bufferCaches.put(buffer_number, caches)
+  return caches
+
+def getChangedTick(vim_buffer):
+  try:
+    return vim_buffer.vars["changedtick"]
+  except (AttributeError, KeyError):
+    return None
 
-class VimBuffer(stream_parser.Buffer):
+class VimBuffer(stream_parser.SharedCaches, stream_parser.Buffer):
   def __init__(self, text):
     self.text = text
+    self.caches = None
+    number = getattr(text, "number", None)
+    if number is not None:
+      self.caches = getBufferCaches(number)
+      self.changedTick = getChangedTick(text)
 
   def getChar(self, cursor):
     if stream_parser.inRange(cursor.row, self.text):
@@ -30,6 +83,45 @@ class VimBuffer(stream_parser.Buffer):
       c = self.getChar(cursor_it)
     return ''.join(chars)
 
+class VimLineWindow(stream_parser.ProviderLineWindow):
+  """
+  Line window with a vim buffer as its line provider, standing in for it as VimBuffer.text.
+  bridgeCalls counts the calls made to the vim buffer
+  """
+  def __init__(self, vim_buffer, row, window = kInitialWindow):
+    self.vimBuffer = vim_buffer
+    stream_parser.ProviderLineWindow.__init__(self, self.vimLine, self.vimLines, self.vimLineCount, row,
+        window)
+
+  def vimLine(self, row):
+    try:
+      return self.vimBuffer[row]
+    except IndexError:
+      return None
+
+  def vimLines(self, start, end):
+    return self.vimBuffer[start:end]
+
+  def vimLineCount(self):
+    return len(self.vimBuffer)
+
+class VimWindowBuffer(stream_parser.WindowBuffer, VimBuffer):
+  """
+  VimBuffer reading the lines of the vim buffer through a VimLineWindow around row
+  """
+  def __init__(self, vim_buffer, row, window = kInitialWindow):
+    VimBuffer.__init__(self, vim_buffer)
+    self.text = VimLineWindow(vim_buffer, row, window)
+
+  def getChar(self, cursor):
+    line = self.getLine(cursor.row)
+    if line is not None:
+      if 0 <= cursor.column < len(line):
+        return line[cursor.column]
+      elif cursor.column == len(line):
+        return '\n'
+    return None
+
 class VimUtil(object):
   @staticmethod
   def selectTextSpan(span):
@@ -44,20 +136,25 @@ class VimUtil(object):
     vim.current.buffer.append(lines, selected_line - 1)
 
 def vimMainTextObject(module_name, inner=True):
-  module = importlib.import_module(module_name)
-  if reloadModules:
-    reload(stream_parser)
-    reload(module)
+  module = registry.get(module_name)
   (row,col) = vim.current.window.cursor
   cursor = stream_parser.Cursor(row - 1, col)
-  buf = VimBuffer(vim.current.buffer)
-  span = module.main(cursor, buf, inner=inner)
+  if windowedBuffer:
+    buf = VimWindowBuffer(vim.current.buffer, cursor.row)
+  else:
+    buf = VimBuffer(vim.current.buffer)
+  if logMetrics:
+    span, metrics = module.main(cursor, buf, inner=inner, metrics=stream_parser.ParseMetrics())
+    logger.info((module_name, "metrics", metrics.asDict()))
+    if windowedBuffer:
+      logger.info((module_name, "bridge calls", buf.bridgeCalls(), "lines fetched", buf.linesFetched(),
+          "of", buf.maxLines()))
+  else:
+    span = module.main(cursor, buf, inner=inner)
   if span:
     VimUtil.selectTextSpan(span)
 
 def vimMainAppendSelection(module_name, text):
-  module = importlib.import_module(module_name)
-  if reloadModules:
-    reload(module)
+  module = registry.get(module_name)
   out_text = module.main(text)
   VimUtil.insertAboveSelection(out_text)